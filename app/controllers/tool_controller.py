@@ -6,7 +6,8 @@ import json
 from app.core.tool_manager import (
     load_all_tools, get_all_loaded_tools, get_all_dynamic_tools, 
     set_tool_status, is_tool_active, get_loading_errors,
-    set_tool_postprocess, get_tool_postprocess
+    set_tool_postprocess, get_tool_postprocess, get_last_reload_report,
+    get_tool_summary
 )
 from app.core.tool_definition_registry import (
     register_tool, persist_tool_to_disk, get_tool_code, save_tool_code, delete_tool_file,
@@ -18,16 +19,19 @@ from app.services import tool_service
 # Asegurarse de que el directorio tools existe
 os.makedirs(TOOLS_FOLDER, exist_ok=True)
 
-def reload_tools():
+def reload_tools(force=False):
     """
-    Recarga todas las herramientas disponibles
+    Recarga las herramientas disponibles (solo los archivos añadidos, modificados o eliminados)
+    
+    Args:
+        force: Si es True, reimporta todos los archivos aunque no hayan cambiado
     
     Returns:
         bool: True si la operación fue exitosa
     """
     try:
         # Cargar herramientas
-        load_all_tools()
+        load_all_tools(force=force)
         # Actualizar el resumen de herramientas en la sesión
         update_tool_summary()
         return True
@@ -42,19 +46,8 @@ def update_tool_summary():
     Returns:
         dict: Resumen actualizado de herramientas
     """
-    # Status rápido de herramientas
-    all_tools = {**get_all_loaded_tools(), **get_all_dynamic_tools()}
-    active_tools = [name for name, _ in all_tools.items() if is_tool_active(name)]
-    total_tools = len(all_tools)
-    active_count = len(active_tools)
-    
-    # Actualizar en el estado de sesión
-    st.session_state.tool_summary = {
-        "all_tools": all_tools,
-        "active_tools": active_tools,
-        "total_tools": total_tools,
-        "active_count": active_count
-    }
+    # Índice precalculado por tool_manager (solo se recalcula si cambian las herramientas)
+    st.session_state.tool_summary = get_tool_summary()
     
     return st.session_state.tool_summary
 
@@ -426,6 +419,10 @@ def get_tool_state_view(tool_name: str) -> dict:
         "postprocess": get_tool_postprocess(tool_name)
     }
 
+def get_last_reload_report_view() -> dict:
+    """Devuelve el informe de la última recarga de herramientas."""
+    return get_last_reload_report()
+
 def get_loading_errors_view() -> list:
     """Devuelve la lista de errores de carga de herramientas."""
     return get_loading_errors()
@@ -55,6 +55,7 @@ def set_toolchain_to_edit(name: str):
                  st.session_state[f"edit_tool_{name}_{i}"] = step.tool_name
                  map_text = "\n".join([f"{k}:{v}" for k, v in step.input_map.items()])
                  st.session_state[f"edit_map_{name}_{i}"] = map_text
+                 st.session_state[f"edit_out_{name}_{i}"] = ", ".join(step.output_keys or [])
 
 
 def clear_toolchain_to_edit():
@@ -71,7 +72,7 @@ def clear_toolchain_to_edit():
                  del st.session_state[key]
         # Claves de pasos (asumiendo un máximo de 10)
         for i in range(10):
-             for prefix in [f"edit_tool_{target_name}_{i}", f"edit_map_{target_name}_{i}"]:
+             for prefix in [f"edit_tool_{target_name}_{i}", f"edit_map_{target_name}_{i}", f"edit_out_{target_name}_{i}"]:
                  if prefix in st.session_state:
                      del st.session_state[prefix]
 
@@ -115,7 +116,15 @@ def clear_toolchain_to_run():
 
 # --- Funciones para manejar acciones (Crear, Actualizar, Eliminar) ---
 
-def handle_save_new_toolchain(name: str, description: str, raw_steps: List[Tuple[str, str]]):
+def _parse_output_keys(raw_outputs: str) -> List[str] | None:
+    """
+    Convierte el texto 'clave1, clave2' del formulario en la lista de output_keys.
+    Vacío devuelve None: las claves se toman del schema de la tool si las declara.
+    """
+    keys = [key.strip() for key in raw_outputs.replace("\n", ",").split(",") if key.strip()]
+    return keys or None
+
+def handle_save_new_toolchain(name: str, description: str, raw_steps: List[Tuple[str, str, str]]):
     """
     Procesa y guarda una nueva toolchain.
     Llamará a toolchain_registry.register_toolchain y toolchain_registry.save_toolchains_to_disk.
@@ -123,7 +132,7 @@ def handle_save_new_toolchain(name: str, description: str, raw_steps: List[Tuple
     """
     try:
         steps = []
-        for i, (tool_name, raw_map) in enumerate(raw_steps):
+        for i, (tool_name, raw_map, raw_outputs) in enumerate(raw_steps):
             input_map = {}
             if not tool_name.strip():
                 st.warning(f"Se omitió el Paso {i+1} porque no tiene nombre de herramienta.")
@@ -136,7 +145,8 @@ def handle_save_new_toolchain(name: str, description: str, raw_steps: List[Tuple
                 elif line.strip(): # Advertir sobre líneas mal formateadas que no están vacías
                      st.warning(f"Paso {i+1}, línea de mapeo ignorada (formato esperado 'clave:valor'): '{line}'")
 
-            steps.append(ToolchainStep(tool_name=tool_name.strip(), input_map=input_map))
+            steps.append(ToolchainStep(tool_name=tool_name.strip(), input_map=input_map,
+                                       output_keys=_parse_output_keys(raw_outputs)))
 
         if not steps:
              st.error("❌ No se puede guardar una toolchain sin pasos válidos.")
@@ -167,6 +177,7 @@ def handle_save_new_toolchain(name: str, description: str, raw_steps: List[Tuple
             for i in range(10): # Limpiar campos de pasos
                 if f"new_tool_{i}" in st.session_state: st.session_state[f"new_tool_{i}"] = ""
                 if f"new_map_{i}" in st.session_state: st.session_state[f"new_map_{i}"] = ""
+                if f"new_out_{i}" in st.session_state: st.session_state[f"new_out_{i}"] = ""
 
             return True
         else:
@@ -179,7 +190,7 @@ def handle_save_new_toolchain(name: str, description: str, raw_steps: List[Tuple
         return False
 
 
-def handle_save_edited_toolchain(original_name: str, new_name: str, new_description: str, raw_steps: List[Tuple[str, str]]):
+def handle_save_edited_toolchain(original_name: str, new_name: str, new_description: str, raw_steps: List[Tuple[str, str, str]]):
     """
     Procesa y guarda los cambios de una toolchain editada.
     Gestiona la eliminación y el registro si el nombre cambia.
@@ -187,7 +198,7 @@ def handle_save_edited_toolchain(original_name: str, new_name: str, new_descript
     """
     try:
         steps = []
-        for i, (tool_name, raw_map) in enumerate(raw_steps):
+        for i, (tool_name, raw_map, raw_outputs) in enumerate(raw_steps):
             input_map = {}
             if not tool_name.strip():
                 st.warning(f"Se omitió el Paso {i+1} durante la edición porque no tiene nombre de herramienta.")
@@ -200,7 +211,8 @@ def handle_save_edited_toolchain(original_name: str, new_name: str, new_descript
                 elif line.strip():
                     st.warning(f"Paso {i+1} (editado), línea de mapeo ignorada: '{line}'")
 
-            steps.append(ToolchainStep(tool_name=tool_name.strip(), input_map=input_map))
+            steps.append(ToolchainStep(tool_name=tool_name.strip(), input_map=input_map,
+                                       output_keys=_parse_output_keys(raw_outputs)))
 
         if not steps:
              st.error("❌ No se puede guardar una toolchain editada sin pasos válidos.")
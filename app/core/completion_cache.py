@@ -0,0 +1,200 @@
+"""
+completion_cache.py
+
+Caché opcional de respuestas del modelo para llamadas deterministas (temperature 0 y seed fijo).
+
+La clave es un hash del modelo, los mensajes, el conjunto de tools ofrecido y los parámetros
+de muestreo. Hay dos niveles:
+
+- Memoria: LRU de HALION_COMPLETION_CACHE_SIZE entradas.
+- Disco (opcional): un JSON por respuesta en app/cache/completions/, con caducidad
+  (HALION_COMPLETION_CACHE_TTL, en segundos) y tamaño máximo (HALION_COMPLETION_CACHE_MAX_MB).
+
+Se activa con HALION_COMPLETION_CACHE = "memory" o "disk" (memoria + disco). Las respuestas en
+streaming se guardan una vez reconstruidas, con la misma clave que las no streaming.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from openai.types.chat import ChatCompletion
+from app.core.metrics import describe, inc_counter
+
+# Definir rutas absolutas basadas en la ubicación actual del script
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(CURRENT_DIR)                     # Directorio app/
+CACHE_DIR = os.path.join(APP_DIR, "cache", "completions")  # Directorio app/cache/completions/
+
+COMPLETION_CACHE_ENV_VAR = "HALION_COMPLETION_CACHE"
+COMPLETION_CACHE_SIZE_ENV_VAR = "HALION_COMPLETION_CACHE_SIZE"
+COMPLETION_CACHE_TTL_ENV_VAR = "HALION_COMPLETION_CACHE_TTL"
+COMPLETION_CACHE_MAX_MB_ENV_VAR = "HALION_COMPLETION_CACHE_MAX_MB"
+DEFAULT_COMPLETION_CACHE_SIZE = 256
+DEFAULT_COMPLETION_CACHE_TTL = 7 * 24 * 3600
+DEFAULT_COMPLETION_CACHE_MAX_MB = 100
+
+# Parámetros de la petición que forman parte de la clave (el timeout no afecta a la respuesta)
+KEY_PARAMS = (
+    "model", "messages", "tools", "tool_choice", "temperature", "top_p",
+    "presence_penalty", "frequency_penalty", "seed", "max_tokens"
+)
+# Cada cuántas escrituras en disco se comprueba el tamaño total
+DISK_PRUNE_EVERY = 50
+
+describe("halion_completion_cache_total", "counter", "Consultas a la caché de respuestas del modelo por resultado")
+
+_lock = threading.Lock()
+_memory = OrderedDict()  # clave -> datos de la respuesta (dict)
+_stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+_disk_writes = 0
+
+def _cache_mode() -> str:
+    """Modo de la caché: "off", "memory" o "disk" (se lee en cada llamada, tras load_dotenv)."""
+    mode = os.getenv(COMPLETION_CACHE_ENV_VAR, "off").strip().lower()
+    return mode if mode in ("memory", "disk") else "off"
+
+def _env_number(name: str, default, cast=int):
+    try:
+        return cast(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+def cache_key(params: dict) -> str | None:
+    """
+    Devuelve la clave de caché de una petición, o None si no se debe cachear
+    (caché desactivada, temperature distinta de 0 o sin seed).
+    """
+    if _cache_mode() == "off" or params.get("temperature") != 0 or params.get("seed") is None:
+        return None
+    keyed = {name: params.get(name) for name in KEY_PARAMS}
+    canonical = json.dumps(keyed, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def _record(result: str):
+    _stats[result] += 1
+    inc_counter("halion_completion_cache_total", result=result)
+
+def _disk_path(key: str) -> str:
+    return os.path.join(CACHE_DIR, f"{key}.json")
+
+def _read_disk(key: str) -> dict | None:
+    path = _disk_path(key)
+    try:
+        if time.time() - os.path.getmtime(path) > _env_number(COMPLETION_CACHE_TTL_ENV_VAR, DEFAULT_COMPLETION_CACHE_TTL, float):
+            os.remove(path)
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"[ERROR] Entrada de caché no válida {path}: {e}")
+        return None
+
+def _write_disk(key: str, data: dict):
+    global _disk_writes
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _disk_path(key)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"[ERROR] No se pudo guardar la respuesta en caché: {e}")
+        return
+    _disk_writes += 1
+    if _disk_writes % DISK_PRUNE_EVERY == 0:
+        prune_disk_cache()
+
+def prune_disk_cache():
+    """Elimina las entradas caducadas del disco y, si se supera el tamaño máximo, las más antiguas."""
+    if not os.path.isdir(CACHE_DIR):
+        return
+    ttl = _env_number(COMPLETION_CACHE_TTL_ENV_VAR, DEFAULT_COMPLETION_CACHE_TTL, float)
+    max_bytes = _env_number(COMPLETION_CACHE_MAX_MB_ENV_VAR, DEFAULT_COMPLETION_CACHE_MAX_MB, float) * 1024 * 1024
+    now = time.time()
+    entries = []
+    for name in os.listdir(CACHE_DIR):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(CACHE_DIR, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        if now - stat.st_mtime > ttl:
+            os.remove(path)
+        else:
+            entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+def get_cached_completion(key: str | None) -> ChatCompletion | None:
+    """Busca una respuesta en la caché (memoria y, si está activo, disco)."""
+    if key is None:
+        return None
+    with _lock:
+        data = _memory.get(key)
+        if data is not None:
+            _memory.move_to_end(key)
+            _record("memory_hits")
+            return ChatCompletion.model_validate(data)
+    data = _read_disk(key) if _cache_mode() == "disk" else None
+    with _lock:
+        if data is None:
+            _record("misses")
+            return None
+        _remember(key, data)
+        _record("disk_hits")
+    return ChatCompletion.model_validate(data)
+
+def _remember(key: str, data: dict):
+    _memory[key] = data
+    _memory.move_to_end(key)
+    capacity = max(0, _env_number(COMPLETION_CACHE_SIZE_ENV_VAR, DEFAULT_COMPLETION_CACHE_SIZE))
+    while len(_memory) > capacity:
+        _memory.popitem(last=False)
+
+def store_completion(key: str | None, response):
+    """Guarda una respuesta del modelo bajo la clave dada (si la petición es cacheable)."""
+    if key is None or not hasattr(response, "model_dump"):
+        return
+    data = response.model_dump(mode="json", exclude_unset=True)
+    with _lock:
+        _remember(key, data)
+        _stats["stores"] += 1
+    if _cache_mode() == "disk":
+        _write_disk(key, data)
+
+def get_cache_stats() -> dict:
+    """Devuelve aciertos (memoria/disco), fallos, escrituras, tasa de aciertos y tamaño en memoria."""
+    with _lock:
+        stats = dict(_stats)
+        stats["memory_entries"] = len(_memory)
+    lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+    stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+    stats["mode"] = _cache_mode()
+    return stats
+
+def clear_completion_cache(disk: bool = True):
+    """Vacía la caché en memoria (y en disco si `disk`) y reinicia las estadísticas."""
+    with _lock:
+        _memory.clear()
+        for name in _stats:
+            _stats[name] = 0
+    if disk and os.path.isdir(CACHE_DIR):
+        for name in os.listdir(CACHE_DIR):
+            if name.endswith(".json"):
+                os.remove(os.path.join(CACHE_DIR, name))
@@ -0,0 +1,227 @@
+"""
+conversation_memory.py
+
+Memoria de conversación para el chat: guarda los turnos anteriores y construye el historial
+que se envía al modelo dentro de un presupuesto de tokens.
+
+- La longitud se estima con `tiktoken` si está instalado; si no, con una heurística local.
+- Los resultados de las tools se guardan compactados (recortados a unos cientos de caracteres).
+- Cuando los turnos superan el presupuesto, los más antiguos se resumen de forma incremental
+  en un resumen acumulado (extractivo y local por defecto, o con el modelo si se configura).
+
+Así el tamaño del prompt se mantiene acotado aunque la sesión sea larga.
+"""
+
+import math
+import os
+
+try:
+    import tiktoken
+except ImportError:  # Dependencia opcional
+    tiktoken = None
+
+HISTORY_TOKENS_ENV_VAR = "HALION_HISTORY_TOKENS"
+DEFAULT_HISTORY_TOKENS = 3000
+
+# Parte del presupuesto reservada para el resumen de turnos antiguos
+SUMMARY_BUDGET_RATIO = 0.25
+# Turnos recientes que nunca se resumen
+MIN_RECENT_TURNS = 1
+# Longitud máxima de cada resultado de tool guardado
+TOOL_RESULT_MAX_CHARS = 300
+# Tokens extra por mensaje (rol y separadores del formato de chat)
+MESSAGE_OVERHEAD_TOKENS = 4
+# Cabecera de los resultados de tools en el mensaje del asistente y separador nombre/resultado
+TOOL_RESULTS_HEADER = "[Resultados de herramientas]"
+TOOL_RESULT_SEPARATOR = " → "
+
+_encoding = None
+
+def estimate_tokens(text: str) -> int:
+    """Estima los tokens de un texto (tiktoken si está disponible; si no, ~4 caracteres por token)."""
+    global _encoding
+    if not text:
+        return 0
+    if tiktoken is not None:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        return len(_encoding.encode(text))
+    return max(math.ceil(len(text) / 4), len(text.split()))
+
+def compact_tool_result(name: str, result, max_chars: int = TOOL_RESULT_MAX_CHARS) -> str:
+    """Representación compacta de un resultado de tool: 'nombre → resultado recortado'."""
+    text = " ".join(str(result).split())
+    if len(text) > max_chars:
+        text = text[:max_chars - 1] + "…"
+    return f"{name}{TOOL_RESULT_SEPARATOR}{text}"
+
+def recent_tool_names(messages: list[dict]) -> list[str]:
+    """
+    Nombres de las tools usadas en los mensajes dados: las llamadas `tool_calls` de los mensajes
+    del asistente y los resultados compactados que añade ConversationMemory.
+    """
+    names = []
+    for message in messages:
+        if message.get("role") != "assistant":
+            continue
+        for call in message.get("tool_calls") or ():
+            function = call.get("function") if isinstance(call, dict) else None
+            if function and function.get("name"):
+                names.append(function["name"])
+        content = message.get("content")
+        if isinstance(content, str) and TOOL_RESULTS_HEADER in content:
+            for line in content.split(TOOL_RESULTS_HEADER, 1)[1].splitlines():
+                name, separator, _ = line.partition(TOOL_RESULT_SEPARATOR)
+                if separator and name.strip():
+                    names.append(name.strip())
+    return list(dict.fromkeys(names))
+
+def local_summarizer(summary: str, turns: list[dict]) -> str:
+    """Resumen extractivo sin modelo: una línea por turno con el inicio de pregunta y respuesta."""
+    lines = [summary] if summary else []
+    for turn in turns:
+        line = f"- Usuario: {' '.join(turn['user'].split())[:120]} | Asistente: {' '.join((turn['assistant'] or '').split())[:160]}"
+        if turn.get("tools"):
+            line += f" | Tools: {', '.join(t.split(' → ')[0] for t in turn['tools'])}"
+        lines.append(line)
+    return "\n".join(lines)
+
+def make_model_summarizer(api_key: str = "", model: str = "gpt-4o-mini"):
+    """
+    Crea un resumidor que usa el modelo para condensar el resumen previo y los turnos nuevos.
+
+    La llamada pasa por el backend de HALION_MODEL_BACKEND (sin red con "mock"). Si falla se
+    recurre al resumen local.
+    """
+    from app.core.model_backends import get_model_backend
+    from app.core.metrics import timed_chat_completion
+
+    backend = get_model_backend(api_key)
+
+    def summarize(summary: str, turns: list[dict]) -> str:
+        transcript = local_summarizer("", turns)
+        try:
+            response = timed_chat_completion(
+                backend.create,
+                model=model,
+                temperature=0,
+                messages=[
+                    {"role": "system", "content": "Resume la conversación en pocas frases, conservando datos, nombres y decisiones relevantes."},
+                    {"role": "user", "content": f"Resumen previo:\n{summary or '(vacío)'}\n\nTurnos nuevos:\n{transcript}"}
+                ]
+            )
+            return response.choices[0].message.content.strip()
+        except Exception as e:
+            print(f"[ERROR] No se pudo resumir la conversación con el modelo: {e}")
+            return local_summarizer(summary, turns)
+
+    return summarize
+
+class ConversationMemory:
+    """
+    Historial de una conversación con ventana por tokens y resumen incremental.
+
+    Args:
+        token_budget: Tokens máximos del historial enviado al modelo
+            (por defecto HALION_HISTORY_TOKENS).
+        summarizer: Función (resumen_previo, turnos) -> nuevo resumen; por defecto local_summarizer.
+    """
+
+    def __init__(self, token_budget: int | None = None, summarizer=None):
+        if token_budget is None:
+            try:
+                token_budget = int(os.getenv(HISTORY_TOKENS_ENV_VAR, DEFAULT_HISTORY_TOKENS))
+            except ValueError:
+                token_budget = DEFAULT_HISTORY_TOKENS
+        self.token_budget = token_budget
+        self.summarizer = summarizer or local_summarizer
+        self.summary = ""
+        self.turns = []           # [{"user", "assistant", "tools", "tokens"}]
+        self.summarized_turns = 0
+
+    def _turn_tokens(self, turn: dict) -> int:
+        return (
+            estimate_tokens(turn["user"]) + estimate_tokens(self._assistant_content(turn))
+            + 2 * MESSAGE_OVERHEAD_TOKENS
+        )
+
+    @staticmethod
+    def _assistant_content(turn: dict) -> str:
+        content = turn["assistant"] or ""
+        if turn.get("tools"):
+            content += f"\n\n{TOOL_RESULTS_HEADER}\n" + "\n".join(turn["tools"])
+        return content
+
+    def add_turn(self, user: str, assistant: str, tool_results: list[tuple[str, object]] | None = None):
+        """
+        Añade un turno completo y resume los más antiguos si se supera el presupuesto.
+
+        Args:
+            user: Mensaje del usuario.
+            assistant: Respuesta final del asistente.
+            tool_results: Pares (nombre de tool, resultado) del turno; se guardan compactados.
+        """
+        turn = {
+            "user": user,
+            "assistant": assistant,
+            "tools": [compact_tool_result(name, result) for name, result in tool_results or ()],
+        }
+        turn["tokens"] = self._turn_tokens(turn)
+        self.turns.append(turn)
+        self._compact()
+
+    def _compact(self):
+        """Resume en un solo paso los turnos antiguos que no caben en el presupuesto."""
+        summary_budget = int(self.token_budget * SUMMARY_BUDGET_RATIO)
+        available = self.token_budget - min(estimate_tokens(self.summary), summary_budget)
+        used = sum(turn["tokens"] for turn in self.turns)
+        fold = 0
+        while used > available and len(self.turns) - fold > MIN_RECENT_TURNS:
+            used -= self.turns[fold]["tokens"]
+            fold += 1
+        if not fold:
+            return
+        folded, self.turns = self.turns[:fold], self.turns[fold:]
+        self.summary = self._trim_summary(self.summarizer(self.summary, folded), summary_budget)
+        self.summarized_turns += fold
+
+    @staticmethod
+    def _trim_summary(summary: str, budget: int) -> str:
+        """Descarta las líneas más antiguas del resumen hasta que quepa en su presupuesto."""
+        lines = summary.splitlines()
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > budget:
+            lines.pop(0)
+        return "\n".join(lines)
+
+    def build_messages(self) -> list[dict]:
+        """
+        Devuelve el historial para el modelo: el resumen (como mensaje de sistema) y los turnos
+        más recientes que caben en el presupuesto (al menos MIN_RECENT_TURNS), en orden cronológico.
+        """
+        messages = []
+        remaining = self.token_budget
+        if self.summary:
+            remaining -= estimate_tokens(self.summary) + MESSAGE_OVERHEAD_TOKENS
+        recent = []
+        for turn in reversed(self.turns):
+            # Los últimos MIN_RECENT_TURNS turnos se envían siempre para no perder el contexto inmediato
+            if turn["tokens"] > remaining and len(recent) >= MIN_RECENT_TURNS:
+                break
+            remaining -= turn["tokens"]
+            recent.append(turn)
+        if self.summary:
+            messages.append({"role": "system", "content": f"Resumen de la conversación anterior:\n{self.summary}"})
+        for turn in reversed(recent):
+            messages.append({"role": "user", "content": turn["user"]})
+            messages.append({"role": "assistant", "content": self._assistant_content(turn)})
+        return messages
+
+    def estimated_tokens(self) -> int:
+        """Tokens estimados del historial que se enviaría ahora."""
+        return sum(estimate_tokens(m["content"]) + MESSAGE_OVERHEAD_TOKENS for m in self.build_messages())
+
+    def clear(self):
+        """Olvida todos los turnos y el resumen."""
+        self.summary = ""
+        self.turns = []
+        self.summarized_turns = 0
@@ -0,0 +1,193 @@
+"""
+log_store.py
+
+Almacén opcional en SQLite de las llamadas a herramientas, como alternativa o complemento
+al log JSONL de logger.py (variable de entorno HALION_LOG_BACKEND = "sqlite" o "both").
+
+Usa modo WAL (lecturas concurrentes con la escritura), inserciones por lotes desde el
+escritor en segundo plano del logger e índices por fecha, herramienta, usuario y errores,
+para poder filtrar sin recorrer todo el histórico.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+# Definir rutas absolutas basadas en la ubicación actual del script
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(CURRENT_DIR)                # Directorio app/
+DEBUG_LOGS_DIR = os.path.join(APP_DIR, "debug_logs")  # Directorio app/debug_logs/
+
+os.makedirs(DEBUG_LOGS_DIR, exist_ok=True)
+
+DB_FILE = os.path.join(DEBUG_LOGS_DIR, "tool_calls.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tool_calls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    function TEXT NOT NULL,
+    user_id TEXT,
+    is_error INTEGER NOT NULL DEFAULT 0,
+    execution_time REAL,
+    arguments TEXT,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tool_calls_timestamp ON tool_calls (timestamp);
+CREATE INDEX IF NOT EXISTS idx_tool_calls_function ON tool_calls (function, timestamp);
+CREATE INDEX IF NOT EXISTS idx_tool_calls_user ON tool_calls (user_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_tool_calls_errors ON tool_calls (timestamp) WHERE is_error = 1;
+"""
+
+_local = threading.local()  # Una conexión por hilo (sqlite3 no comparte conexiones entre hilos)
+
+def _get_connection() -> sqlite3.Connection:
+    """Devuelve la conexión del hilo actual, creando la base de datos si no existe."""
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "path", None) != DB_FILE:
+        conn = sqlite3.connect(DB_FILE, timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        _local.conn = conn
+        _local.path = DB_FILE
+    return conn
+
+def _to_text(value) -> str:
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+
+def insert_entries(entries: list[dict]):
+    """
+    Inserta un lote de entradas de log en una sola transacción.
+
+    Args:
+        entries: Entradas con el formato de logger.log_tool_call.
+    """
+    if not entries:
+        return
+    rows = [
+        (
+            e.get("timestamp"),
+            e.get("function"),
+            e.get("user_id"),
+            1 if e.get("is_error") else 0,
+            e.get("execution_time"),
+            _to_text(e.get("arguments")),
+            _to_text(e.get("result"))
+        )
+        for e in entries
+    ]
+    conn = _get_connection()
+    with conn:
+        conn.executemany(
+            "INSERT INTO tool_calls (timestamp, function, user_id, is_error, execution_time, arguments, result) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+
+def _row_to_entry(row: sqlite3.Row) -> dict:
+    entry = {
+        "id": row["id"],
+        "timestamp": row["timestamp"],
+        "function": row["function"],
+        "user_id": row["user_id"],
+        "is_error": bool(row["is_error"]),
+        "execution_time": row["execution_time"],
+    }
+    for key in ("arguments", "result"):
+        try:
+            entry[key] = json.loads(row[key]) if row[key] is not None else None
+        except json.JSONDecodeError:
+            entry[key] = row[key]
+    return entry
+
+def _build_filters(function=None, user_id=None, since=None, until=None, errors_only=False, before_id=None, functions=None):
+    clauses, params = [], []
+    if function:
+        clauses.append("function = ?")
+        params.append(function)
+    if functions:
+        clauses.append(f"function IN ({', '.join('?' for _ in functions)})")
+        params.extend(functions)
+    if user_id:
+        clauses.append("user_id = ?")
+        params.append(user_id)
+    if since:
+        clauses.append("timestamp >= ?")
+        params.append(since.isoformat() if isinstance(since, datetime) else since)
+    if until:
+        clauses.append("timestamp < ?")
+        params.append(until.isoformat() if isinstance(until, datetime) else until)
+    if errors_only:
+        clauses.append("is_error = 1")
+    if before_id:
+        clauses.append("id < ?")
+        params.append(int(before_id))
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+def query_tool_calls(function: str | None = None, user_id: str | None = None,
+                     since: datetime | str | None = None, until: datetime | str | None = None,
+                     errors_only: bool = False, limit: int = 100, before_id: int | None = None) -> list[dict]:
+    """
+    Devuelve las últimas `limit` llamadas que cumplen los filtros, en orden cronológico.
+
+    Args:
+        function: Nombre de la herramienta.
+        user_id: Usuario que hizo la llamada.
+        since / until: Rango de tiempo [since, until) (datetime UTC o ISO 8601).
+        errors_only: Solo llamadas con error.
+        limit: Número máximo de resultados.
+        before_id: Solo entradas con id menor (paginación hacia atrás).
+
+    Returns:
+        list[dict]: Entradas con las claves de logger.log_tool_call más "id".
+    """
+    where, params = _build_filters(function, user_id, since, until, errors_only, before_id)
+    rows = _get_connection().execute(
+        f"SELECT * FROM tool_calls{where} ORDER BY id DESC LIMIT ?", params + [limit]
+    ).fetchall()
+    return [_row_to_entry(row) for row in reversed(rows)]
+
+def count_tool_calls(function: str | None = None, user_id: str | None = None,
+                     since: datetime | str | None = None, until: datetime | str | None = None,
+                     errors_only: bool = False) -> int:
+    """Cuenta las llamadas que cumplen los filtros (mismos argumentos que query_tool_calls)."""
+    where, params = _build_filters(function, user_id, since, until, errors_only)
+    return _get_connection().execute(f"SELECT COUNT(*) FROM tool_calls{where}", params).fetchone()[0]
+
+def iter_tool_calls(functions: list[str] | None = None, since: datetime | str | None = None,
+                    until: datetime | str | None = None, batch_size: int = 1000):
+    """
+    Recorre las llamadas en orden cronológico, leyendo por lotes de `batch_size`.
+
+    Args:
+        functions: Limitar a estas herramientas.
+        since / until: Rango de tiempo [since, until).
+    """
+    where, params = _build_filters(since=since, until=until, functions=functions)
+    where = (where + " AND" if where else " WHERE") + " id > ?"
+    last_id = 0
+    conn = _get_connection()
+    while True:
+        rows = conn.execute(
+            f"SELECT * FROM tool_calls{where} ORDER BY id LIMIT ?", params + [last_id, batch_size]
+        ).fetchall()
+        if not rows:
+            return
+        for row in rows:
+            yield _row_to_entry(row)
+        last_id = rows[-1]["id"]
+
+def list_functions() -> list[str]:
+    """Devuelve los nombres de herramienta presentes en el almacén."""
+    rows = _get_connection().execute("SELECT DISTINCT function FROM tool_calls ORDER BY function").fetchall()
+    return [row[0] for row in rows]
+
+def clear_tool_calls():
+    """Elimina todas las llamadas del almacén."""
+    conn = _get_connection()
+    with conn:
+        conn.execute("DELETE FROM tool_calls")
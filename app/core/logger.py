@@ -1,7 +1,21 @@
 # logger.py (completo y actualizado)
+import atexit
+import bisect
+import csv
+import gzip
+import io
 import json
+import queue
+import shutil
+import threading
+import time
+import zlib
+from array import array
+from collections import OrderedDict, deque
 from datetime import datetime
 import os
+from app.core import log_store
+from app.utils.tool_results import is_error_result
 
 # Definir rutas absolutas basadas en la ubicación actual del script
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -15,19 +29,657 @@ if not os.path.exists(DEBUG_LOGS_DIR):
 
 LOG_FILE = os.path.join(DEBUG_LOGS_DIR, "tool_calls.log")
 
-def log_tool_call(function_name: str, arguments: dict, result):
+# Backend de almacenamiento: "jsonl" (por defecto), "sqlite" (solo app/core/log_store.py)
+# o "both". Se lee en cada escritura/lectura, después de load_dotenv().
+LOG_BACKEND_ENV_VAR = "HALION_LOG_BACKEND"
+
+# Rotación: por tamaño y por día, con segmentos comprimidos "tool_calls.log.<fecha>.gz".
+# Valores por defecto, configurables con variables de entorno (se leen en cada rotación).
+LOG_MAX_BYTES_ENV_VAR = "HALION_LOG_MAX_BYTES"            # 0 = sin rotación por tamaño
+LOG_ROTATE_DAILY_ENV_VAR = "HALION_LOG_ROTATE_DAILY"
+LOG_BACKUP_COUNT_ENV_VAR = "HALION_LOG_BACKUP_COUNT"      # Máximo de segmentos archivados
+LOG_RETENTION_DAYS_ENV_VAR = "HALION_LOG_RETENTION_DAYS"  # 0 = sin límite de antigüedad
+DEFAULT_LOG_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_LOG_BACKUP_COUNT = 30
+DEFAULT_LOG_RETENTION_DAYS = 30
+
+# Escritura en segundo plano: las entradas se encolan y un hilo las escribe por lotes
+LOG_FLUSH_BATCH_SIZE = 200    # Escribir en cuanto haya este número de entradas pendientes
+LOG_FLUSH_INTERVAL = 0.5      # ... o cuando la más antigua lleve este tiempo (segundos) en cola
+
+class _FlushRequest:
+    """Marca en la cola para forzar la escritura de lo pendiente (y opcionalmente fsync)."""
+    def __init__(self, fsync: bool = False):
+        self.fsync = fsync
+        self.done = threading.Event()
+
+class _LogWriter:
+    """
+    Escritor de logs en segundo plano.
+
+    Las líneas se acumulan en una cola en memoria y un hilo daemon las escribe en LOG_FILE
+    con una sola apertura/escritura por lote, cuando se alcanza LOG_FLUSH_BATCH_SIZE,
+    pasa LOG_FLUSH_INTERVAL, se pide un flush explícito o el proceso termina.
+    """
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.file_lock = threading.Lock()  # Serializa escrituras y operaciones sobre el archivo
+
+    def submit(self, line: str):
+        self._ensure_started()
+        self._queue.put(line)
+
+    def flush(self, fsync: bool = False, timeout: float | None = 5.0) -> bool:
+        """Espera a que se escriba todo lo encolado hasta ahora. Devuelve False si expira."""
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        request = _FlushRequest(fsync)
+        self._queue.put(request)
+        return request.done.wait(timeout)
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._start_lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="halion-log-writer", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        pending = []
+        oldest = None
+        while True:
+            timeout = None if oldest is None else max(0.0, LOG_FLUSH_INTERVAL - (time.monotonic() - oldest))
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, str):
+                pending.append(item)
+                if oldest is None:
+                    oldest = time.monotonic()
+                # Vaciar lo que ya esté en cola sin bloquear, hasta el tamaño de lote
+                while len(pending) < LOG_FLUSH_BATCH_SIZE:
+                    try:
+                        nxt = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if isinstance(nxt, str):
+                        pending.append(nxt)
+                    else:
+                        item = nxt
+                        break
+
+            due = oldest is not None and time.monotonic() - oldest >= LOG_FLUSH_INTERVAL
+            if pending and (isinstance(item, _FlushRequest) or len(pending) >= LOG_FLUSH_BATCH_SIZE or due or item is None):
+                self._write(pending, fsync=isinstance(item, _FlushRequest) and item.fsync)
+                pending = []
+                oldest = None
+            elif isinstance(item, _FlushRequest) and item.fsync:
+                self._write([], fsync=True)
+
+            if isinstance(item, _FlushRequest):
+                item.done.set()
+
+    def _write(self, lines: list[str], fsync: bool = False):
+        backend = _log_backend()
+        # Un fsync sin líneas pendientes no debe crear un log vacío
+        if backend != "sqlite" and (lines or os.path.exists(LOG_FILE)):
+            try:
+                with self.file_lock:
+                    if lines and _should_rotate(sum(len(line) for line in lines)):
+                        _rotate_active_log()
+                    with open(LOG_FILE, "a", encoding="utf-8") as f:
+                        if lines:
+                            f.write("".join(lines))
+                        if fsync:
+                            f.flush()
+                            os.fsync(f.fileno())
+            except Exception as e:
+                print(f"[ERROR] No se pudieron escribir {len(lines)} entradas en {LOG_FILE}: {e}")
+        if backend != "jsonl" and lines:
+            try:
+                log_store.insert_entries([json.loads(line) for line in lines])
+            except Exception as e:
+                print(f"[ERROR] No se pudieron insertar {len(lines)} entradas en {log_store.DB_FILE}: {e}")
+
+_log_writer = _LogWriter()
+
+def _reset_log_writer_after_fork():
+    # El hilo escritor no sobrevive a un fork: el proceso hijo empieza con un escritor nuevo
+    global _log_writer
+    _log_writer = _LogWriter()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_log_writer_after_fork)
+
+def flush_logs(fsync: bool = False, timeout: float | None = 5.0) -> bool:
+    """
+    Fuerza la escritura de las entradas de log pendientes.
+
+    Args:
+        fsync: Si es True, además sincroniza el archivo con el disco (os.fsync).
+        timeout: Segundos máximos de espera (None = sin límite).
+
+    Returns:
+        bool: True si todo lo pendiente se escribió dentro del tiempo de espera.
+    """
+    return _log_writer.flush(fsync=fsync, timeout=timeout)
+
+atexit.register(flush_logs, True)
+
+def _log_backend() -> str:
+    backend = os.getenv(LOG_BACKEND_ENV_VAR, "jsonl").strip().lower()
+    return backend if backend in ("jsonl", "sqlite", "both") else "jsonl"
+
+def log_tool_call(function_name: str, arguments: dict, result, user_id: str | None = None, error: bool | None = None,
+                  execution_time: float | None = None):
+    """
+    Registra una llamada a una herramienta.
+
+    La entrada se serializa en el hilo del llamador (para capturar los valores actuales) y
+    se encola; la escritura en disco la hace el escritor en segundo plano por lotes.
+
+    Args:
+        function_name: Nombre de la herramienta.
+        arguments: Argumentos de la llamada.
+        result: Resultado devuelto por la herramienta.
+        user_id: Usuario que originó la llamada.
+        error: Si la llamada falló; por defecto se deduce del resultado.
+        execution_time: Duración de la ejecución de la herramienta, en segundos.
+    """
     entry = {
         "timestamp": datetime.utcnow().isoformat(),
         "function": function_name,
+        "user_id": user_id,
+        "is_error": is_error_result(result) if error is None else bool(error),
+        "execution_time": round(execution_time, 6) if execution_time is not None else None,
         "arguments": arguments,
         "result": result
     }
-    with open(LOG_FILE, "a", encoding="utf-8") as f:
-        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    _log_writer.submit(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+
+# Tamaño de bloque para leer el log desde el final
+LOG_TAIL_BLOCK_SIZE = 64 * 1024
+
+# --- Rotación y retención --- #
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+def _should_rotate(incoming_bytes: int) -> bool:
+    """Indica si el log activo debe rotarse antes de añadirle `incoming_bytes`."""
+    try:
+        stat = os.stat(LOG_FILE)
+    except FileNotFoundError:
+        return False
+    if stat.st_size == 0:
+        return False
+    max_bytes = _env_int(LOG_MAX_BYTES_ENV_VAR, DEFAULT_LOG_MAX_BYTES)
+    if max_bytes > 0 and stat.st_size + incoming_bytes > max_bytes:
+        return True
+    rotate_daily = os.getenv(LOG_ROTATE_DAILY_ENV_VAR, "true").strip().lower() not in ("0", "false", "no", "off")
+    return rotate_daily and datetime.fromtimestamp(stat.st_mtime).date() != datetime.now().date()
+
+def _archive_prefix() -> str:
+    return os.path.basename(LOG_FILE) + "."
+
+def _list_log_archives() -> list[str]:
+    """Devuelve las rutas de los segmentos archivados, del más antiguo al más reciente."""
+    log_dir = os.path.dirname(LOG_FILE)
+    prefix = _archive_prefix()
+    try:
+        names = [n for n in os.listdir(log_dir) if n.startswith(prefix) and n.endswith(".gz")]
+    except FileNotFoundError:
+        return []
+    return [os.path.join(log_dir, n) for n in sorted(names)]
+
+def _rotate_active_log():
+    """
+    Comprime el log activo en un segmento archivado y aplica la política de retención.
+    Debe llamarse con `_log_writer.file_lock` adquirido.
+    """
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    archive_path = f"{LOG_FILE}.{stamp}.gz"
+    pending_path = f"{LOG_FILE}.{stamp}.rotating"
+    try:
+        # Renombrar primero: el log activo queda libre de inmediato para nuevas escrituras
+        os.replace(LOG_FILE, pending_path)
+        _bump_active_log_generation()
+        with open(pending_path, "rb") as src, gzip.open(archive_path, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(pending_path)
+    except OSError as e:
+        print(f"[ERROR] No se pudo rotar {LOG_FILE}: {e}")
+        return
+    _apply_log_retention()
+
+def _apply_log_retention():
+    """Elimina los segmentos que exceden el número máximo o la antigüedad configurada."""
+    archives = _list_log_archives()
+    backup_count = _env_int(LOG_BACKUP_COUNT_ENV_VAR, DEFAULT_LOG_BACKUP_COUNT)
+    retention_days = _env_int(LOG_RETENTION_DAYS_ENV_VAR, DEFAULT_LOG_RETENTION_DAYS)
+
+    expired = archives[:-backup_count] if backup_count > 0 else []
+    if retention_days > 0:
+        limit = time.time() - retention_days * 86400
+        expired += [a for a in archives if a not in expired and os.path.getmtime(a) < limit]
+    for path in expired:
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"[WARN] No se pudo eliminar el segmento de log {path}: {e}")
+
+def rotate_logs() -> bool:
+    """
+    Fuerza la rotación del log activo (si no está vacío).
+
+    Returns:
+        bool: True si se ha rotado.
+    """
+    flush_logs()
+    with _log_writer.file_lock:
+        if os.path.exists(LOG_FILE) and os.path.getsize(LOG_FILE) > 0:
+            _rotate_active_log()
+            return True
+    return False
+
+# --- Lectura --- #
+
+def _migrate_legacy_log_file():
+    """Mueve el log de la ubicación antigua (raíz del proyecto) a LOG_FILE, si procede."""
+    old_log_file = os.path.join(ROOT_DIR, "tool_calls.log")
+    if not os.path.exists(LOG_FILE) and os.path.exists(old_log_file):
+        shutil.move(old_log_file, LOG_FILE)
+
+def _segment_marker(f) -> str:
+    """
+    Identifica un segmento por su primera línea (cada entrada lleva su timestamp): la misma
+    en el log activo y en el archivado en que se convierte al rotarlo.
+    """
+    f.seek(0)
+    return f"{zlib.crc32(f.readline(LOG_TAIL_BLOCK_SIZE)):08x}"
+
+def _tail_lines(path: str, limit: int, end_offset: int | None = None) -> tuple[list[bytes], int, str]:
+    """
+    Lee las últimas `limit` líneas no vacías de un archivo que terminan antes de `end_offset`,
+    leyendo bloques de LOG_TAIL_BLOCK_SIZE desde el final. El coste depende de `limit`,
+    no del tamaño del archivo.
+
+    Returns:
+        tuple[list[bytes], int, str]: Las líneas en orden cronológico, el offset donde empieza
+        la más antigua (0 si se ha llegado al principio del archivo) y la marca del archivo
+        leído (ver _segment_marker).
+    """
+    collected = []  # (offset, línea), de la más reciente a la más antigua
+    with open(path, "rb") as f:
+        marker = _segment_marker(f)
+        f.seek(0, os.SEEK_END)
+        pos = f.tell() if end_offset is None else min(end_offset, f.tell())
+        remainder = b""
+        while pos > 0 and len(collected) < limit:
+            size = min(LOG_TAIL_BLOCK_SIZE, pos)
+            pos -= size
+            f.seek(pos)
+            pieces = (f.read(size) + remainder).split(b"\n")
+            # El primer trozo puede ser una línea incompleta: se completa con el bloque anterior
+            remainder = pieces.pop(0)
+            offset = pos + len(remainder) + 1
+            starts = []
+            for piece in pieces:
+                starts.append(offset)
+                offset += len(piece) + 1
+            for start, piece in zip(reversed(starts), reversed(pieces)):
+                if piece.strip():
+                    collected.append((start, piece))
+                    if len(collected) == limit:
+                        break
+        if pos == 0 and len(collected) < limit and remainder.strip():
+            collected.append((0, remainder))
+
+    if not collected:
+        return [], 0, marker
+    return [line for _, line in reversed(collected)], collected[-1][0], marker
+
+def _parse_log_lines(lines: list[bytes]) -> list[dict]:
+    """Convierte líneas JSONL en entradas, ignorando las que estén corruptas."""
+    entries = []
+    for line in lines:
+        try:
+            entries.append(json.loads(line.decode("utf-8")))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            continue
+    return entries
+
+# Distancia (en bytes descomprimidos) entre puntos de acceso de un segmento archivado
+ARCHIVE_CHECKPOINT_BYTES = 1024 * 1024
+# Segmentos archivados cuyo índice se mantiene en memoria
+ARCHIVE_INDEX_CACHE_SIZE = 8
+
+class _ArchiveIndex:
+    """
+    Índice de un segmento archivado para leer rangos sin descomprimirlo entero.
+
+    Se construye recorriendo el archivo una vez y guarda el offset (descomprimido) donde
+    empieza cada línea no vacía y, cada ARCHIVE_CHECKPOINT_BYTES, una copia del estado del
+    descompresor. Leer un rango solo descomprime desde el punto de acceso anterior.
+    Supone un único miembro gzip, como los que escribe _rotate_active_log.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.line_starts = array("q")
+        self.size = 0  # Bytes descomprimidos
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self.checkpoints = [(0, 0, decompressor.copy())]  # (offset comprimido, offset descomprimido, estado)
+        self._checkpoint_offsets = [0]
+        line_start, line_has_content = 0, False
+        compressed_offset = 0
+        with open(path, "rb") as f:
+            while not decompressor.eof:
+                chunk = f.read(LOG_TAIL_BLOCK_SIZE)
+                if not chunk:
+                    break
+                compressed_offset += len(chunk)
+                data = decompressor.decompress(chunk)
+                pieces = data.split(b"\n")
+                offset = self.size
+                for piece in pieces[:-1]:
+                    offset += len(piece) + 1
+                    if line_has_content or piece.strip():
+                        self.line_starts.append(line_start)
+                    line_start, line_has_content = offset, False
+                line_has_content = line_has_content or bool(pieces[-1].strip())
+                self.size += len(data)
+                if self.size - self._checkpoint_offsets[-1] >= ARCHIVE_CHECKPOINT_BYTES and not decompressor.eof:
+                    self.checkpoints.append((compressed_offset, self.size, decompressor.copy()))
+                    self._checkpoint_offsets.append(self.size)
+        if line_has_content:
+            self.line_starts.append(line_start)
+
+    def read(self, start: int, end: int) -> bytes:
+        """Devuelve los bytes descomprimidos en [start, end)."""
+        compressed_offset, offset, state = self.checkpoints[bisect.bisect_right(self._checkpoint_offsets, start) - 1]
+        decompressor = state.copy()
+        parts = []
+        with open(self.path, "rb") as f:
+            f.seek(compressed_offset)
+            while offset < end and not decompressor.eof:
+                chunk = f.read(LOG_TAIL_BLOCK_SIZE)
+                if not chunk:
+                    break
+                data = decompressor.decompress(chunk)
+                if offset + len(data) > start:
+                    parts.append(data[max(0, start - offset):end - offset])
+                offset += len(data)
+        return b"".join(parts)
+
+    def tail_lines(self, limit: int, end_offset: int | None = None) -> tuple[list[bytes], int]:
+        """Equivalente a _tail_lines para el segmento archivado."""
+        starts = self.line_starts
+        stop = len(starts) if end_offset is None else bisect.bisect_left(starts, end_offset)
+        first = max(0, stop - limit)
+        if stop == first:
+            return [], 0
+        data = self.read(starts[first], starts[stop] if stop < len(starts) else self.size)
+        return [line for line in data.split(b"\n") if line.strip()], (starts[first] if first else 0)
+
+# Índices de segmentos archivados: ruta -> ((mtime, tamaño), índice), del menos al más usado
+_archive_indexes: "OrderedDict[str, tuple]" = OrderedDict()
+_archive_indexes_lock = threading.Lock()
+
+def _get_archive_index(path: str) -> _ArchiveIndex:
+    """Índice de un segmento archivado, reconstruido solo si el archivo ha cambiado."""
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _archive_indexes_lock:
+        cached = _archive_indexes.get(path)
+        if cached and cached[0] == signature:
+            _archive_indexes.move_to_end(path)
+            return cached[1]
+    index = _ArchiveIndex(path)
+    with _archive_indexes_lock:
+        _archive_indexes[path] = (signature, index)
+        _archive_indexes.move_to_end(path)
+        while len(_archive_indexes) > ARCHIVE_INDEX_CACHE_SIZE:
+            _archive_indexes.popitem(last=False)
+    return index
+
+def _log_segments() -> list[str]:
+    """Segmentos de log del más antiguo al más reciente: archivos archivados y el log activo."""
+    return _list_log_archives() + [LOG_FILE]
+
+def _parse_cursor(cursor: str | None) -> tuple[str | None, int | None]:
+    """
+    Convierte un cursor "segmento:posición" en sus partes. Sin segmento se refiere al log
+    activo; sin posición, al final del segmento. La posición es el offset (descomprimido)
+    en el que empieza la entrada más antigua ya devuelta. En el log activo el segmento
+    lleva además su marca ("tool_calls.log@marca"), para reconocerlo si se rota.
+    """
+    if not cursor:
+        return None, None
+    segment, _, position = cursor.rpartition(":")
+    return (segment or os.path.basename(LOG_FILE)), (int(position) if position else None)
+
+def _resolve_active_cursor_segment(marker: str) -> str | None:
+    """
+    Segmento al que apunta un cursor del log activo con la marca dada: el propio log activo
+    si no se ha rotado desde entonces o, si se rotó, el archivado en que se convirtió (en
+    ambos la posición es el mismo offset). None si ya no existe (vaciado o retención).
+    """
+    try:
+        with open(LOG_FILE, "rb") as f:
+            if _segment_marker(f) == marker:
+                return os.path.basename(LOG_FILE)
+    except FileNotFoundError:
+        pass
+    # Normalmente es el archivado más reciente, salvo que haya habido varias rotaciones
+    for path in reversed(_list_log_archives()):
+        try:
+            with gzip.open(path, "rb") as f:
+                if _segment_marker(f) == marker:
+                    return os.path.basename(path)
+        except (OSError, EOFError):
+            continue
+    return None
+
+def load_log_page(limit: int = 100, cursor: str | None = None) -> tuple[list[dict], str | None]:
+    """
+    Carga una página de entradas de log, de las más recientes hacia atrás.
+
+    Recorre el log activo y, cuando se agota, los segmentos archivados por rotación. Los
+    cursores siguen siendo válidos aunque el log activo se rote entre una página y otra.
+
+    Args:
+        limit: Número máximo de entradas de la página
+        cursor: Cursor devuelto por la página anterior (None = página más reciente)
+
+    Returns:
+        tuple[list[dict], str | None]: Las entradas en orden cronológico y el cursor para
+        pedir la página anterior (más antigua), o None si no quedan más entradas.
+    """
+    flush_logs()
+    if _log_backend() == "sqlite":
+        entries = log_store.query_tool_calls(limit=limit, before_id=int(cursor) if cursor else None)
+        return entries, (str(entries[0]["id"]) if len(entries) == limit else None)
+
+    _migrate_legacy_log_file()
+    cursor_segment, cursor_position = _parse_cursor(cursor)
+
+    active_name = os.path.basename(LOG_FILE)
+    cursor_marker = None
+    if cursor_segment is not None and cursor_segment.startswith(f"{active_name}@"):
+        cursor_marker = cursor_segment[len(active_name) + 1:]
+        cursor_segment = _resolve_active_cursor_segment(cursor_marker)
+        if cursor_segment is None:
+            return [], None
+
+    segments = _log_segments()
+    if cursor_segment is not None and cursor_segment != active_name:
+        # Archivados hasta el del cursor (incluido); si lo borró la retención, los anteriores
+        segments = [p for p in segments[:-1] if os.path.basename(p) <= cursor_segment]
+
+    collected = []  # Páginas parciales, de la más reciente a la más antigua
+    remaining = limit
+    next_cursor = None
+    for index in range(len(segments) - 1, -1, -1):
+        path = segments[index]
+        name = os.path.basename(path)
+        end = cursor_position if name == cursor_segment else None
+        try:
+            if path == LOG_FILE:
+                lines, first, marker = _tail_lines(path, remaining, end)
+                if end is not None and cursor_marker is not None and marker != cursor_marker:
+                    # Se rotó justo después de resolver el cursor: el segmento ya es un archivado
+                    return load_log_page(limit, cursor)
+                name = f"{active_name}@{marker}"
+            else:
+                lines, first = _get_archive_index(path).tail_lines(remaining, end)
+        except FileNotFoundError:
+            continue
+        collected.append(lines)
+        remaining -= len(lines)
+        if remaining <= 0:
+            if first > 0:
+                next_cursor = f"{name}:{first}"
+            elif index > 0:
+                # Segmento agotado: la página siguiente empieza al final del anterior
+                next_cursor = f"{os.path.basename(segments[index - 1])}:"
+            break
+
+    lines = [line for page in reversed(collected) for line in page]
+    return _parse_log_lines(lines), next_cursor
+
+def iter_log_entries():
+    """
+    Recorre todas las entradas de log en orden cronológico (segmentos archivados y log activo)
+    sin cargarlas todas en memoria a la vez.
+
+    Yields:
+        dict: Cada entrada de log.
+    """
+    flush_logs()
+    if _log_backend() == "sqlite":
+        yield from log_store.iter_tool_calls()
+        return
+
+    _migrate_legacy_log_file()
+    for path in _log_segments():
+        opener = open if path == LOG_FILE else gzip.open
+        try:
+            with opener(path, "rb") as f:
+                for line in f:
+                    if line.strip():
+                        yield from _parse_log_lines([line])
+        except FileNotFoundError:
+            continue
+
+def query_log_entries(function: str | None = None, user_id: str | None = None,
+                      since: datetime | None = None, until: datetime | None = None,
+                      errors_only: bool = False, limit: int = 100) -> list[dict]:
+    """
+    Devuelve las últimas `limit` entradas que cumplen los filtros, en orden cronológico.
+
+    Con el backend SQLite la consulta usa sus índices; con JSONL se recorre el histórico
+    completo (activo y archivados) en streaming.
+
+    Args:
+        function: Nombre de la herramienta.
+        user_id: Usuario que hizo la llamada.
+        since / until: Rango de tiempo [since, until) en UTC.
+        errors_only: Solo llamadas con error.
+        limit: Número máximo de resultados.
+    """
+    flush_logs()
+    if _log_backend() != "jsonl":
+        return log_store.query_tool_calls(function, user_id, since, until, errors_only, limit)
+
+    since_iso = since.isoformat() if since else None
+    until_iso = until.isoformat() if until else None
+    matches = deque(maxlen=limit)
+    for entry in iter_log_entries():
+        timestamp = entry.get("timestamp", "")
+        if function and entry.get("function") != function:
+            continue
+        if user_id and entry.get("user_id") != user_id:
+            continue
+        if since_iso and timestamp < since_iso or until_iso and timestamp >= until_iso:
+            continue
+        if errors_only and not entry.get("is_error", is_error_result(entry.get("result"))):
+            continue
+        matches.append(entry)
+    return list(matches)
+
+# Nombres de herramienta por segmento: ruta -> ((generación, mtime, tamaño), bytes leídos, nombres)
+_functions_cache: dict[str, tuple] = {}
+# Cambia cada vez que el log activo se rota o se vacía (deja de ser el mismo archivo)
+_active_log_generation = 0
+_functions_cache_lock = threading.Lock()
+
+def _bump_active_log_generation():
+    global _active_log_generation
+    _active_log_generation += 1
+
+def _segment_functions(path: str) -> set[str]:
+    """
+    Nombres de herramienta de un segmento, cacheados por su firma. Los archivados no cambian;
+    del log activo (solo se añade al final) se lee únicamente lo escrito desde la última vez.
+    """
+    stat = os.stat(path)
+    signature = (_active_log_generation if path == LOG_FILE else 0, stat.st_mtime_ns, stat.st_size)
+    cached = _functions_cache.get(path)
+    if cached and cached[0] == signature:
+        return cached[2]
+    offset, names = 0, set()
+    if path == LOG_FILE and cached and cached[0][0] == signature[0] and cached[1] <= stat.st_size:
+        offset, names = cached[1], set(cached[2])
+    if path == LOG_FILE:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        # Una línea final a medio escribir se leerá completa en la próxima llamada
+        complete = data.rfind(b"\n") + 1
+        lines, offset = data[:complete].split(b"\n"), offset + complete
+        names.update(entry.get("function") for entry in _parse_log_lines(l for l in lines if l.strip()) if entry.get("function"))
+    else:
+        # Los archivados se leen en streaming, sin descomprimirlos enteros en memoria
+        with gzip.open(path, "rb") as f:
+            names.update(entry.get("function") for entry in _parse_log_lines(l for l in f if l.strip()) if entry.get("function"))
+        offset = stat.st_size
+    _functions_cache[path] = (signature, offset, names)
+    return names
+
+def list_logged_functions() -> list[str]:
+    """
+    Devuelve los nombres de herramienta que aparecen en el log.
+
+    Con SQLite usa su índice; con JSONL, una caché por segmento (ver _segment_functions), de
+    modo que las llamadas repetidas no vuelven a decodificar todo el log.
+    """
+    flush_logs()
+    if _log_backend() != "jsonl":
+        return log_store.list_functions()
+    _migrate_legacy_log_file()
+    names = set()
+    with _functions_cache_lock:
+        segments = _log_segments()
+        for path in list(_functions_cache):
+            if path not in segments:
+                del _functions_cache[path]
+        for path in segments:
+            try:
+                names |= _segment_functions(path)
+            except FileNotFoundError:
+                continue
+    return sorted(names)
 
 def load_log_entries(limit: int = 100):
     """
-    Carga entradas de log desde el archivo de logs.
+    Carga las últimas entradas de log (del log activo y, si no basta, de los archivados).
     
     Args:
         limit: Número máximo de entradas a cargar
@@ -35,42 +687,149 @@ def load_log_entries(limit: int = 100):
     Returns:
         list: Lista de entradas de log como diccionarios
     """
-    try:
-        # Verificar si existe el archivo en la ubicación nueva
-        if os.path.exists(LOG_FILE):
-            with open(LOG_FILE, encoding="utf-8") as f:
-                lines = f.readlines()[-limit:]
-                return [json.loads(line.strip()) for line in lines]
-        else:
-            # Verificar si existe en la ubicación antigua
-            old_log_file = os.path.join(ROOT_DIR, "tool_calls.log")
-            if os.path.exists(old_log_file):
-                # Leer el archivo antiguo
-                with open(old_log_file, encoding="utf-8") as f:
-                    lines = f.readlines()
-                
-                # Migrar a la nueva ubicación
-                with open(LOG_FILE, "w", encoding="utf-8") as f:
-                    f.writelines(lines)
-                
-                # Eliminar el archivo antiguo
-                os.remove(old_log_file)
-                
-                # Devolver los datos migrados (limitados)
-                return [json.loads(line.strip()) for line in lines[-limit:]]
-        
-        # Si no existe en ninguna ubicación
-        return []
-    except FileNotFoundError:
-        return []
+    return load_log_page(limit)[0]
 
 def clear_log_entries():
-    open(LOG_FILE, "w").close()
+    """Elimina todas las entradas de log, incluidos los segmentos archivados y SQLite."""
+    flush_logs()
+    if _log_backend() != "jsonl":
+        log_store.clear_tool_calls()
+    with _log_writer.file_lock:
+        open(LOG_FILE, "w").close()
+        _bump_active_log_generation()
+        for path in _list_log_archives():
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"[WARN] No se pudo eliminar el segmento de log {path}: {e}")
+
+# --- Exportación en streaming --- #
+
+# Formatos de exportación: (tipo MIME, extensión)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", ".csv"),
+    "ndjson": ("application/x-ndjson", ".ndjson"),
+    "json": ("application/json", ".json"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+EXPORT_COLUMNS = ["timestamp", "function", "user_id", "is_error", "execution_time", "arguments", "result"]
+EXPORT_CHUNK_SIZE = 1000  # Entradas por fragmento
+
+def _iter_filtered_entries(functions: list[str] | None = None, since: datetime | None = None,
+                           until: datetime | None = None):
+    """Recorre las entradas de log filtradas por herramientas y rango de tiempo [since, until)."""
+    flush_logs()
+    if _log_backend() != "jsonl":
+        yield from log_store.iter_tool_calls(functions, since, until)
+        return
+    wanted = set(functions) if functions else None
+    since_iso = since.isoformat() if since else None
+    until_iso = until.isoformat() if until else None
+    for entry in iter_log_entries():
+        timestamp = entry.get("timestamp", "")
+        if wanted is not None and entry.get("function") not in wanted:
+            continue
+        if since_iso and timestamp < since_iso or until_iso and timestamp >= until_iso:
+            continue
+        yield entry
+
+def _iter_entry_chunks(entries, chunk_size: int):
+    chunk = []
+    for entry in entries:
+        chunk.append(entry)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _flatten_entry(entry: dict) -> list:
+    """Fila plana para CSV/Parquet: argumentos y resultado como JSON."""
+    row = []
+    for column in EXPORT_COLUMNS:
+        value = entry.get(column)
+        if column in ("arguments", "result") and not isinstance(value, str) and value is not None:
+            value = json.dumps(value, ensure_ascii=False, default=str)
+        row.append(value)
+    return row
+
+def iter_export_chunks(fmt: str = "csv", functions: list[str] | None = None,
+                       since: datetime | None = None, until: datetime | None = None,
+                       chunk_size: int = EXPORT_CHUNK_SIZE):
+    """
+    Genera la exportación de los logs en fragmentos de texto, sin cargarla entera en memoria.
+
+    Args:
+        fmt: "csv", "ndjson" o "json" (Parquet es binario: usar export_logs_to_file).
+        functions: Limitar a estas herramientas.
+        since / until: Rango de tiempo [since, until) en UTC.
+        chunk_size: Entradas por fragmento.
+
+    Yields:
+        str: Fragmentos consecutivos del documento exportado.
+    """
+    entries = _iter_filtered_entries(functions, since, until)
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        for chunk in _iter_entry_chunks(entries, chunk_size):
+            writer.writerows(_flatten_entry(e) for e in chunk)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.getvalue():
+            yield buffer.getvalue()
+    elif fmt == "ndjson":
+        for chunk in _iter_entry_chunks(entries, chunk_size):
+            yield "".join(json.dumps(e, ensure_ascii=False, default=str) + "\n" for e in chunk)
+    elif fmt == "json":
+        yield "["
+        separator = "\n"
+        for chunk in _iter_entry_chunks(entries, chunk_size):
+            parts = []
+            for e in chunk:
+                parts.append(separator + json.dumps(e, ensure_ascii=False, default=str))
+                separator = ",\n"
+            yield "".join(parts)
+        yield "\n]\n"
+    else:
+        raise ValueError(f"Formato de exportación no soportado en streaming de texto: {fmt}")
+
+def export_logs_to_file(path: str, fmt: str = "csv", functions: list[str] | None = None,
+                        since: datetime | None = None, until: datetime | None = None,
+                        chunk_size: int = EXPORT_CHUNK_SIZE) -> int:
+    """
+    Exporta los logs a un archivo fragmento a fragmento (memoria constante).
+
+    Parquet necesita `pyarrow`, que solo se importa si se elige ese formato.
+
+    Returns:
+        int: Tamaño del archivo generado, en bytes.
+    """
+    if fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([
+            ("timestamp", pa.string()), ("function", pa.string()), ("user_id", pa.string()),
+            ("is_error", pa.bool_()), ("execution_time", pa.float64()),
+            ("arguments", pa.string()), ("result", pa.string()),
+        ])
+        with pq.ParquetWriter(path, schema) as writer:
+            for chunk in _iter_entry_chunks(_iter_filtered_entries(functions, since, until), chunk_size):
+                columns = list(zip(*(_flatten_entry(e) for e in chunk)))
+                columns[5] = [None if v is None else str(v) for v in columns[5]]
+                columns[6] = [None if v is None else str(v) for v in columns[6]]
+                writer.write_table(pa.Table.from_arrays([pa.array(c, type=f.type) for c, f in zip(columns, schema)], schema=schema))
+    else:
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            for piece in iter_export_chunks(fmt, functions, since, until, chunk_size):
+                f.write(piece)
+    return os.path.getsize(path)
 
 def export_logs_json():
-    return json.dumps(load_log_entries(), indent=2, ensure_ascii=False)
+    return "".join(iter_export_chunks("json"))
 
 def export_logs_csv():
-    import pandas as pd
-    logs = load_log_entries()
-    return pd.DataFrame(logs).to_csv(index=False)
\ No newline at end of file
+    return "".join(iter_export_chunks("csv"))
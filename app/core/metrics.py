@@ -0,0 +1,306 @@
+"""
+metrics.py
+
+Registro de métricas en proceso: contadores y histogramas de latencia por herramienta,
+por paso de toolchain y por modelo de OpenAI.
+
+Los histogramas siguen el esquema de HdrHistogram: cubetas log-lineales sobre la latencia
+en microsegundos (precisión relativa ~1%), con memoria acotada independientemente del
+número de observaciones, de los que se obtienen p50/p95/p99.
+
+Las métricas se consultan desde el panel de administración y en formato de texto de
+Prometheus, opcionalmente servido por HTTP (variables de entorno HALION_METRICS_PORT y
+HALION_METRICS_HOST; por defecto solo escucha en 127.0.0.1).
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_PORT_ENV_VAR = "HALION_METRICS_PORT"
+METRICS_HOST_ENV_VAR = "HALION_METRICS_HOST"
+DEFAULT_METRICS_HOST = "127.0.0.1"
+
+# Bits de sub-cubeta del histograma: 2^7 sub-cubetas por potencia de 2 (~0,8% de error)
+HISTOGRAM_SUB_BUCKET_BITS = 7
+HISTOGRAM_QUANTILES = (0.5, 0.95, 0.99)
+
+_HALF_SUB_BUCKET = 1 << (HISTOGRAM_SUB_BUCKET_BITS - 1)
+
+class LatencyHistogram:
+    """Histograma de latencias log-lineal (estilo HdrHistogram) en microsegundos."""
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts: dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0  # Suma en segundos
+        self.min = None
+        self.max = None
+
+    @staticmethod
+    def _bucket_index(micros: int) -> int:
+        if micros < (1 << HISTOGRAM_SUB_BUCKET_BITS):
+            return micros
+        exponent = micros.bit_length() - HISTOGRAM_SUB_BUCKET_BITS
+        return exponent * _HALF_SUB_BUCKET + (micros >> exponent)
+
+    @staticmethod
+    def _bucket_value(index: int) -> int:
+        """Valor representativo (punto medio) de la cubeta, en microsegundos."""
+        if index < (1 << HISTOGRAM_SUB_BUCKET_BITS):
+            return index
+        exponent = index // _HALF_SUB_BUCKET - 1
+        mantissa = index - exponent * _HALF_SUB_BUCKET
+        return (mantissa << exponent) + (1 << (exponent - 1))
+
+    def observe(self, seconds: float):
+        seconds = max(seconds, 0.0)
+        index = self._bucket_index(int(seconds * 1_000_000))
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def quantiles(self, qs=HISTOGRAM_QUANTILES) -> dict[float, float]:
+        """Devuelve {q: latencia en segundos} para cada cuantil pedido."""
+        if not self.count:
+            return {q: 0.0 for q in qs}
+        result = {}
+        pending = sorted(qs)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            while pending and seen >= pending[0] * self.count:
+                value = self._bucket_value(index) / 1_000_000
+                # El punto medio de la cubeta puede salirse del rango observado
+                result[pending.pop(0)] = min(max(value, self.min), self.max)
+            if not pending:
+                break
+        for q in pending:
+            result[q] = self.max
+        return result
+
+# --- Registro --- #
+
+_lock = threading.Lock()
+_counters: dict[tuple, float] = {}               # (nombre, etiquetas) -> valor
+_histograms: dict[tuple, LatencyHistogram] = {}  # (nombre, etiquetas) -> histograma
+_help: dict[str, tuple[str, str]] = {}           # nombre -> (tipo, descripción)
+_started_at = time.time()
+
+def _labels_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def describe(name: str, kind: str, text: str):
+    """Registra el tipo ("counter" o "summary") y la descripción de una métrica."""
+    _help[name] = (kind, text)
+
+def inc_counter(name: str, value: float = 1, **labels):
+    """Incrementa un contador con las etiquetas dadas."""
+    key = (name, _labels_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def observe_latency(name: str, seconds: float, **labels):
+    """Añade una observación de latencia (en segundos) al histograma con las etiquetas dadas."""
+    key = (name, _labels_key(labels))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = LatencyHistogram()
+        histogram.observe(seconds)
+
+@contextmanager
+def timed(name: str, **labels):
+    """Mide la duración del bloque y la registra en el histograma `name`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_latency(name, time.perf_counter() - start, **labels)
+
+def reset_metrics():
+    """Borra todos los contadores e histogramas."""
+    global _started_at
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _started_at = time.time()
+
+# --- Métricas de la aplicación --- #
+
+describe("halion_tool_calls_total", "counter", "Llamadas a herramientas por resultado")
+describe("halion_tool_call_duration_seconds", "summary", "Latencia de las herramientas")
+describe("halion_toolchain_steps_total", "counter", "Pasos de toolchain ejecutados por resultado")
+describe("halion_toolchain_step_duration_seconds", "summary", "Latencia de los pasos de toolchain")
+describe("halion_model_requests_total", "counter", "Peticiones al modelo por resultado")
+describe("halion_model_request_duration_seconds", "summary", "Latencia de las peticiones al modelo")
+describe("halion_model_tokens_total", "counter", "Tokens consumidos por modelo y tipo")
+
+def record_tool_call(tool: str, seconds: float, error: bool = False):
+    """Registra la ejecución de una herramienta."""
+    inc_counter("halion_tool_calls_total", tool=tool, status="error" if error else "ok")
+    observe_latency("halion_tool_call_duration_seconds", seconds, tool=tool)
+
+def record_toolchain_step(toolchain: str, tool: str, seconds: float, error: bool = False):
+    """Registra la ejecución de un paso de toolchain."""
+    inc_counter("halion_toolchain_steps_total", toolchain=toolchain, tool=tool, status="error" if error else "ok")
+    observe_latency("halion_toolchain_step_duration_seconds", seconds, toolchain=toolchain, tool=tool)
+
+def record_model_call(model: str, seconds: float, error: bool = False, usage=None):
+    """Registra una petición al modelo y, si se conoce, su consumo de tokens."""
+    inc_counter("halion_model_requests_total", model=model, status="error" if error else "ok")
+    observe_latency("halion_model_request_duration_seconds", seconds, model=model)
+    if usage is not None:
+        for kind in ("prompt_tokens", "completion_tokens"):
+            tokens = getattr(usage, kind, None)
+            if tokens:
+                inc_counter("halion_model_tokens_total", tokens, model=model, kind=kind.removesuffix("_tokens"))
+
+def timed_chat_completion(create, **params):
+    """
+    Llama a `create(**params)` (p. ej. client.chat.completions.create) registrando la latencia,
+    el resultado y los tokens de la petición bajo el modelo indicado en `params`.
+    """
+    model = params.get("model", "unknown")
+    start = time.perf_counter()
+    try:
+        response = create(**params)
+    except Exception:
+        record_model_call(model, time.perf_counter() - start, error=True)
+        raise
+    record_model_call(model, time.perf_counter() - start, usage=getattr(response, "usage", None))
+    return response
+
+async def atimed_chat_completion(create, **params):
+    """Versión asíncrona de timed_chat_completion (p. ej. con AsyncOpenAI)."""
+    model = params.get("model", "unknown")
+    start = time.perf_counter()
+    try:
+        response = await create(**params)
+    except Exception:
+        record_model_call(model, time.perf_counter() - start, error=True)
+        raise
+    record_model_call(model, time.perf_counter() - start, usage=getattr(response, "usage", None))
+    return response
+
+# --- Consulta y exportación --- #
+
+def get_metrics_snapshot() -> dict:
+    """
+    Devuelve una copia de las métricas actuales.
+
+    Returns:
+        dict: {"uptime_seconds", "counters": [...], "histograms": [...]}, donde cada
+        histograma incluye count, sum, min, max, mean, p50, p95 y p99 (en segundos).
+    """
+    with _lock:
+        counters = [
+            {"name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in _counters.items()
+        ]
+        histograms = []
+        for (name, labels), h in _histograms.items():
+            q = h.quantiles()
+            histograms.append({
+                "name": name,
+                "labels": dict(labels),
+                "count": h.count,
+                "sum": h.total,
+                "min": h.min or 0.0,
+                "max": h.max or 0.0,
+                "mean": h.total / h.count if h.count else 0.0,
+                "p50": q[0.5],
+                "p95": q[0.95],
+                "p99": q[0.99],
+            })
+        uptime = time.time() - _started_at
+    return {"uptime_seconds": uptime, "counters": counters, "histograms": histograms}
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels: dict, **extra) -> str:
+    items = {**labels, **extra}
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in items.items()) + "}"
+
+def render_prometheus() -> str:
+    """Devuelve las métricas en el formato de texto de exposición de Prometheus."""
+    snapshot = get_metrics_snapshot()
+    lines = []
+    by_name: dict[str, list[str]] = {}
+    for c in snapshot["counters"]:
+        by_name.setdefault(c["name"], []).append(f"{c['name']}{_format_labels(c['labels'])} {c['value']:g}")
+    for h in snapshot["histograms"]:
+        samples = by_name.setdefault(h["name"], [])
+        for q in HISTOGRAM_QUANTILES:
+            samples.append(f"{h['name']}{_format_labels(h['labels'], quantile=q)} {h['p' + str(round(q * 100))]:.6f}")
+        samples.append(f"{h['name']}_sum{_format_labels(h['labels'])} {h['sum']:.6f}")
+        samples.append(f"{h['name']}_count{_format_labels(h['labels'])} {h['count']}")
+    for name in sorted(by_name):
+        kind, text = _help.get(name, ("untyped", name))
+        lines.append(f"# HELP {name} {text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(sorted(by_name[name]))
+    return "\n".join(lines) + "\n"
+
+# --- Exportador HTTP opcional --- #
+
+_metrics_server = None
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Sin trazas por petición
+
+def start_metrics_server(port: int | None = None, host: str | None = None):
+    """
+    Arranca (una sola vez por proceso) un servidor HTTP en segundo plano que sirve /metrics.
+
+    Args:
+        port: Puerto; por defecto el de HALION_METRICS_PORT. Sin puerto no se arranca nada.
+        host: Dirección en la que escuchar; por defecto HALION_METRICS_HOST o 127.0.0.1
+            (usa 0.0.0.0 para exponerlo fuera de la máquina).
+
+    Returns:
+        El servidor en marcha, o None si no hay puerto configurado o no se pudo arrancar.
+    """
+    global _metrics_server
+    if _metrics_server is not None:
+        return _metrics_server
+    if port is None:
+        try:
+            port = int(os.getenv(METRICS_PORT_ENV_VAR, "") or 0)
+        except ValueError:
+            print(f"[ERROR] {METRICS_PORT_ENV_VAR} no es un puerto válido")
+            return None
+    if not port:
+        return None
+    if host is None:
+        host = os.getenv(METRICS_HOST_ENV_VAR, "").strip() or DEFAULT_METRICS_HOST
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        print(f"[ERROR] No se pudo arrancar el exportador de métricas en {host}:{port}: {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="halion-metrics", daemon=True).start()
+    _metrics_server = server
+    return server
@@ -0,0 +1,319 @@
+"""
+model_backends.py
+
+Backends de modelo intercambiables para chat_service y ai_generation.
+
+Un backend expone la misma interfaz que `client.chat.completions.create` de OpenAI:
+
+- create(**params): respuesta (ChatCompletion) o, con stream=True, un iterable de ChatCompletionChunk.
+- acreate(**params): versión asíncrona de create (sin streaming).
+
+Implementaciones:
+
+- OpenAIBackend: la API de OpenAI (o cualquier servidor compatible vía base_url), usando los
+  clientes reutilizables de app.core.openai_clients.
+- MockBackend: modelo simulado, determinista y sin red. Emite llamadas a tools guionizadas
+  (o generadas a partir del schema de las tools ofrecidas) con una latencia configurable, para
+  medir la sobrecarga propia del pipeline (chat_with_tools → call_tool_by_name → logger)
+  separada de la latencia de la API.
+
+start_mock_server sirve un MockBackend en /v1/chat/completions con un servidor HTTP de la
+biblioteca estándar, para probar también el cliente de OpenAI real sin red
+(OpenAIBackend(base_url="http://127.0.0.1:<puerto>/v1")).
+
+Con HALION_MODEL_BACKEND = "mock" (por defecto "openai") get_model_backend devuelve un
+MockBackend, de modo que la aplicación entera puede funcionar sin conexión.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import httpx
+except ImportError:  # Dependencia de openai; algunas distribuciones usan otro cliente HTTP
+    httpx = None
+
+from openai import APITimeoutError
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+MODEL_BACKEND_ENV_VAR = "HALION_MODEL_BACKEND"
+MOCK_LATENCY_ENV_VAR = "HALION_MOCK_LATENCY"
+DEFAULT_MOCK_LATENCY = 0.0
+
+class ModelBackend(ABC):
+    """Interfaz común de los backends de modelo."""
+
+    name = "base"
+
+    @abstractmethod
+    def create(self, **params):
+        """Llamada síncrona con los parámetros de chat.completions.create."""
+
+    @abstractmethod
+    async def acreate(self, **params):
+        """Versión asíncrona de create (sin streaming)."""
+
+class OpenAIBackend(ModelBackend):
+    """
+    Backend sobre la API de OpenAI (o un servidor compatible).
+
+    Args:
+        api_key: Clave de API; vacía usa OPENAI_API_KEY del entorno.
+        base_url: URL base de la API (p. ej. la de start_mock_server); None usa la de por defecto.
+    """
+
+    name = "openai"
+
+    def __init__(self, api_key: str | None = None, base_url: str | None = None):
+        self.api_key = api_key
+        self.base_url = base_url
+
+    def create(self, **params):
+        from app.core.openai_clients import get_openai_client
+        return get_openai_client(self.api_key, self.base_url).chat.completions.create(**params)
+
+    async def acreate(self, **params):
+        from app.core.openai_clients import get_async_openai_client
+        return await get_async_openai_client(self.api_key, self.base_url).chat.completions.create(**params)
+
+# --- Backend simulado --- #
+
+MOCK_REQUEST_URL = "http://mock.halion.local/v1/chat/completions"
+
+def _mock_request():
+    """Petición ficticia para las excepciones de openai, que esperan un httpx.Request."""
+    return httpx.Request("POST", MOCK_REQUEST_URL) if httpx is not None else None
+
+def _sample_value(spec):
+    """Valor de ejemplo determinista para un parámetro según su JSON Schema."""
+    if not isinstance(spec, dict):
+        return "test"
+    if "default" in spec:
+        return spec["default"]
+    if spec.get("enum"):
+        return spec["enum"][0]
+    kind = spec.get("type")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "string")
+    if kind == "integer":
+        return 1
+    if kind == "number":
+        return 1.0
+    if kind == "boolean":
+        return True
+    if kind == "array":
+        return [_sample_value(spec.get("items"))] if spec.get("items") else []
+    if kind == "object":
+        return sample_arguments(spec)
+    return "test"
+
+def sample_arguments(parameters) -> dict:
+    """Argumentos de ejemplo con todos los parámetros obligatorios de un schema de parámetros."""
+    if not isinstance(parameters, dict):
+        return {}
+    properties = parameters.get("properties") or {}
+    return {name: _sample_value(properties.get(name)) for name in parameters.get("required") or ()}
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4) if text else 0
+
+class MockBackend(ModelBackend):
+    """
+    Modelo simulado y determinista.
+
+    En cada ronda (número de respuestas del asistente desde el último mensaje del usuario)
+    devuelve el paso correspondiente del guion; sin guion, en la primera ronda llama a las
+    primeras `tool_calls_per_round` tools ofrecidas con argumentos generados a partir de su
+    schema y en la siguiente responde con texto. La respuesta depende solo de los mensajes,
+    por lo que se puede compartir entre hilos y conversaciones.
+
+    Args:
+        script: Lista de pasos; cada paso es {"content": str} o
+            {"tool_calls": [{"name": str, "arguments": dict}, ...]}. El último se repite si
+            hay más rondas que pasos. También puede ser una función (messages, tools) -> paso.
+        latency: Segundos de espera por llamada (HALION_MOCK_LATENCY por defecto).
+        tool_calls_per_round: Tools que se llaman a la vez cuando no hay guion.
+    """
+
+    name = "mock"
+
+    def __init__(self, script=None, latency: float | None = None, tool_calls_per_round: int = 1):
+        if latency is None:
+            try:
+                latency = float(os.getenv(MOCK_LATENCY_ENV_VAR, DEFAULT_MOCK_LATENCY))
+            except ValueError:
+                latency = DEFAULT_MOCK_LATENCY
+        self.script = script
+        self.latency = max(0.0, latency)
+        self.tool_calls_per_round = max(1, tool_calls_per_round)
+
+    @staticmethod
+    def _round_index(messages) -> int:
+        index = 0
+        for message in reversed(messages):
+            if message.get("role") == "user":
+                break
+            if message.get("role") == "assistant":
+                index += 1
+        return index
+
+    def _next_step(self, messages, tools) -> dict:
+        if callable(self.script):
+            return self.script(messages, tools)
+        round_index = self._round_index(messages)
+        if self.script:
+            return self.script[min(round_index, len(self.script) - 1)]
+        if tools and round_index == 0:
+            return {"tool_calls": [
+                {"name": tool["function"]["name"], "arguments": sample_arguments(tool["function"].get("parameters"))}
+                for tool in tools[:self.tool_calls_per_round]
+            ]}
+        tool_messages = sum(1 for m in messages if m.get("role") == "tool")
+        last_user = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+        return {"content": f"Respuesta simulada a «{last_user}» ({tool_messages} resultados de herramientas)."}
+
+    def _build_response(self, params) -> dict:
+        """Respuesta en formato ChatCompletion (dict) para los parámetros de la petición."""
+        messages = params.get("messages") or []
+        step = self._next_step(messages, params.get("tools") or [])
+        round_index = self._round_index(messages)
+        message = {"role": "assistant", "content": step.get("content")}
+        if step.get("tool_calls"):
+            message["tool_calls"] = [
+                {
+                    "id": f"call_mock_{round_index}_{i}",
+                    "type": "function",
+                    "function": {"name": call["name"], "arguments": json.dumps(call.get("arguments") or {}, ensure_ascii=False)}
+                }
+                for i, call in enumerate(step["tool_calls"])
+            ]
+        prompt_text = json.dumps(messages, ensure_ascii=False, default=str) + json.dumps(params.get("tools") or [])
+        completion_text = (message["content"] or "") + json.dumps(message.get("tool_calls") or [])
+        prompt_tokens, completion_tokens = _estimate_tokens(prompt_text), _estimate_tokens(completion_text)
+        if params.get("max_tokens") and not message.get("tool_calls"):
+            completion_tokens = min(completion_tokens, params["max_tokens"])
+        return {
+            "id": f"chatcmpl-mock-{round_index}",
+            "object": "chat.completion",
+            "created": 0,
+            "model": params.get("model") or "mock",
+            "choices": [{
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if message.get("tool_calls") else "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def _wait_time(self, params) -> float:
+        """Latencia simulada; si supera el timeout de la petición se corta en él."""
+        timeout = params.get("timeout")
+        if timeout is not None and self.latency > timeout:
+            return max(0.0, timeout)
+        return self.latency
+
+    def _check_timeout(self, params):
+        timeout = params.get("timeout")
+        if timeout is not None and self.latency > timeout:
+            raise APITimeoutError(request=_mock_request())
+
+    def create(self, **params):
+        time.sleep(self._wait_time(params))
+        self._check_timeout(params)
+        data = self._build_response(params)
+        if params.get("stream"):
+            include_usage = bool((params.get("stream_options") or {}).get("include_usage"))
+            return iter([ChatCompletionChunk.model_validate(c) for c in build_stream_chunks(data, include_usage)])
+        return ChatCompletion.model_validate(data)
+
+    async def acreate(self, **params):
+        await asyncio.sleep(self._wait_time(params))
+        self._check_timeout(params)
+        return ChatCompletion.model_validate(self._build_response(params))
+
+def build_stream_chunks(data: dict, include_usage: bool = False) -> list[dict]:
+    """Divide una respuesta (dict de ChatCompletion) en los chunks equivalentes en streaming."""
+    base = {"id": data["id"], "object": "chat.completion.chunk", "created": data["created"], "model": data["model"]}
+    choice = data["choices"][0]
+    message = choice["message"]
+    chunks = [{**base, "choices": [{"index": 0, "delta": {"role": "assistant"}, "finish_reason": None}]}]
+    words = (message.get("content") or "").split(" ") if message.get("content") else []
+    # Un fragmento por palabra, conservando los espacios
+    for i, word in enumerate(words):
+        piece = word if i == 0 else " " + word
+        chunks.append({**base, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]})
+    for i, call in enumerate(message.get("tool_calls") or []):
+        chunks.append({**base, "choices": [{"index": 0, "delta": {"tool_calls": [{"index": i, **call}]}, "finish_reason": None}]})
+    chunks.append({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": choice["finish_reason"]}]})
+    if include_usage:
+        chunks.append({**base, "choices": [], "usage": data["usage"]})
+    return chunks
+
+def get_model_backend(api_key: str | None = None) -> ModelBackend:
+    """Backend por defecto según HALION_MODEL_BACKEND ("openai" o "mock")."""
+    if os.getenv(MODEL_BACKEND_ENV_VAR, "openai").strip().lower() == "mock":
+        return MockBackend()
+    return OpenAIBackend(api_key)
+
+# --- Servidor HTTP simulado (compatible con OpenAI) --- #
+
+class _MockChatHandler(BaseHTTPRequestHandler):
+    backend: MockBackend = None
+
+    def do_POST(self):
+        if self.path.split("?", 1)[0].rstrip("/") not in ("/v1/chat/completions", "/chat/completions"):
+            self.send_error(404)
+            return
+        try:
+            params = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        except json.JSONDecodeError:
+            self.send_error(400, "JSON no válido")
+            return
+        time.sleep(self.backend.latency)
+        data = self.backend._build_response(params)
+        if params.get("stream"):
+            include_usage = bool((params.get("stream_options") or {}).get("include_usage"))
+            body = "".join(
+                f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                for chunk in build_stream_chunks(data, include_usage)
+            ) + "data: [DONE]\n\n"
+            content_type = "text/event-stream"
+        else:
+            body = json.dumps(data, ensure_ascii=False)
+            content_type = "application/json"
+        payload = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass  # Sin trazas por petición
+
+def start_mock_server(backend: MockBackend | None = None, port: int = 0, host: str = "127.0.0.1"):
+    """
+    Arranca en segundo plano un servidor compatible con OpenAI que responde con un MockBackend.
+
+    Args:
+        backend: Modelo simulado a servir (por defecto MockBackend()).
+        port: Puerto; 0 elige uno libre.
+
+    Returns:
+        El servidor en marcha; su URL base es f"http://{host}:{server.server_port}/v1".
+        Se detiene con server.shutdown().
+    """
+    handler = type("MockChatHandler", (_MockChatHandler,), {"backend": backend or MockBackend()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="halion-mock-model", daemon=True).start()
+    return server
@@ -0,0 +1,128 @@
+"""
+openai_clients.py
+
+Caché de clientes de OpenAI reutilizables, indexada por (api_key, base_url, timeout).
+
+Cada cliente mantiene su propio pool de conexiones HTTP (keep-alive), de modo que las
+peticiones sucesivas no repiten el handshake TLS, y cada sesión usa su propia clave sin
+tocar el estado global del módulo `openai`. Los clientes sin uso durante más de
+HALION_CLIENT_IDLE_TTL segundos (o los menos usados, si se supera MAX_CACHED_CLIENTS) se
+descartan de la caché sin cerrarlos: otro hilo o un stream abierto puede seguir usándolos,
+y el recolector de basura cierra sus conexiones cuando ya nadie los referencia.
+
+Los clientes asíncronos quedan ligados al bucle de eventos en el que se usan, por lo que se
+guardan por bucle (en un WeakKeyDictionary: desaparecen al recolectarse el bucle).
+"""
+
+import asyncio
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import openai
+
+CLIENT_IDLE_TTL_ENV_VAR = "HALION_CLIENT_IDLE_TTL"
+DEFAULT_CLIENT_IDLE_TTL = 300.0
+MAX_CACHED_CLIENTS = 32
+
+_lock = threading.Lock()
+_clients = OrderedDict()                  # clave -> (cliente, último uso); orden = uso más antiguo primero
+_async_clients = weakref.WeakKeyDictionary()  # bucle -> OrderedDict(clave -> (cliente, último uso))
+
+def _idle_ttl() -> float:
+    try:
+        return float(os.getenv(CLIENT_IDLE_TTL_ENV_VAR, DEFAULT_CLIENT_IDLE_TTL))
+    except ValueError:
+        return DEFAULT_CLIENT_IDLE_TTL
+
+def _close_client(client):
+    try:
+        client.close()
+    except Exception as e:
+        print(f"[ERROR] No se pudo cerrar el cliente de OpenAI: {e}")
+
+def _close_async_client(client, loop):
+    """Cierra un cliente asíncrono en su bucle si sigue en marcha; si no, basta con soltarlo."""
+    if not loop.is_closed() and loop.is_running():
+        loop.call_soon_threadsafe(lambda: loop.create_task(client.close()))
+
+def _evict(cache: OrderedDict, now: float):
+    """Descarta (sin cerrarlos) los clientes inactivos y, si se supera el máximo, los menos usados."""
+    ttl = _idle_ttl()
+    while cache:
+        key, entry = next(iter(cache.items()))
+        if now - entry[1] <= ttl and len(cache) <= MAX_CACHED_CLIENTS:
+            break
+        del cache[key]
+
+def _client_options(key, timeout) -> dict:
+    options = {"api_key": key[0], "base_url": key[1]}
+    if timeout is not None:
+        options["timeout"] = timeout
+    return options
+
+def get_openai_client(api_key: str | None = None, base_url: str | None = None,
+                      timeout: float | None = None) -> openai.OpenAI:
+    """
+    Devuelve un cliente de OpenAI reutilizable para la combinación de parámetros dada.
+
+    Args:
+        api_key: Clave de API; vacía o None usa OPENAI_API_KEY del entorno.
+        base_url: URL base de la API; None usa la de por defecto (o OPENAI_BASE_URL).
+        timeout: Timeout por defecto de las peticiones, en segundos.
+    """
+    key = (api_key or None, base_url or None, timeout)
+    now = time.monotonic()
+    with _lock:
+        _evict(_clients, now)
+        entry = _clients.get(key)
+        if entry is None:
+            client = openai.OpenAI(**_client_options(key, timeout))
+        else:
+            client = entry[0]
+            _clients.move_to_end(key)
+        _clients[key] = (client, now)
+    return client
+
+def get_async_openai_client(api_key: str | None = None, base_url: str | None = None,
+                            timeout: float | None = None) -> openai.AsyncOpenAI:
+    """
+    Devuelve un cliente AsyncOpenAI reutilizable para el bucle de eventos actual.
+
+    Debe llamarse desde una corrutina; mismos parámetros que get_openai_client.
+    """
+    loop = asyncio.get_running_loop()
+    key = (api_key or None, base_url or None, timeout)
+    now = time.monotonic()
+    with _lock:
+        # Los clientes de bucles ya cerrados no se pueden reutilizar (y, si el cliente retiene
+        # una referencia a su bucle, la entrada débil no desaparecería sola)
+        for stale in [loop_ for loop_ in _async_clients.keys() if loop_.is_closed()]:
+            del _async_clients[stale]
+        cache = _async_clients.setdefault(loop, OrderedDict())
+        _evict(cache, now)
+        entry = cache.get(key)
+        if entry is None:
+            client = openai.AsyncOpenAI(**_client_options(key, timeout))
+        else:
+            client = entry[0]
+            cache.move_to_end(key)
+        cache[key] = (client, now)
+    return client
+
+def close_all_clients():
+    """Cierra y descarta todos los clientes en caché."""
+    with _lock:
+        clients = [client for client, _ in _clients.values()]
+        async_clients = [
+            (client, loop) for loop, cache in list(_async_clients.items()) for client, _ in cache.values()
+        ]
+        _clients.clear()
+        _async_clients.clear()
+    # Cerrar fuera del lock: un cierre lento no bloquea a quien pide un cliente
+    for client in clients:
+        _close_client(client)
+    for client, loop in async_clients:
+        _close_async_client(client, loop)
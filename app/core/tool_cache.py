@@ -0,0 +1,199 @@
+"""
+tool_cache.py
+
+Caché de resultados de herramientas para el despacho de tool_manager (call_tool_by_name y,
+a través de él, execute_toolchain y el chat).
+
+Se activa por herramienta con claves opcionales del schema:
+
+    "cacheable": True,   # cachear resultados (por defecto False)
+    "cache_ttl": 600,    # segundos de validez (implica cacheable salvo "cacheable": False)
+
+La clave es el nombre de la tool más un hash de los argumentos en JSON canónico. Las entradas
+se desalojan por LRU (HALION_TOOL_CACHE_SIZE) y las llamadas concurrentes con los mismos
+argumentos se agrupan en una sola ejecución (single-flight). No se cachean errores
+(app.utils.tool_results.is_error_result: {"error": ...}, su JSON o textos como "❌ ...").
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from app.core.metrics import describe, inc_counter
+from app.utils.tool_results import is_error_result
+
+TOOL_CACHE_SIZE_ENV_VAR = "HALION_TOOL_CACHE_SIZE"
+DEFAULT_TOOL_CACHE_SIZE = 1024
+DEFAULT_TOOL_CACHE_TTL = 300
+
+describe("halion_tool_cache_total", "counter", "Consultas a la caché de resultados de tools por resultado")
+
+_lock = threading.Lock()
+_entries = OrderedDict()  # clave -> (caduca en, resultado)
+_inflight = {}            # clave -> _Flight (llamadas síncronas en curso)
+_async_inflight = {}      # (id del bucle, clave) -> asyncio.Future
+_stats = {}               # tool -> {"hits", "misses", "shared"}
+
+class _Flight:
+    """Ejecución en curso compartida por las llamadas concurrentes con la misma clave."""
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+def get_cache_ttl(schema) -> float | None:
+    """
+    Devuelve el TTL de caché declarado en el schema de una tool, o None si no es cacheable.
+    """
+    if not schema:
+        return None
+    cacheable = schema.get("cacheable")
+    ttl = schema.get("cache_ttl")
+    if cacheable is False or (not cacheable and ttl is None):
+        return None
+    try:
+        ttl = float(ttl) if ttl is not None else DEFAULT_TOOL_CACHE_TTL
+    except (TypeError, ValueError):
+        print(f"[ERROR] cache_ttl no válido en la tool '{schema.get('name')}': {ttl}")
+        return None
+    return ttl if ttl > 0 else None
+
+def _make_key(tool_name: str, arguments) -> tuple:
+    canonical = json.dumps(arguments, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return tool_name, hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def _record(tool_name: str, result: str):
+    tool_stats = _stats.setdefault(tool_name, {"hits": 0, "misses": 0, "shared": 0})
+    tool_stats[result] += 1
+    inc_counter("halion_tool_cache_total", tool=tool_name, result=result)
+
+def _lookup(key: tuple):
+    """Busca una entrada vigente (con el lock tomado). Devuelve (encontrada, resultado)."""
+    entry = _entries.get(key)
+    if entry is None:
+        return False, None
+    if entry[0] < time.monotonic():
+        del _entries[key]
+        return False, None
+    _entries.move_to_end(key)
+    return True, entry[1]
+
+def _store(key: tuple, ttl: float, result):
+    """Guarda un resultado (con el lock tomado), desalojando por LRU si se supera el tamaño."""
+    if is_error_result(result):
+        return
+    _entries[key] = (time.monotonic() + ttl, result)
+    _entries.move_to_end(key)
+    try:
+        capacity = int(os.getenv(TOOL_CACHE_SIZE_ENV_VAR, DEFAULT_TOOL_CACHE_SIZE))
+    except ValueError:
+        capacity = DEFAULT_TOOL_CACHE_SIZE
+    while len(_entries) > max(0, capacity):
+        _entries.popitem(last=False)
+
+def get_or_call(tool_name: str, arguments, ttl: float, call):
+    """
+    Devuelve el resultado en caché para (tool, argumentos) o ejecuta `call()` una sola vez,
+    compartiendo el resultado con las llamadas concurrentes idénticas.
+    """
+    key = _make_key(tool_name, arguments)
+    with _lock:
+        found, result = _lookup(key)
+        if found:
+            _record(tool_name, "hits")
+            return copy.deepcopy(result)
+        flight = _inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[key] = _Flight()
+
+    if not leader:
+        flight.event.wait()
+        with _lock:
+            _record(tool_name, "shared")
+        if flight.error is not None:
+            raise flight.error
+        return copy.deepcopy(flight.result)
+
+    try:
+        result = call()
+    except BaseException as e:
+        flight.error = e
+        raise
+    else:
+        flight.result = result
+        with _lock:
+            _store(key, ttl, copy.deepcopy(result))
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+            _record(tool_name, "misses")
+        flight.event.set()
+    return result
+
+async def aget_or_call(tool_name: str, arguments, ttl: float, call):
+    """Versión asíncrona de get_or_call; `call` devuelve una corrutina."""
+    key = _make_key(tool_name, arguments)
+    loop = asyncio.get_running_loop()
+    flight_key = (id(loop), key)
+    with _lock:
+        found, result = _lookup(key)
+        if found:
+            _record(tool_name, "hits")
+            return copy.deepcopy(result)
+        future = _async_inflight.get(flight_key)
+        leader = future is None
+        if leader:
+            future = _async_inflight[flight_key] = loop.create_future()
+
+    if not leader:
+        result = await asyncio.shield(future)
+        with _lock:
+            _record(tool_name, "shared")
+        return copy.deepcopy(result)
+
+    try:
+        result = await call()
+    except BaseException as e:
+        future.set_exception(e)
+        future.exception()  # Marcar como consultada aunque no haya más llamadas esperando
+        raise
+    else:
+        future.set_result(result)
+        with _lock:
+            _store(key, ttl, copy.deepcopy(result))
+    finally:
+        with _lock:
+            _async_inflight.pop(flight_key, None)
+            _record(tool_name, "misses")
+    return result
+
+def get_tool_cache_stats() -> dict:
+    """
+    Devuelve las estadísticas por tool: {tool: {"hits", "misses", "shared", "hit_rate"}},
+    donde "shared" son llamadas resueltas por una ejecución concurrente idéntica.
+    """
+    with _lock:
+        stats = {tool: dict(values) for tool, values in _stats.items()}
+    for values in stats.values():
+        total = values["hits"] + values["misses"] + values["shared"]
+        values["hit_rate"] = (values["hits"] + values["shared"]) / total if total else 0.0
+    return stats
+
+def clear_tool_cache(tool_name: str | None = None):
+    """Vacía la caché (solo las entradas de `tool_name` si se indica) y sus estadísticas."""
+    with _lock:
+        if tool_name is None:
+            _entries.clear()
+            _stats.clear()
+            return
+        for key in [k for k in _entries if k[0] == tool_name]:
+            del _entries[key]
+        _stats.pop(tool_name, None)
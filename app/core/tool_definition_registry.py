@@ -21,6 +21,7 @@ TOOLS_FOLDER = os.path.join(APP_DIR, "tools")
 DEBUG_LOGS_FOLDER = os.path.join(APP_DIR, "debug_logs")
 
 dynamic_tools = {}
+_dynamic_tools_version = 0  # Se incrementa con cada registro para invalidar índices derivados
 
 # Asegurarse de que el directorio de debug existe
 os.makedirs(DEBUG_LOGS_FOLDER, exist_ok=True)
@@ -127,6 +128,8 @@ def register_tool(name: str, schema: dict, func_code: str):
                 "func": func_callable,
                 "code": func_code
             }
+            global _dynamic_tools_version
+            _dynamic_tools_version += 1
             
             debug_file.write(f"Herramienta '{tool_name}' registrada con éxito en memoria\n")
             
@@ -147,6 +150,10 @@ def register_tool(name: str, schema: dict, func_code: str):
 def get_all_dynamic_tools():
     return dynamic_tools
 
+def get_dynamic_tools_version() -> int:
+    """Devuelve la versión del registro de herramientas dinámicas (cambia con cada registro)."""
+    return _dynamic_tools_version
+
 def get_dynamic_tool(name):
     return dynamic_tools.get(name)
 
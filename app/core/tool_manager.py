@@ -9,11 +9,27 @@ La lógica de la tool manager es la siguiente:
 3. Devuelve las herramientas activas
 '''
 
+import ast
+import asyncio
+import functools
+import hashlib
 import importlib.util
+import multiprocessing
 import os
 import json
-from app.core.tool_definition_registry import get_all_dynamic_tools, TOOLS_FOLDER, DEBUG_LOGS_FOLDER
+import inspect
+import threading
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor
+import time
+import traceback
+from app.core.tool_definition_registry import (
+    get_all_dynamic_tools, get_dynamic_tools_version, TOOLS_FOLDER, DEBUG_LOGS_FOLDER
+)
 from datetime import datetime
+from app.core.metrics import record_tool_call
+from app.core import tool_cache
+from app.utils.tool_results import is_error_result
 
 # Definir rutas absolutas basadas en la ubicación actual del script
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -26,6 +42,23 @@ if not os.path.exists(CONFIG_DIR):
     os.makedirs(CONFIG_DIR, exist_ok=True)
 
 TOOL_STATUS_FILE = os.path.join(CONFIG_DIR, ".tool_status.json")
+# Catálogo persistente: schema, huella y estado de importación de cada archivo de tools/
+TOOL_CATALOG_FILE = os.path.join(CONFIG_DIR, ".tool_catalog.json")
+TOOL_CATALOG_FORMAT = 1
+
+# Carga diferida: el schema se extrae por AST y el módulo se importa en la primera llamada.
+# Desactivada por defecto; se activa con HALION_LAZY_TOOLS=true en el entorno. Con ella los
+# errores de importación de una tool aparecen en su primera llamada, no al cargarla.
+LAZY_TOOLS_ENV_VAR = "HALION_LAZY_TOOLS"
+
+# Carga en paralelo: número de procesos para validar archivos (0 o 1 = secuencial)
+# y tiempo máximo de importación por archivo, en segundos.
+TOOL_LOAD_WORKERS_ENV_VAR = "HALION_TOOL_LOAD_WORKERS"
+TOOL_IMPORT_TIMEOUT_ENV_VAR = "HALION_TOOL_IMPORT_TIMEOUT"
+DEFAULT_TOOL_IMPORT_TIMEOUT = 10.0
+# Hilos del pool en el que se ejecutan las tools síncronas desde código asíncrono
+TOOL_THREADS_ENV_VAR = "HALION_TOOL_THREADS"
+DEFAULT_TOOL_THREADS = 8
 
 # Asegurarse de que existan los directorios necesarios
 os.makedirs(TOOLS_FOLDER, exist_ok=True)
@@ -35,6 +68,22 @@ _loaded_tools_cache = {}
 _tool_errors = []
 _tool_status = {}
 
+# Estado de la carga incremental, indexado por nombre de archivo
+_tool_fingerprints = {}   # archivo -> {"mtime", "size", "hash"}
+_file_tool_names = {}     # archivo -> nombre de la tool que define
+_file_errors = {}         # archivo -> mensaje de error de carga
+_last_reload_report = {}
+_tool_catalog = None      # Copia en memoria de TOOL_CATALOG_FILE (None = aún no leído)
+
+# Versión del estado de las herramientas estáticas (carga, activación, postprocess)
+_tools_version = 0
+_tool_summary_cache = {"key": None, "summary": None}
+
+def _bump_tools_version():
+    """Invalida los índices derivados del estado de las herramientas."""
+    global _tools_version
+    _tools_version += 1
+
 def _load_tool_status():
     global _tool_status
     try:
@@ -74,6 +123,7 @@ def set_tool_status(tool_name: str, active: bool):
         _tool_status[tool_name] = {"active": True, "postprocess": True}
     _tool_status[tool_name]["active"] = active
     _save_tool_status()
+    _bump_tools_version()
 
 def is_tool_active(tool_name: str) -> bool:
     """Verifica si una herramienta está activa"""
@@ -86,17 +136,476 @@ def set_tool_postprocess(tool_name: str, postprocess_active: bool):
         _tool_status[tool_name] = {"active": True, "postprocess": True}
     _tool_status[tool_name]["postprocess"] = postprocess_active
     _save_tool_status()
+    _bump_tools_version()
 
 def get_tool_postprocess(tool_name: str) -> bool:
     """Verifica si el postprocesado está activo para una herramienta"""
     # Devuelve el valor 'postprocess', default a True si la tool no está en el registro
     return _tool_status.get(tool_name, {}).get("postprocess", True)
 
-def load_all_tools():
-    global _loaded_tools_cache, _tool_errors
-    _loaded_tools_cache = {}
-    _tool_errors = []
+def _fingerprint_tool_file(path: str, previous: dict | None = None) -> tuple[dict, bool]:
+    """
+    Calcula la huella (mtime, tamaño, hash del contenido) de un archivo de herramienta.
+
+    Si mtime y tamaño coinciden con la huella previa se reutiliza sin leer el archivo.
+    Si cambian pero el hash es el mismo (p. ej. un `touch`), no se considera modificado.
+
+    Returns:
+        tuple[dict, bool]: La huella actual y si el contenido ha cambiado.
+    """
+    stat = os.stat(path)
+    if previous and previous["mtime"] == stat.st_mtime and previous["size"] == stat.st_size:
+        return previous, False
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    fingerprint = {"mtime": stat.st_mtime, "size": stat.st_size, "hash": digest}
+    return fingerprint, previous is None or previous["hash"] != digest
+
+def _unload_tool_file(filename: str):
+    """Elimina de la caché la herramienta y el error asociados a un archivo."""
+    tool_name = _file_tool_names.pop(filename, None)
+    # Solo borrar si la entrada sigue perteneciendo a este archivo (otro archivo pudo sobrescribirla)
+    if tool_name and _loaded_tools_cache.get(tool_name, {}).get("file") == filename:
+        del _loaded_tools_cache[tool_name]
+    _file_errors.pop(filename, None)
+
+def _is_lazy_loading_enabled() -> bool:
+    """Indica si la carga diferida está activada (se lee en cada carga, tras load_dotenv)."""
+    return os.getenv(LAZY_TOOLS_ENV_VAR, "false").strip().lower() in ("1", "true", "yes", "on")
+
+def _refresh_tool_errors():
+    """Reconstruye la lista pública de errores de carga a partir de los errores por archivo."""
+    global _tool_errors
+    _tool_errors = [{"file": f, "error": e} for f, e in sorted(_file_errors.items())]
+
+def _extract_tool_definition(path: str, module_name: str) -> dict | None:
+    """
+    Extrae el `schema` de un archivo de herramienta sin ejecutarlo, mediante análisis estático (AST).
+
+    Returns:
+        dict | None: El schema si es un literal válido y el archivo define la función
+                     `module_name` a nivel de módulo; None si hace falta importarlo para saberlo.
+
+    Raises:
+        SyntaxError: Si el archivo no es Python válido.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    schema = None
+    has_function = False
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == module_name:
+            has_function = True
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            if any(isinstance(t, ast.Name) and t.id == "schema" for t in targets):
+                try:
+                    schema = ast.literal_eval(node.value)
+                except (ValueError, TypeError, SyntaxError):
+                    schema = None  # Schema calculado en tiempo de ejecución
+
+    if has_function and isinstance(schema, dict) and "name" in schema:
+        return schema
+    return None
+
+class _LazyToolFunction:
+    """
+    Callable que sustituye a la función de una herramienta hasta que se usa por primera vez.
+
+    Al invocarse importa el módulo (una sola vez, de forma segura entre hilos) y delega en la
+    función real. Si la importación falla, el error se registra en los errores de carga.
+    """
+    def __init__(self, filename: str, path: str, module_name: str):
+        self.filename = filename
+        self.path = path
+        self.module_name = module_name
+        self.__name__ = module_name
+        self._func = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._func is not None
+
+    def load(self):
+        """Importa el módulo si aún no se ha hecho y devuelve la función real."""
+        if self._func is None:
+            with self._lock:
+                if self._func is None:
+                    try:
+                        spec = importlib.util.spec_from_file_location(self.module_name, self.path)
+                        mod = importlib.util.module_from_spec(spec)
+                        spec.loader.exec_module(mod)
+                        func = getattr(mod, self.module_name, None)
+                        if not callable(func):
+                            raise Exception("Falta 'schema' o función no encontrada")
+                    except Exception as e:
+                        _file_errors[self.filename] = str(e)
+                        _refresh_tool_errors()
+                        raise RuntimeError(f"No se pudo importar la herramienta '{self.module_name}': {e}") from e
+                    if _file_errors.pop(self.filename, None) is not None:
+                        _refresh_tool_errors()
+                    self._func = func
+        return self._func
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+def _register_lazy_tool_file(filename: str, path: str, debug_file) -> bool:
+    """
+    Registra una herramienta en modo diferido si su schema se puede extraer sin importarla.
+
+    Returns:
+        bool: True si se registró (o falló por sintaxis); False si hay que importarla.
+    """
+    module_name = filename[:-3]
+    try:
+        schema = _extract_tool_definition(path, module_name)
+    except (SyntaxError, UnicodeDecodeError) as e:
+        debug_file.write(f"ERROR al analizar {filename}: {str(e)}\n")
+        _file_errors[filename] = str(e)
+        return True
+
+    if schema is None:
+        debug_file.write(f"Schema no literal en {filename}, se importa el módulo\n")
+        return False
+
+    _loaded_tools_cache[schema["name"]] = {
+        "schema": schema,
+        "func": _LazyToolFunction(filename, path, module_name),
+        "file": filename
+    }
+    _file_tool_names[filename] = schema["name"]
+    debug_file.write(f"Herramienta '{schema['name']}' registrada en modo diferido\n")
+    return True
+
+def _read_tool_catalog() -> dict:
+    """Lee el catálogo persistente (archivo -> entrada); vacío si no existe o es inválido."""
+    try:
+        with open(TOOL_CATALOG_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("format") == TOOL_CATALOG_FORMAT and isinstance(data.get("files"), dict):
+            return data["files"]
+    except FileNotFoundError:
+        pass
+    except (json.JSONDecodeError, IOError, AttributeError) as e:
+        print(f"[WARN] Catálogo de herramientas inválido, se reconstruirá: {e}")
+    return {}
+
+def _write_tool_catalog(files: dict):
+    """Guarda el catálogo de forma atómica (archivo temporal + rename)."""
+    tmp_path = f"{TOOL_CATALOG_FILE}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"format": TOOL_CATALOG_FORMAT, "files": files}, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, TOOL_CATALOG_FILE)
+    except (IOError, OSError, TypeError, ValueError) as e:
+        print(f"[ERROR] No se pudo guardar {TOOL_CATALOG_FILE}: {e}")
+
+def _build_catalog_entry(filename: str) -> dict:
+    """Construye la entrada de catálogo de un archivo a partir del estado en memoria."""
+    tool_name = _file_tool_names.get(filename)
+    tool = _loaded_tools_cache.get(tool_name) if tool_name else None
+    if filename in _file_errors:
+        status = "error"
+    elif tool and isinstance(tool["func"], _LazyToolFunction) and not tool["func"].is_loaded:
+        status = "deferred"
+    else:
+        status = "imported"
+    return {
+        **_tool_fingerprints[filename],
+        "name": tool_name,
+        "schema": tool["schema"] if tool else None,
+        "status": status,
+        "error": _file_errors.get(filename)
+    }
+
+def _restore_from_catalog(filename: str, path: str, entry: dict | None) -> bool:
+    """
+    Registra en modo diferido una herramienta a partir de su entrada de catálogo, sin leer
+    el archivo, si la entrada sigue vigente (mismo mtime y tamaño) y no tenía errores.
+
+    Returns:
+        bool: True si se restauró desde el catálogo.
+    """
+    if not entry or entry.get("status") == "error" or not isinstance(entry.get("schema"), dict):
+        return False
+    stat = os.stat(path)
+    if entry.get("mtime") != stat.st_mtime or entry.get("size") != stat.st_size:
+        return False
+
+    schema = entry["schema"]
+    _loaded_tools_cache[schema["name"]] = {
+        "schema": schema,
+        "func": _LazyToolFunction(filename, path, filename[:-3]),
+        "file": filename
+    }
+    _file_tool_names[filename] = schema["name"]
+    _tool_fingerprints[filename] = {"mtime": entry["mtime"], "size": entry["size"], "hash": entry["hash"]}
+    return True
+
+def _get_env_number(name: str, default: float, cast=float):
+    """Lee un valor numérico de una variable de entorno, con valor por defecto si no es válido."""
+    try:
+        return cast(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+# Cola por la que los procesos de validación avisan de que empiezan un archivo (en el hijo)
+_probe_started_queue = None
+# Espera máxima entre comprobaciones mientras quedan archivos sin empezar a validar
+_PROBE_POLL_INTERVAL = 0.05
+
+def _init_probe_worker(started_queue):
+    """Inicializa un proceso del pool de validación."""
+    global _probe_started_queue
+    _probe_started_queue = started_queue
+
+def _probe_tool_module(filename: str, path: str) -> dict:
+    """
+    Importa un archivo de herramienta en un proceso del pool de validación.
+
+    Se ejecuta aislado del proceso principal para que un módulo lento o colgado pueda
+    cancelarse sin bloquear la aplicación. Avisa por `_probe_started_queue` antes de
+    importar, para que el límite de tiempo cuente desde ese momento.
+
+    Returns:
+        dict: {"ok": True, "schema": dict} o {"ok": False, "error": str}.
+    """
+    if _probe_started_queue is not None:
+        _probe_started_queue.put(filename)
+    module_name = filename[:-3]
+    try:
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        mod = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mod)
+        schema = getattr(mod, "schema", None)
+        if isinstance(schema, dict) and "name" in schema and callable(getattr(mod, module_name, None)):
+            return {"ok": True, "schema": schema}
+        return {"ok": False, "error": "Falta 'schema' o función no encontrada"}
+    except BaseException as e:
+        return {"ok": False, "error": str(e) or repr(e)}
+
+def _terminate_probe_pool(executor: concurrent.futures.ProcessPoolExecutor):
+    """Termina los procesos de un pool de validación con archivos colgados y lo cierra."""
+    # ProcessPoolExecutor no permite cancelar una tarea en marcha: hay que matar sus procesos
+    for process in list((getattr(executor, "_processes", None) or {}).values()):
+        process.terminate()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+def _probe_tool_files_parallel(pending: list[tuple[str, str]], workers: int, timeout: float) -> dict:
+    """
+    Valida en paralelo una lista de archivos de herramienta en un pool de `workers` procesos.
+
+    El archivo que supere `timeout` segundos desde que empieza a importarse se da por
+    fallido. Como una tarea en marcha no se puede cancelar, en ese caso se terminan los
+    procesos del pool y los archivos que aún no tenían resultado se validan en un pool
+    nuevo. Si un módulo termina su proceso (p. ej. con os._exit), el pool entero se rompe y
+    no se sabe cuál de los archivos en marcha fue: esos se vuelven a validar de uno en uno.
+    Se usa el contexto "spawn": hacer fork con los hilos del escritor de logs y de los pools
+    en marcha no es seguro.
+
+    Returns:
+        dict: archivo -> {"ok": True, "schema": dict} o {"ok": False, "error": str}.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    results = {}
+    queue = list(pending)
+    suspects = []  # Archivos en marcha cuando se rompió un pool, a validar de uno en uno
+
+    while queue or suspects:
+        batch = [suspects.pop(0)] if suspects else queue
+        started_queue = ctx.SimpleQueue()
+        executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=min(workers, len(batch)), mp_context=ctx,
+            initializer=_init_probe_worker, initargs=(started_queue,)
+        )
+        futures = {executor.submit(_probe_tool_module, filename, path): filename for filename, path in batch}
+        deadlines = {}  # archivo -> instante límite, desde que un proceso empieza a importarlo
+
+        def _drain_started():
+            while not started_queue.empty():
+                deadlines[started_queue.get()] = time.monotonic() + timeout
+
+        hung = broken = False
+        try:
+            while futures and not (hung or broken):
+                _drain_started()
+                running = [deadlines[f] for f in futures.values() if f in deadlines]
+                wait_for = max(0.0, min(running) - time.monotonic()) if running else timeout
+                if len(running) < len(futures):
+                    wait_for = min(wait_for, _PROBE_POLL_INTERVAL)
+                done, _ = concurrent.futures.wait(futures, timeout=wait_for, return_when=concurrent.futures.FIRST_COMPLETED)
+                _drain_started()
+
+                for future in done:
+                    try:
+                        results[futures[future]] = future.result()
+                    except concurrent.futures.process.BrokenProcessPool:
+                        broken = True
+                        continue
+                    except Exception as e:
+                        # P. ej. un schema que no se puede enviar de vuelta al proceso principal
+                        results[futures[future]] = {"ok": False, "error": str(e) or repr(e)}
+                    del futures[future]
+                now = time.monotonic()
+                for filename in futures.values():
+                    if deadlines.get(filename, now + 1) <= now:
+                        results[filename] = {"ok": False, "error": f"Tiempo de importación agotado ({timeout}s)"}
+                        hung = True
+        finally:
+            if hung or broken:
+                _terminate_probe_pool(executor)
+            else:
+                executor.shutdown()
+            started_queue.close()
+
+        if broken:
+            in_flight = [(f, p) for f, p in batch if f in deadlines and f not in results]
+            if len(in_flight) == 1:
+                results[in_flight[0][0]] = {"ok": False, "error": "El proceso de importación terminó inesperadamente"}
+            elif not in_flight:
+                # El pool se rompió sin llegar a importar nada: no tiene sentido reintentarlo
+                for filename, _ in batch:
+                    results.setdefault(filename, {"ok": False, "error": "No se pudo iniciar el proceso de importación"})
+            else:
+                suspects.extend(in_flight)
+        suspect_names = {f for f, _ in suspects}
+        queue = [(f, p) for f, p in queue if f not in results and f not in suspect_names]
+
+    return results
+
+def _register_probed_tool_file(filename: str, path: str, schema: dict, debug_file):
+    """Registra en modo diferido una herramienta cuyo schema ya se obtuvo al validarla."""
+    _loaded_tools_cache[schema["name"]] = {
+        "schema": schema,
+        "func": _LazyToolFunction(filename, path, filename[:-3]),
+        "file": filename
+    }
+    _file_tool_names[filename] = schema["name"]
+    debug_file.write(f"Herramienta '{schema['name']}' validada y registrada en modo diferido\n")
+
+def _load_pending_files(pending: list[tuple[str, str]], lazy: bool, workers: int, timeout: float, debug_file):
+    """
+    Procesa los archivos añadidos o modificados, de forma secuencial o en paralelo.
+
+    En paralelo, cada archivo que haya que importar se valida en un pool de procesos con
+    límite de tiempo y se registra con el schema que devuelve la validación: el módulo no se
+    vuelve a importar en el proceso principal hasta la primera llamada a la herramienta, así
+    que un módulo que se cuelga no bloquea la carga en ningún modo.
+    """
+    if lazy:
+        # El análisis AST es barato: solo van al pool los archivos que requieren importación
+        pending = [(f, p) for f, p in pending if not _register_lazy_tool_file(f, p, debug_file)]
+
+    if workers <= 1 or len(pending) <= 1:
+        for filename, path in pending:
+            _import_tool_file(filename, path, debug_file)
+        return
+
+    debug_file.write(f"Validando {len(pending)} archivos en paralelo ({workers} procesos, timeout {timeout}s)\n")
+    results = _probe_tool_files_parallel(pending, workers, timeout)
+
+    for filename, path in pending:
+        result = results.get(filename, {"ok": False, "error": "Sin resultado de validación"})
+        if result["ok"]:
+            _register_probed_tool_file(filename, path, result["schema"], debug_file)
+        else:
+            debug_file.write(f"ERROR al cargar {filename}: {result['error']}\n")
+            _file_errors[filename] = result["error"]
+
+def _import_tool_file(filename: str, path: str, debug_file):
+    """Importa un archivo de herramienta y lo registra en la caché (o en los errores de carga)."""
+    module_name = filename[:-3]
+
+    debug_file.write(f"Procesando archivo: {filename}, ruta: {path}\n")
+    debug_file.write(f"¿Archivo existe?: {os.path.exists(path)}\n")
+
+    try:
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        mod = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mod)
+
+        debug_file.write(f"Atributos del módulo: {dir(mod)}\n")
+        debug_file.write(f"¿Tiene schema?: {hasattr(mod, 'schema')}\n")
+        debug_file.write(f"¿Tiene función llamable?: {callable(getattr(mod, module_name, None))}\n")
+
+        if hasattr(mod, "schema") and callable(getattr(mod, module_name, None)):
+            # Guardar el schema original y el archivo del que procede
+            _loaded_tools_cache[mod.schema["name"]] = {
+                "schema": mod.schema, # Schema original del archivo
+                "func": getattr(mod, module_name),
+                "file": filename
+            }
+            _file_tool_names[filename] = mod.schema["name"]
+            # El estado 'active' y 'postprocess' se consultan via is_tool_active/get_tool_postprocess
+            debug_file.write(f"Herramienta '{mod.schema['name']}' cargada correctamente\n")
+        else:
+            error_msg = "Falta 'schema' o función no encontrada"
+            debug_file.write(f"ERROR: {error_msg}\n")
+            raise Exception(error_msg)
+    except Exception as e:
+        debug_file.write(f"ERROR al cargar {filename}: {str(e)}\n")
+        debug_file.write(f"TRACEBACK: {traceback.format_exc()}\n")
+        _file_errors[filename] = str(e)
+
+def load_all_tools(force: bool = False, lazy: bool | None = None,
+                   workers: int | None = None, import_timeout: float | None = None):
+    """
+    Carga las herramientas de TOOLS_FOLDER de forma incremental.
+
+    Solo se vuelven a procesar los archivos añadidos o modificados desde la última carga
+    (según su huella mtime/tamaño/hash), y se descartan los que se han eliminado.
+    El detalle de cada recarga queda disponible en `get_last_reload_report()`.
+
+    El resultado se persiste en TOOL_CATALOG_FILE; en un proceso nuevo, los archivos que no
+    han cambiado desde que se escribió el catálogo se registran directamente desde él.
+
+    En modo diferido el schema se lee por AST y el módulo no se importa hasta que la
+    herramienta se ejecuta por primera vez; los archivos cuyo schema no es un literal
+    se importan igualmente.
+
+    Args:
+        force (bool): Si es True, descarta la caché y vuelve a procesar todos los archivos.
+            En modo inmediato los reimporta; en modo diferido vuelve a leer su schema y
+            sustituye las funciones ya importadas, de modo que cada módulo se reimporta en
+            su próxima llamada.
+        lazy (bool | None): Fuerza el modo diferido (True) o la importación inmediata (False).
+            Por defecto se usa la variable de entorno HALION_LAZY_TOOLS (desactivado).
+        workers (int | None): Procesos para validar archivos en paralelo, aislados y con
+            límite de tiempo. Los archivos validados se registran en modo diferido (se
+            importan en el proceso principal en su primera llamada). Por defecto
+            HALION_TOOL_LOAD_WORKERS (0 = secuencial).
+        import_timeout (float | None): Segundos máximos de la importación de validación de
+            cada archivo en modo paralelo; los que lo superan se descartan. Por defecto
+            HALION_TOOL_IMPORT_TIMEOUT (10s).
+
+    Returns:
+        dict: Herramientas estáticas cargadas (nombre -> {"schema", "func", "file"}).
+    """
+    global _last_reload_report, _tool_catalog
+    start_time = time.perf_counter()
+    previous_status = _tool_status
     _load_tool_status()  # Cargamos el estado de las herramientas
+    if _tool_status != previous_status:
+        _bump_tools_version()
+    if lazy is None:
+        lazy = _is_lazy_loading_enabled()
+    if workers is None:
+        workers = _get_env_number(TOOL_LOAD_WORKERS_ENV_VAR, 0, int)
+    if import_timeout is None:
+        import_timeout = _get_env_number(TOOL_IMPORT_TIMEOUT_ENV_VAR, DEFAULT_TOOL_IMPORT_TIMEOUT)
+
+    if force:
+        _loaded_tools_cache.clear()
+        _tool_fingerprints.clear()
+        _file_tool_names.clear()
+        _file_errors.clear()
+    if _tool_catalog is None:
+        _tool_catalog = _read_tool_catalog()
+
+    report = {"added": [], "modified": [], "removed": [], "unchanged": 0, "full": force, "lazy": lazy, "workers": workers}
 
     # Asegurar que exista el directorio de logs
     os.makedirs(DEBUG_LOGS_FOLDER, exist_ok=True)
@@ -104,83 +613,189 @@ def load_all_tools():
 
     # Registrar en el log de depuración
     with open(debug_log_path, "a") as debug_file:
-        debug_file.write(f"\n\n--- FUNCIÓN load_all_tools LLAMADA {datetime.now().isoformat()} ---\n")
-        debug_file.write(f"Ruta de trabajo: {os.getcwd()}\n")
-        debug_file.write(f"Existe TOOLS_FOLDER '{TOOLS_FOLDER}': {os.path.exists(TOOLS_FOLDER)}\n")
+        debug_file.write(f"\n\n--- FUNCIÓN load_all_tools LLAMADA {datetime.now().isoformat()} (force={force}) ---\n")
         
         try:
             if not os.path.exists(TOOLS_FOLDER):
                 debug_file.write(f"Creando carpeta '{TOOLS_FOLDER}'...\n")
                 os.makedirs(TOOLS_FOLDER, exist_ok=True)
                 
-            # Listar archivos en la carpeta
-            files = os.listdir(TOOLS_FOLDER)
-            debug_file.write(f"Archivos en '{TOOLS_FOLDER}': {files}\n")
-            
+            files = [f for f in os.listdir(TOOLS_FOLDER) if f.endswith(".py")]
+
+            pending = []  # Archivos añadidos o modificados: (archivo, ruta)
+
+            # Archivos eliminados desde la última carga
+            for filename in [f for f in _tool_fingerprints if f not in files]:
+                _unload_tool_file(filename)
+                del _tool_fingerprints[filename]
+                report["removed"].append(filename)
+
             for filename in files:
-                if filename.endswith(".py"):
-                    module_name = filename[:-3]
-                    path = os.path.join(TOOLS_FOLDER, filename)
-                    
-                    debug_file.write(f"Procesando archivo: {filename}, ruta: {path}\n")
-                    debug_file.write(f"¿Archivo existe?: {os.path.exists(path)}\n")
-                    
-                    try:
-                        spec = importlib.util.spec_from_file_location(module_name, path)
-                        mod = importlib.util.module_from_spec(spec)
-                        # No ejecutar el módulo aquí directamente si no es necesario
-                        spec.loader.exec_module(mod)
-                        
-                        debug_file.write(f"Atributos del módulo: {dir(mod)}\n")
-                        debug_file.write(f"¿Tiene schema?: {hasattr(mod, 'schema')}\n")
-                        debug_file.write(f"¿Tiene función llamable?: {callable(getattr(mod, module_name, None))}\n")
-
-                        if hasattr(mod, "schema") and callable(getattr(mod, module_name, None)):
-                            # Guardar el schema original y añadir el estado de postprocess
-                            _loaded_tools_cache[mod.schema["name"]] = {
-                                "schema": mod.schema, # Schema original del archivo
-                                "func": getattr(mod, module_name)
-                            }
-                            # El estado 'active' y 'postprocess' se consultan via is_tool_active/get_tool_postprocess
-                            debug_file.write(f"Herramienta '{mod.schema['name']}' cargada correctamente\n")
-                        else:
-                            error_msg = "Falta 'schema' o función no encontrada"
-                            debug_file.write(f"ERROR: {error_msg}\n")
-                            raise Exception(error_msg)
-                    except Exception as e:
-                        debug_file.write(f"ERROR al cargar {filename}: {str(e)}\n")
-                        import traceback
-                        debug_file.write(f"TRACEBACK: {traceback.format_exc()}\n")
-                        _tool_errors.append({"file": filename, "error": str(e)})
-                        
-            debug_file.write(f"Herramientas cargadas: {list(_loaded_tools_cache.keys())}\n")
+                path = os.path.join(TOOLS_FOLDER, filename)
+                previous = _tool_fingerprints.get(filename)
+                try:
+                    # Primera carga del proceso: reutilizar el catálogo persistente si sigue vigente
+                    if previous is None and lazy and not force and _restore_from_catalog(filename, path, _tool_catalog.get(filename)):
+                        report["unchanged"] += 1
+                        continue
+                    fingerprint, changed = _fingerprint_tool_file(path, previous)
+                except OSError as e:
+                    # El archivo desapareció o no es legible entre listdir y stat
+                    _unload_tool_file(filename)
+                    _tool_fingerprints.pop(filename, None)
+                    _file_errors[filename] = str(e)
+                    continue
+
+                _tool_fingerprints[filename] = fingerprint
+                if not changed:
+                    report["unchanged"] += 1
+                    continue
+
+                report["modified" if previous else "added"].append(filename)
+                _unload_tool_file(filename)
+                pending.append((filename, path))
+
+            _load_pending_files(pending, lazy, workers, import_timeout, debug_file)
+
+            debug_file.write(f"Cambios: añadidos={report['added']}, modificados={report['modified']}, "
+                             f"eliminados={report['removed']}, sin cambios={report['unchanged']}\n")
             
         except Exception as general_e:
             debug_file.write(f"ERROR GENERAL: {str(general_e)}\n")
-            import traceback
             debug_file.write(f"TRACEBACK GENERAL: {traceback.format_exc()}\n")
 
+    _refresh_tool_errors()
+
+    # Persistir el catálogo e invalidar índices solo si algo ha cambiado
+    catalog = {f: _build_catalog_entry(f) for f in _tool_fingerprints}
+    if catalog != _tool_catalog:
+        _write_tool_catalog(catalog)
+        _tool_catalog = catalog
+    if force or report["added"] or report["modified"] or report["removed"]:
+        _bump_tools_version()
+
+    report["errors"] = list(_tool_errors)
+    report["duration_seconds"] = round(time.perf_counter() - start_time, 4)
+    _last_reload_report = report
     return _loaded_tools_cache
 
+def get_last_reload_report() -> dict:
+    """
+    Devuelve el informe de la última llamada a `load_all_tools`.
+
+    Returns:
+        dict: Claves "added", "modified", "removed" (listas de archivos), "unchanged" (int),
+              "errors", "full", "lazy", "workers" y "duration_seconds".
+    """
+    return _last_reload_report
+
 def get_all_loaded_tools():
     """Devuelve todas las herramientas cargadas, incluyendo las inactivas"""
     return _loaded_tools_cache
 
+class _ReadOnlyDict(dict):
+    """
+    Diccionario inmutable que se entrega a los llamadores de la vista memoizada de tools.
+
+    Sigue siendo un `dict` (serializable a JSON y aceptado por el cliente de OpenAI), pero
+    cualquier intento de modificarlo lanza TypeError. `copy()` devuelve un dict normal.
+    """
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("La vista de herramientas es de solo lectura; usa .copy() para modificarla")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return (_ReadOnlyDict, (dict(self),))
+
+def _freeze(value):
+    """Convierte recursivamente dicts y listas en estructuras de solo lectura."""
+    if isinstance(value, dict):
+        return _ReadOnlyDict((k, _freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+# (clave de versión, herramientas activas, schemas de las herramientas activas)
+_active_tools_cache = (None, None, None, None)
+
+def _current_tools_key() -> tuple:
+    """Clave que cambia cada vez que cambia el conjunto o el estado de las herramientas."""
+    return (_tools_version, get_dynamic_tools_version(), len(get_all_dynamic_tools()))
+
+def _to_openai_tool(schema) -> dict:
+    """Definición de tool para la API de OpenAI (sin claves internas como postprocess)."""
+    function = {"name": schema["name"]}
+    if schema.get("description"):
+        function["description"] = schema["description"]
+    function["parameters"] = schema.get("parameters") or {"type": "object", "properties": {}}
+    return {"type": "function", "function": function}
+
+def _get_active_tools_view() -> tuple:
+    """Devuelve (herramientas activas, schemas, definiciones para OpenAI) memoizados para la versión actual."""
+    global _active_tools_cache
+    key, tools, schemas, openai_tools = _active_tools_cache
+    current_key = _current_tools_key()
+    if key != current_key:
+        all_tools = {**_loaded_tools_cache, **get_all_dynamic_tools()}
+        active_tools = {}
+        for name, tool in all_tools.items():
+            if is_tool_active(name):
+                # Copia del schema con el estado de postprocess actual
+                # para que la API de OpenAI lo reciba correctamente si es necesario.
+                current_schema = dict(tool.get("schema", {}))
+                current_schema["postprocess"] = get_tool_postprocess(name)
+                active_tools[name] = _ReadOnlyDict(schema=_freeze(current_schema), func=tool.get("func"))
+        tools = _ReadOnlyDict(active_tools)
+        schemas = tuple(info["schema"] for info in tools.values())
+        openai_tools = tuple(_to_openai_tool(schema) for schema in schemas)
+        _active_tools_cache = (current_key, tools, schemas, openai_tools)
+    return tools, schemas, openai_tools
+
 def get_tools():
-    """Devuelve solo las herramientas activas"""
-    all_tools = {**_loaded_tools_cache, **get_all_dynamic_tools()}
-    active_tools = {}
-    for name, tool in all_tools.items():
-        if is_tool_active(name):
-            # Devolver una copia del schema con el estado de postprocess actual
-            # para que la API de OpenAI lo reciba correctamente si es necesario.
-            current_schema = tool.get("schema", {}).copy()
-            current_schema["postprocess"] = get_tool_postprocess(name)
-            active_tools[name] = {
-                "schema": current_schema,
-                "func": tool.get("func")
-            }
-    return active_tools
+    """
+    Devuelve solo las herramientas activas.
+
+    El resultado se memoiza y solo se recalcula cuando cambia la versión de las herramientas
+    (recarga, set_tool_status, set_tool_postprocess o register_tool). Es de solo lectura:
+    los llamadores que necesiten modificarlo deben trabajar sobre una copia.
+    """
+    return _get_active_tools_view()[0]
+
+def get_tool_schemas() -> tuple:
+    """Devuelve los schemas (de solo lectura) de las herramientas activas, memoizados."""
+    return _get_active_tools_view()[1]
+
+def get_openai_tools() -> tuple:
+    """
+    Devuelve las herramientas activas en el formato `tools` de la API de OpenAI
+    ({"type": "function", "function": {...}}), memoizadas igual que get_tool_schemas.
+    """
+    return _get_active_tools_view()[2]
+
+def get_tool_summary() -> dict:
+    """
+    Devuelve el índice precalculado de herramientas (estáticas y dinámicas) y su estado.
+
+    Solo se recalcula cuando cambia la versión de las herramientas (recarga, activación,
+    postprocess o registro de una tool dinámica); en el resto de casos es una consulta O(1).
+
+    Returns:
+        dict: {"all_tools", "active_tools", "total_tools", "active_count"}.
+    """
+    key = _current_tools_key()
+    if _tool_summary_cache["key"] != key:
+        all_tools = {**_loaded_tools_cache, **get_all_dynamic_tools()}
+        active_tools = [name for name in all_tools if is_tool_active(name)]
+        _tool_summary_cache["summary"] = {
+            "all_tools": all_tools,
+            "active_tools": active_tools,
+            "total_tools": len(all_tools),
+            "active_count": len(active_tools)
+        }
+        _tool_summary_cache["key"] = key
+    return _tool_summary_cache["summary"]
 
 def get_loading_errors():
     return _tool_errors
@@ -189,20 +804,225 @@ def get_tool_status():
     """Devuelve el estado de todas las herramientas"""
     return _tool_status
 
+# Tipos de JSON Schema -> tipos de Python aceptados al validar argumentos
+_JSON_SCHEMA_TYPES = {
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "array": (list, tuple),
+    "object": (dict,),
+}
+
+def _coerce_json_value(value, type_names):
+    """
+    Convierte un valor al tipo JSON declarado cuando la conversión es segura ("5" -> 5,
+    2.0 -> 2, "true" -> True). Devuelve (valor, True) si lo consigue y (valor, False) si no.
+    """
+    if isinstance(value, str):
+        text = value.strip()
+        if "integer" in type_names:
+            try:
+                return int(text), True
+            except ValueError:
+                pass
+        if "number" in type_names:
+            for cast in (int, float):
+                try:
+                    return cast(text), True
+                except ValueError:
+                    pass
+        if "boolean" in type_names and text.lower() in ("true", "false"):
+            return text.lower() == "true", True
+    elif isinstance(value, float) and "integer" in type_names and value.is_integer():
+        return int(value), True
+    return value, False
+
+def _build_argument_validator(tool_name: str, schema: dict):
+    """
+    Precalcula un validador de argumentos a partir de `schema["parameters"]`.
+
+    Comprueba que el argumento es un dict, que están los parámetros obligatorios y, si el
+    schema declara `additionalProperties: false`, que no haya parámetros desconocidos.
+
+    El tipo JSON de cada parámetro declarado no rechaza la llamada: los valores que el modelo
+    suele enviar con otro tipo ("5" para un integer, 2.0 para un integer) se convierten, y el
+    resto se pasan tal cual con un aviso (los valores None no se comprueban).
+
+    Returns:
+        Callable[[dict], dict]: Devuelve los argumentos (convertidos si hace falta) o lanza
+        ValueError si no son válidos.
+    """
+    parameters = schema.get("parameters") or {}
+    properties = parameters.get("properties") or {}
+    required = tuple(parameters.get("required") or ())
+    allowed = frozenset(properties) if parameters.get("additionalProperties") is False else None
+
+    expected_types = {}
+    for name, spec in properties.items():
+        declared = spec.get("type") if isinstance(spec, dict) else None
+        declared = declared if isinstance(declared, (list, tuple)) else [declared]
+        if all(t in _JSON_SCHEMA_TYPES for t in declared):
+            expected_types[name] = (tuple(declared), tuple(pt for t in declared for pt in _JSON_SCHEMA_TYPES[t]))
+
+    def validate(arguments):
+        if not isinstance(arguments, dict):
+            raise ValueError(f"Los argumentos de '{tool_name}' deben ser un diccionario, no {type(arguments).__name__}.")
+        missing = [name for name in required if name not in arguments]
+        if missing:
+            raise ValueError(f"Faltan argumentos obligatorios para '{tool_name}': {', '.join(missing)}")
+        if allowed is not None:
+            unknown = [name for name in arguments if name not in allowed]
+            if unknown:
+                raise ValueError(f"Argumentos no admitidos por '{tool_name}': {', '.join(unknown)}")
+        coerced = None
+        for name, value in arguments.items():
+            if value is None or name not in expected_types:
+                continue
+            type_names, python_types = expected_types[name]
+            # bool es subclase de int: no aceptarlo como integer/number
+            if isinstance(value, python_types) and not (isinstance(value, bool) and "boolean" not in type_names):
+                continue
+            new_value, converted = _coerce_json_value(value, type_names)
+            if converted:
+                coerced = coerced if coerced is not None else dict(arguments)
+                coerced[name] = new_value
+            else:
+                print(f"[WARN] El argumento '{name}' de '{tool_name}' debería ser de tipo {'/'.join(type_names)}, no {type(value).__name__}; se pasa sin convertir.")
+        return coerced if coerced is not None else arguments
+
+    return validate
+
+class _ToolDispatchEntry:
+    """Entrada de la tabla de despacho: función, estado activo, validador precalculado y TTL de caché."""
+    __slots__ = ("func", "active", "validate", "cache_ttl")
+
+    def __init__(self, func, active: bool, validate, cache_ttl: float | None = None):
+        self.func = func
+        self.active = active
+        self.validate = validate
+        self.cache_ttl = cache_ttl
+
+# (clave de versión, nombre -> _ToolDispatchEntry)
+_dispatch_table_cache = (None, {})
+
+def _get_dispatch_table() -> dict:
+    """Devuelve la tabla de despacho para la versión actual de las herramientas."""
+    global _dispatch_table_cache
+    key, table = _dispatch_table_cache
+    current_key = _current_tools_key()
+    if key != current_key:
+        table = {}
+        for name, tool in {**_loaded_tools_cache, **get_all_dynamic_tools()}.items():
+            table[name] = _ToolDispatchEntry(
+                tool.get("func"),
+                is_tool_active(name),
+                _build_argument_validator(name, tool.get("schema") or {}),
+                tool_cache.get_cache_ttl(tool.get("schema"))
+            )
+        _dispatch_table_cache = (current_key, table)
+    return table
+
+def _get_dispatch_entry(tool_name: str, arguments: dict) -> tuple[_ToolDispatchEntry, dict]:
+    """Busca la herramienta en la tabla de despacho y valida (y convierte) los argumentos."""
+    entry = _get_dispatch_table().get(tool_name)
+    if entry is None or not entry.active or entry.func is None:
+        raise ValueError(f"La herramienta '{tool_name}' no está registrada o no está activa.")
+    try:
+        arguments = entry.validate(arguments)
+    except ValueError:
+        record_tool_call(tool_name, 0.0, error=True)
+        raise
+    return entry, arguments
+
+def _invoke_tool(tool_name: str, entry: _ToolDispatchEntry, arguments: dict):
+    """Ejecuta la función de la herramienta registrando su latencia y resultado."""
+    start = time.perf_counter()
+    try:
+        result = entry.func(**arguments)
+        if inspect.iscoroutine(result):
+            # Tool asíncrona llamada desde código síncrono
+            result = asyncio.run(result)
+    except Exception:
+        record_tool_call(tool_name, time.perf_counter() - start, error=True)
+        raise
+    record_tool_call(tool_name, time.perf_counter() - start, error=is_error_result(result))
+    return result
+
 def call_tool_by_name(tool_name: str, arguments: dict):
     """
     Ejecuta una herramienta por su nombre, pasando los argumentos proporcionados.
 
+    La búsqueda se hace en una tabla de despacho precalculada (una consulta de diccionario)
+    y los argumentos se validan (y convierten) contra el schema antes de la llamada. La latencia y el
+    resultado (ok/error) se registran en app.core.metrics. Si el schema declara
+    `cacheable`/`cache_ttl`, el resultado se sirve desde app.core.tool_cache.
+
     Args:
         tool_name (str): Nombre de la herramienta.
         arguments (dict): Diccionario con los argumentos requeridos por la herramienta.
 
     Returns:
         Resultado de la ejecución de la herramienta (puede ser cualquier tipo).
+
+    Raises:
+        ValueError: Si la herramienta no existe, no está activa o los argumentos no son válidos.
     """
-    tools = get_tools()
-    if tool_name not in tools:
-        raise ValueError(f"La herramienta '{tool_name}' no está registrada o no está activa.")
-    
-    func = tools[tool_name]["func"]
-    return func(**arguments)
+    entry, arguments = _get_dispatch_entry(tool_name, arguments)
+    if entry.cache_ttl is None:
+        return _invoke_tool(tool_name, entry, arguments)
+    return tool_cache.get_or_call(
+        tool_name, arguments, entry.cache_ttl, lambda: _invoke_tool(tool_name, entry, arguments)
+    )
+
+# Pool acotado para ejecutar tools síncronas sin bloquear el bucle de eventos
+_tool_executor = None
+_tool_executor_lock = threading.Lock()
+
+def get_tool_executor() -> ThreadPoolExecutor:
+    """Devuelve el pool de hilos de las tools, creándolo en el primer uso (HALION_TOOL_THREADS)."""
+    global _tool_executor
+    if _tool_executor is None:
+        with _tool_executor_lock:
+            if _tool_executor is None:
+                workers = max(1, _get_env_number(TOOL_THREADS_ENV_VAR, DEFAULT_TOOL_THREADS, int))
+                _tool_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="halion-tool")
+    return _tool_executor
+
+async def _ainvoke_tool(tool_name: str, entry: _ToolDispatchEntry, arguments: dict):
+    """Versión asíncrona de _invoke_tool."""
+    loop = asyncio.get_running_loop()
+    executor = get_tool_executor()
+    start = time.perf_counter()
+    try:
+        func = entry.func
+        if isinstance(func, _LazyToolFunction):
+            func = func.load() if func.is_loaded else await loop.run_in_executor(executor, func.load)
+        if inspect.iscoroutinefunction(func):
+            result = await func(**arguments)
+        else:
+            result = await loop.run_in_executor(executor, functools.partial(func, **arguments))
+            if inspect.iscoroutine(result):
+                result = await result
+    except Exception:
+        record_tool_call(tool_name, time.perf_counter() - start, error=True)
+        raise
+    record_tool_call(tool_name, time.perf_counter() - start, error=is_error_result(result))
+    return result
+
+async def acall_tool_by_name(tool_name: str, arguments: dict):
+    """
+    Versión asíncrona de call_tool_by_name.
+
+    Las tools definidas con `async def` se esperan directamente en el bucle de eventos; las
+    síncronas (y la importación diferida de su módulo) se ejecutan en un pool de hilos acotado.
+
+    Raises:
+        ValueError: Si la herramienta no existe, no está activa o los argumentos no son válidos.
+    """
+    entry, arguments = _get_dispatch_entry(tool_name, arguments)
+    if entry.cache_ttl is None:
+        return await _ainvoke_tool(tool_name, entry, arguments)
+    return await tool_cache.aget_or_call(
+        tool_name, arguments, entry.cache_ttl, lambda: _ainvoke_tool(tool_name, entry, arguments)
+    )
@@ -0,0 +1,196 @@
+"""
+tool_selector.py
+
+Selección de herramientas por relevancia para reducir el tamaño del prompt.
+
+Mantiene un índice léxico BM25 sobre el nombre, la descripción y la documentación de los
+parámetros de cada herramienta activa, y devuelve solo las K más relevantes para el mensaje
+del usuario (HALION_TOOL_TOP_K; 0 = enviar todas). Las que no alcanzan una puntuación mínima
+(HALION_TOOL_MIN_SCORE) se descartan, salvo las que se indiquen como usadas recientemente.
+
+El índice se actualiza de forma incremental: cuando cambia el conjunto de herramientas solo
+se vuelven a tokenizar las que se han añadido o modificado.
+"""
+
+import json
+import math
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+from app.core.tool_manager import get_tools, get_openai_tools
+
+TOOL_TOP_K_ENV_VAR = "HALION_TOOL_TOP_K"
+DEFAULT_TOOL_TOP_K = 8
+# Solo se envían las tools con puntuación mayor que este valor (0 = alguna coincidencia)
+TOOL_MIN_SCORE_ENV_VAR = "HALION_TOOL_MIN_SCORE"
+DEFAULT_TOOL_MIN_SCORE = 0.0
+
+# Parámetros de BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+NAME_WEIGHT = 2  # El nombre de la tool cuenta doble frente a la descripción
+
+_STOPWORDS = frozenset("""
+a al algo como con de del el en es esta este la las lo los me mi para por que se si su un una
+unos y o the a an and or of to in on for with is are be by from at as it this that what
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_CAMEL_RE = re.compile(r"([a-z0-9])([A-Z])")
+
+def tokenize(text: str) -> list[str]:
+    """Tokeniza en minúsculas y sin acentos, separando snake_case y camelCase."""
+    text = _CAMEL_RE.sub(r"\1 \2", text or "")
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    tokens = []
+    for token in _TOKEN_RE.findall(text):
+        if token in _STOPWORDS:
+            continue
+        # Plurales simples (ciudades -> ciudad, movies -> movie)
+        if len(token) > 4 and token.endswith("es") and token[-3] in "dlnr":
+            token = token[:-2]
+        elif len(token) > 3 and token.endswith("s"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+def _collect_parameter_text(parameters, parts: list):
+    """Añade nombres, descripciones y enums de los parámetros (recursivamente)."""
+    if not isinstance(parameters, dict):
+        return
+    for name, spec in (parameters.get("properties") or {}).items():
+        parts.append(name)
+        if isinstance(spec, dict):
+            parts.append(str(spec.get("description", "")))
+            parts.extend(str(v) for v in spec.get("enum") or ())
+            _collect_parameter_text(spec, parts)
+            _collect_parameter_text(spec.get("items"), parts)
+
+def _document_tokens(schema) -> list[str]:
+    parts = [str(schema.get("description", ""))]
+    _collect_parameter_text(schema.get("parameters"), parts)
+    return tokenize(schema.get("name", "")) * NAME_WEIGHT + tokenize(" ".join(parts))
+
+class _BM25Index:
+    """Índice BM25 invertido con actualización incremental por herramienta."""
+
+    def __init__(self):
+        self.docs = {}        # nombre -> (firma del schema, Counter de términos, longitud)
+        self.postings = {}    # término -> {nombre: frecuencia}
+        self.total_length = 0
+        self.source = None    # Vista de get_tools() a partir de la que se construyó
+
+    def _remove(self, name: str):
+        _, terms, length = self.docs.pop(name)
+        for term in terms:
+            posting = self.postings[term]
+            del posting[name]
+            if not posting:
+                del self.postings[term]
+        self.total_length -= length
+
+    def _add(self, name: str, signature: str, schema):
+        terms = Counter(_document_tokens(schema))
+        length = sum(terms.values())
+        self.docs[name] = (signature, terms, length)
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[name] = tf
+        self.total_length += length
+
+    def update(self, tools):
+        """Sincroniza el índice con las herramientas dadas, retokenizando solo las que cambian."""
+        for name in [n for n in self.docs if n not in tools]:
+            self._remove(name)
+        for name, tool in tools.items():
+            schema = tool["schema"]
+            signature = json.dumps(schema, sort_keys=True, default=str)
+            if name in self.docs:
+                if self.docs[name][0] == signature:
+                    continue
+                self._remove(name)
+            self._add(name, signature, schema)
+        self.source = tools
+
+    def scores(self, query_tokens: list[str]) -> dict[str, float]:
+        """Puntuación BM25 de las herramientas que contienen algún término de la consulta."""
+        n = len(self.docs)
+        if not n:
+            return {}
+        avg_length = self.total_length / n or 1.0
+        result = {}
+        for term in set(query_tokens):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for name, tf in posting.items():
+                length = self.docs[name][2]
+                score = idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length))
+                result[name] = result.get(name, 0.0) + score
+        return result
+
+_index = _BM25Index()
+_index_lock = threading.Lock()
+
+def _get_top_k() -> int:
+    try:
+        return int(os.getenv(TOOL_TOP_K_ENV_VAR, DEFAULT_TOOL_TOP_K))
+    except ValueError:
+        return DEFAULT_TOOL_TOP_K
+
+def _get_min_score() -> float:
+    try:
+        return float(os.getenv(TOOL_MIN_SCORE_ENV_VAR, DEFAULT_TOOL_MIN_SCORE))
+    except ValueError:
+        return DEFAULT_TOOL_MIN_SCORE
+
+def rank_tools(query: str) -> list[tuple[str, float]]:
+    """
+    Ordena las herramientas activas por relevancia BM25 para `query`.
+
+    Returns:
+        list[tuple[str, float]]: (nombre, puntuación), de mayor a menor; las herramientas
+        sin coincidencias se incluyen al final con puntuación 0.
+    """
+    tools = get_tools()
+    with _index_lock:
+        if _index.source is not tools:
+            _index.update(tools)
+        scores = _index.scores(tokenize(query))
+    # Las herramientas sin coincidencias quedan al final, en el orden del catálogo
+    ranked = sorted(scores.items(), key=lambda item: -item[1])
+    ranked.extend((name, 0.0) for name in tools if name not in scores)
+    return ranked
+
+def select_openai_tools(query: str, top_k: int | None = None, always_include=(),
+                        min_score: float | None = None) -> list[dict]:
+    """
+    Devuelve las definiciones de OpenAI (formato `tools`) de las K herramientas más relevantes.
+
+    Si hay K herramientas o menos se envían todas, sin filtrar por puntuación. Si ninguna
+    supera la puntuación mínima (p. ej. un mensaje sin palabras en común con ninguna), se
+    envían las K primeras del ranking para no dejar al modelo sin herramientas.
+
+    Args:
+        query: Texto con el que se compara (el mensaje del usuario y, opcionalmente, los
+            mensajes anteriores de la conversación).
+        top_k: Número máximo de herramientas; por defecto HALION_TOOL_TOP_K (0 = todas).
+        always_include: Herramientas que se envían siempre (p. ej. las usadas en los últimos
+            turnos), además de las K seleccionadas.
+        min_score: Puntuación que hay que superar; por defecto HALION_TOOL_MIN_SCORE.
+    """
+    openai_tools = get_openai_tools()
+    top_k = _get_top_k() if top_k is None else top_k
+    if top_k <= 0 or len(openai_tools) <= top_k:
+        return list(openai_tools)
+    min_score = _get_min_score() if min_score is None else min_score
+    ranking = rank_tools(query)[:top_k]
+    selected = {name for name, score in ranking if score > min_score}
+    if not selected:
+        selected = {name for name, _ in ranking}
+    selected.update(always_include)
+    return [tool for tool in openai_tools if tool["function"]["name"] in selected]
@@ -5,6 +5,9 @@ La lógica de este archivo es la siguiente:
 
 1. Carga todas las toolchains desde el archivo toolchains.json
 2. Registra cada toolchain en memoria
+
+load_toolchains_if_changed evita releer el archivo si no ha cambiado (mtime y tamaño) desde
+la última carga o escritura, para las ejecuciones frecuentes.
 '''
 
 import os
@@ -24,6 +27,15 @@ os.makedirs(CONFIG_DIR, exist_ok=True)
 
 # Registro dinámico en memoria
 _toolchain_registry: Dict[str, Toolchain] = {}
+# Firma (ruta, mtime_ns, tamaño) del archivo con el que está sincronizado el registro
+_loaded_signature = None
+
+def _file_signature(path: str) -> tuple:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return (path, None, None)
+    return (path, stat.st_mtime_ns, stat.st_size)
 
 def register_toolchain(toolchain: Toolchain) -> str:
     """
@@ -74,16 +86,17 @@ def delete_toolchain(name: str) -> bool:
         return True
     return False
 
-def save_toolchains_to_disk(path=TOOLCHAINS_FILE) -> bool:
+def save_toolchains_to_disk(path=None) -> bool:
     """
     Guarda todas las toolchains registradas en un archivo JSON.
 
     Args:
-        path (str): Ruta al archivo.
+        path (str): Ruta al archivo (por defecto TOOLCHAINS_FILE).
 
     Returns:
         bool: True si la operación fue exitosa.
     """
+    path = path or TOOLCHAINS_FILE
     try:
         data = []
         for t in _toolchain_registry.values():
@@ -91,29 +104,34 @@ def save_toolchains_to_disk(path=TOOLCHAINS_FILE) -> bool:
                 "name": t.name,
                 "description": t.description,
                 "steps": [
-                    {"tool_name": s.tool_name, "input_map": s.input_map}
+                    {"tool_name": s.tool_name, "input_map": s.input_map,
+                     **({"output_keys": s.output_keys} if s.output_keys is not None else {})}
                     for s in t.steps
                 ]
             })
 
         with open(path, "w", encoding="utf-8") as f:
             json.dump(data, f, indent=4, ensure_ascii=False)
+        global _loaded_signature
+        _loaded_signature = _file_signature(path)  # El registro en memoria ya coincide con el archivo
         return True
     except Exception as e:
         print(f"[ERROR] Error al guardar toolchains: {e}")
         return False
 
-def load_toolchains_from_disk(path=TOOLCHAINS_FILE) -> Dict[str, Toolchain]:
+def load_toolchains_from_disk(path=None) -> Dict[str, Toolchain]:
     """
     Carga toolchains desde el disco al registro en memoria.
 
     Args:
-        path (str): Ruta al archivo.
+        path (str): Ruta al archivo (por defecto TOOLCHAINS_FILE).
 
     Returns:
         Dict[str, Toolchain]: Toolchains cargadas.
     """
-    global _toolchain_registry
+    global _toolchain_registry, _loaded_signature
+    path = path or TOOLCHAINS_FILE
+    _loaded_signature = _file_signature(path)  # Antes de leer: una escritura posterior forzará otra carga
     _toolchain_registry = {}  # Limpiar antes de cargar
     try:
         with open(path, "r", encoding="utf-8") as f:
@@ -126,4 +144,20 @@ def load_toolchains_from_disk(path=TOOLCHAINS_FILE) -> Dict[str, Toolchain]:
         pass  # No hay archivo aún
     except Exception as e:
         print(f"[ERROR] Error al cargar toolchains: {e}")
-    return _toolchain_registry
\ No newline at end of file
+    return _toolchain_registry
+
+def load_toolchains_if_changed(path=None) -> Dict[str, Toolchain]:
+    """
+    Recarga las toolchains desde disco solo si el archivo ha cambiado desde la última
+    carga o escritura.
+
+    Args:
+        path (str): Ruta al archivo (por defecto TOOLCHAINS_FILE).
+
+    Returns:
+        Dict[str, Toolchain]: Toolchains registradas.
+    """
+    path = path or TOOLCHAINS_FILE
+    if _file_signature(path) != _loaded_signature:
+        load_toolchains_from_disk(path)
+    return _toolchain_registry
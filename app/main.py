@@ -16,12 +16,16 @@ from app.views.chat_view import render as render_chat
 from app.views.admin_view import render as render_admin
 
 # Importar componentes principales del core
-from app.core.tool_manager import load_all_tools, get_all_loaded_tools, get_all_dynamic_tools, is_tool_active
+from app.core.tool_manager import load_all_tools, get_all_loaded_tools, get_all_dynamic_tools, get_tool_summary
+from app.core.metrics import start_metrics_server
 
 # Configuración inicial
 def setup_app():
     # Cargar variables de entorno
     load_dotenv()
+
+    # Exportador de métricas Prometheus (solo si HALION_METRICS_PORT está definido)
+    start_metrics_server()
     
     # Configurar página de Streamlit
     st.set_page_config(
@@ -75,17 +79,8 @@ def setup_app():
 
 def update_tool_summary():
     """Actualiza el resumen de herramientas en el estado de la sesión"""
-    all_tools = {**get_all_loaded_tools(), **get_all_dynamic_tools()}
-    active_tools = [name for name, _ in all_tools.items() if is_tool_active(name)]
-    total_tools = len(all_tools)
-    active_count = len(active_tools)
-    
-    st.session_state.tool_summary = {
-        "all_tools": all_tools,
-        "active_tools": active_tools,
-        "total_tools": total_tools,
-        "active_count": active_count
-    }
+    # Índice precalculado por tool_manager (solo se recalcula si cambian las herramientas)
+    st.session_state.tool_summary = get_tool_summary()
     
     return st.session_state.tool_summary
 
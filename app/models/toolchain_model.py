@@ -6,7 +6,7 @@ y sus pasos individuales. Cada Toolchain consiste en una secuencia de ToolchainS
 donde cada paso define qué herramienta ejecutar y cómo mapear sus entradas.
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 class ToolchainStep:
     """
@@ -17,10 +17,14 @@ class ToolchainStep:
         input_map (Dict[str, str]): Mapeo de los parámetros que necesita la herramienta.
                                      Cada clave es un parámetro del tool, y su valor es
                                      una clave del contexto acumulado (outputs anteriores).
+        output_keys (Optional[List[str]]): Claves que el paso añade al contexto (opcional).
+                                     Si se declaran, el ejecutor sabe con precisión qué pasos
+                                     dependen de este y puede ejecutar en paralelo el resto.
     """
-    def __init__(self, tool_name: str, input_map: Dict[str, str]):
+    def __init__(self, tool_name: str, input_map: Dict[str, str], output_keys: Optional[List[str]] = None):
         self.tool_name = tool_name
         self.input_map = input_map  # map: tool_param -> previous_result_field
+        self.output_keys = output_keys
 
 class Toolchain:
     """
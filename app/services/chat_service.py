@@ -2,7 +2,31 @@
 chat_services.py
 
 Servicio principal de interacción entre el modelo de OpenAI y las herramientas individuales registradas,
-utilizando la capacidad de "function calling" de OpenAI.
+utilizando la interfaz `tools`/`tool_calls` de OpenAI.
+
+Cuando el modelo pide varias herramientas en un mismo turno, se ejecutan en paralelo (pool de
+hilos de tool_manager, o asyncio.gather en la variante asíncrona) y sus resultados se devuelven
+juntos en la siguiente llamada.
+
+El bucle de agente está acotado por número de rondas, presupuesto total de tokens y un plazo
+de tiempo; cada ronda registra la latencia del modelo y de las tools y los tokens consumidos
+(ver chat_with_tools_traced).
+
+Solo se envían al modelo las herramientas más relevantes para el mensaje y los últimos turnos
+del historial (índice BM25 de app.core.tool_selector, HALION_TOOL_TOP_K), más las que se
+usaron en esos turnos, para que preguntas de seguimiento como "¿y mañana?" las conserven.
+
+Con HALION_COMPLETION_CACHE activo, las llamadas deterministas (temperature 0 y seed fijo)
+se sirven desde la caché de respuestas (app.core.completion_cache), también en streaming.
+
+stream_chat_with_tools ofrece el mismo flujo como generador de eventos (fragmentos de texto
+con stream=True y progreso de las tools) para mostrar la respuesta a medida que llega.
+
+Incluye una variante asíncrona (achat_with_tools) sobre AsyncOpenAI para atender varias
+conversaciones concurrentes desde un mismo proceso.
+
+Las llamadas al modelo pasan por un backend intercambiable (app.core.model_backends): la API
+de OpenAI por defecto, o un MockBackend determinista para pruebas de carga y benchmarks sin red.
 
 Depende de:
 - tool_manager: para cargar y ejecutar tools.
@@ -10,33 +34,141 @@ Depende de:
 HALion, 2025
 """
 
-import openai
+import asyncio
+import concurrent.futures
 import json
+import time
+from openai import APITimeoutError
+from openai.types.chat import ChatCompletion, ChatCompletionMessage, ChatCompletionMessageToolCall
+from openai.types.chat.chat_completion import Choice
+from openai.types.chat.chat_completion_message_tool_call import Function
+from app.core import completion_cache
 from app.core.logger import log_tool_call
-from app.core.tool_manager import get_tools, call_tool_by_name
+from app.core.model_backends import get_model_backend
+from app.core.metrics import timed_chat_completion, atimed_chat_completion, record_model_call
+from app.core.tool_manager import get_tools, call_tool_by_name, acall_tool_by_name, get_tool_executor
+from app.core.tool_selector import select_openai_tools
+from app.core.conversation_memory import recent_tool_names
 
-def chat_with_tools(
-    prompt: str, 
-    user_id="anon", 
-    api_key="", 
-    model="gpt-4o-mini", 
-    temperature=0.7, 
-    max_tokens=None, 
-    top_p=1.0, 
-    presence_penalty=0.0, 
-    frequency_penalty=0.0, 
-    seed=None
-):
+# Máximo de llamadas al modelo por turno; la última se hace sin herramientas para forzar la respuesta
+MAX_AGENT_ROUNDS = 6
+
+# Turnos anteriores del usuario que se tienen en cuenta al seleccionar las herramientas
+SELECTION_CONTEXT_TURNS = 2
+
+# Respuesta cuando el bucle se detiene por presupuesto antes de obtener una respuesta final
+STOP_MESSAGES = {
+    "token_budget": "⚠️ Se agotó el presupuesto de tokens antes de completar la respuesta.",
+    "deadline": "⚠️ Se agotó el tiempo máximo antes de completar la respuesta.",
+    "max_rounds": "⚠️ Se alcanzó el número máximo de rondas antes de completar la respuesta.",
+}
+
+def _message_to_dict(message) -> dict:
+    """Convierte el mensaje del asistente (con sus tool_calls) en un dict para el historial."""
+    data = {"role": "assistant", "content": message.content}
+    if message.tool_calls:
+        data["tool_calls"] = [
+            {
+                "id": call.id,
+                "type": "function",
+                "function": {"name": call.function.name, "arguments": call.function.arguments}
+            }
+            for call in message.tool_calls
+        ]
+    return data
+
+def _parse_tool_call(tool_call, all_tools):
     """
-    Función principal que coordina la interacción con el modelo de OpenAI y 
-    ejecuta herramientas según sea necesario.
+    Extrae nombre y argumentos de una tool_call.
+
+    Returns:
+        tuple: (nombre, argumentos, error); error es un dict {"error": ...} si no se puede ejecutar.
     """
-    
-    # === Flujo habitual ===
-    openai.api_key = api_key
-    all_tools = get_tools()
-    schemas = [info["schema"] for info in all_tools.values()]
-    
+    func_name = tool_call.function.name
+    try:
+        arguments = json.loads(tool_call.function.arguments or "{}")
+    except json.JSONDecodeError as e:
+        return func_name, {}, {"error": f"Argumentos JSON no válidos para '{func_name}': {e}"}
+    if func_name not in all_tools:
+        return func_name, arguments, {"error": f"La función '{func_name}' no existe."}
+    return func_name, arguments, None
+
+def _tool_result_to_content(result) -> str:
+    # Convertir el resultado a string si no lo es ya
+    if not isinstance(result, str):
+        result = json.dumps(result, ensure_ascii=False, indent=2)
+    return result
+
+def _run_tool_call(tool_call, all_tools, user_id) -> str:
+    """Ejecuta una tool_call, la registra en el log y devuelve el contenido para el modelo."""
+    func_name, arguments, error = _parse_tool_call(tool_call, all_tools)
+    if error:
+        return _tool_result_to_content(error)
+    start = time.perf_counter()
+    try:
+        result = call_tool_by_name(func_name, arguments)
+    except Exception as e:
+        result = {"error": str(e)}
+    log_tool_call(func_name, arguments, result, user_id=user_id, execution_time=time.perf_counter() - start)
+    return _tool_result_to_content(result)
+
+async def _arun_tool_call(tool_call, all_tools, user_id) -> str:
+    """Versión asíncrona de _run_tool_call."""
+    func_name, arguments, error = _parse_tool_call(tool_call, all_tools)
+    if error:
+        return _tool_result_to_content(error)
+    start = time.perf_counter()
+    try:
+        result = await acall_tool_by_name(func_name, arguments)
+    except Exception as e:
+        result = {"error": str(e)}
+    log_tool_call(func_name, arguments, result, user_id=user_id, execution_time=time.perf_counter() - start)
+    return _tool_result_to_content(result)
+
+def _requires_postprocess(tool_calls, all_tools) -> bool:
+    """Indica si los resultados deben volver al modelo (basta con que una tool lo requiera)."""
+    return any(
+        call.function.name not in all_tools
+        or all_tools[call.function.name]["schema"].get("postprocess", True)
+        for call in tool_calls
+    )
+
+def _append_tool_results(messages, reply, results):
+    messages.append(_message_to_dict(reply))
+    for call, content in zip(reply.tool_calls, results):
+        messages.append({"role": "tool", "tool_call_id": call.id, "content": content})
+
+def _create_completion(backend, params: dict):
+    """Llamada al modelo a través de la caché de respuestas deterministas (si está activa)."""
+    key = completion_cache.cache_key(params)
+    cached = completion_cache.get_cached_completion(key)
+    if cached is not None:
+        return cached
+    response = timed_chat_completion(backend.create, **params)
+    completion_cache.store_completion(key, response)
+    return response
+
+async def _acreate_completion(backend, params: dict):
+    """Versión asíncrona de _create_completion."""
+    key = completion_cache.cache_key(params)
+    cached = completion_cache.get_cached_completion(key)
+    if cached is not None:
+        return cached
+    response = await atimed_chat_completion(backend.acreate, **params)
+    completion_cache.store_completion(key, response)
+    return response
+
+def _select_tools(prompt: str, history) -> list[dict]:
+    """
+    Herramientas para el turno: se ordenan por el mensaje junto con los últimos
+    SELECTION_CONTEXT_TURNS mensajes del usuario, y se incluyen siempre las usadas en esos turnos.
+    """
+    recent = [m for m in history or () if m.get("role") in ("user", "assistant")][-2 * SELECTION_CONTEXT_TURNS:]
+    context = " ".join(m["content"] for m in recent if m["role"] == "user" and isinstance(m.get("content"), str))
+    return select_openai_tools(f"{prompt} {context}".strip(), always_include=recent_tool_names(recent))
+
+def _build_common_params(model, temperature, max_tokens, top_p, presence_penalty, frequency_penalty, seed) -> dict:
+    """Construye los parámetros comunes de las llamadas al modelo."""
     # Crear diccionario base para parámetros comunes
     common_params = {
         "model": model,
@@ -51,55 +183,480 @@ def chat_with_tools(
         common_params["max_tokens"] = max_tokens
     if seed is not None:
         common_params["seed"] = seed
+    return common_params
 
-    messages = [{"role": "user", "content": prompt}]
+class _AgentRun:
+    """
+    Estado de un turno del bucle de agente: mensajes, presupuestos y registro por ronda.
 
-    # Primera llamada
-    if schemas:
-        response = openai.chat.completions.create(
-            **common_params,
-            messages=messages,
-            functions=schemas,
-            function_call="auto"
-        )
-    else:
-        # Sin tools definidas
-        response = openai.chat.completions.create(
-            **common_params,
-            messages=messages
-        )
+    Los límites se comprueban antes de cada llamada al modelo, de modo que el bucle se detiene
+    siempre en el mismo punto para los mismos límites.
+    """
+
+    def __init__(self, prompt, history, common_params, tool_params, max_rounds, token_budget, deadline_seconds):
+        self.messages = [*(history or ()), {"role": "user", "content": prompt}]
+        self.common_params = common_params
+        self.tool_params = tool_params
+        self.max_rounds = max(1, max_rounds)
+        self.token_budget = token_budget
+        self.deadline = time.perf_counter() + deadline_seconds if deadline_seconds else None
+        self.tokens_used = 0
+        self.rounds_log = []
+
+    def remaining_time(self) -> float | None:
+        return None if self.deadline is None else self.deadline - time.perf_counter()
+
+    def stop_reason(self) -> str | None:
+        """Motivo por el que no se debe hacer otra llamada al modelo, o None."""
+        if self.token_budget is not None and self.tokens_used >= self.token_budget:
+            return "token_budget"
+        remaining = self.remaining_time()
+        if remaining is not None and remaining <= 0:
+            return "deadline"
+        return None
+
+    def next_request(self) -> dict:
+        """Parámetros de la siguiente llamada; la última ronda no ofrece herramientas."""
+        params = {**self.common_params, "messages": self.messages}
+        if len(self.rounds_log) + 1 < self.max_rounds:
+            params.update(self.tool_params)
+        if self.token_budget is not None:
+            # Limitar la respuesta a lo que queda del presupuesto
+            remaining_tokens = self.token_budget - self.tokens_used
+            params["max_tokens"] = min(params.get("max_tokens") or remaining_tokens, remaining_tokens)
+        remaining = self.remaining_time()
+        if remaining is not None:
+            params["timeout"] = remaining
+        return params
+
+    def record_round(self, usage, latency: float) -> dict:
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        self.tokens_used += prompt_tokens + completion_tokens
+        entry = {
+            "round": len(self.rounds_log) + 1,
+            "model_latency": round(latency, 4),
+            "tool_latency": 0.0,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "tool_calls": [],
+            "finish": None,
+        }
+        self.rounds_log.append(entry)
+        return entry
+
+    def stop(self, reason: str) -> str:
+        """Cierra el turno por presupuesto y devuelve el aviso correspondiente."""
+        if not self.rounds_log:
+            self.rounds_log.append({"round": 0, "finish": None})
+        entry = self.rounds_log[-1]
+        entry["finish"] = entry["finish"] or reason  # Ronda interrumpida a medias
+        entry["stop_reason"] = reason
+        return STOP_MESSAGES[reason]
+
+def chat_with_tools_traced(
+    prompt: str, 
+    user_id="anon", 
+    api_key="", 
+    model="gpt-4o-mini", 
+    temperature=0.7, 
+    max_tokens=None, 
+    top_p=1.0, 
+    presence_penalty=0.0, 
+    frequency_penalty=0.0, 
+    seed=None,
+    max_rounds=MAX_AGENT_ROUNDS,
+    token_budget=None,
+    deadline_seconds=None,
+    history=None,
+    backend=None
+):
+    """
+    Ejecuta el bucle de agente y devuelve la respuesta junto con el registro de cada ronda.
+
+    Args:
+        max_rounds: Máximo de llamadas al modelo; la última no ofrece herramientas.
+        token_budget: Máximo de tokens (prompt + respuesta) sumando todas las rondas.
+        deadline_seconds: Tiempo máximo del turno completo, en segundos.
+        history: Mensajes previos de la conversación (p. ej. ConversationMemory.build_messages()).
+        backend: Backend de modelo (app.core.model_backends); por defecto el de
+            HALION_MODEL_BACKEND con api_key (OpenAI, o MockBackend para pruebas sin red).
+
+    Returns:
+        tuple: (respuesta, rondas), donde cada ronda es un dict con round, model_latency,
+        tool_latency, prompt_tokens, completion_tokens, tool_calls y finish
+        ("answer", "tools_result" o "tool_calls"; "deadline" si se interrumpió). Si el bucle
+        se detiene por presupuesto, la última ronda incluye además stop_reason
+        ("token_budget", "deadline" o "max_rounds").
+    """
+    backend = backend or get_model_backend(api_key)
+    all_tools = get_tools()
+    tools = _select_tools(prompt, history)
+    run = _AgentRun(
+        prompt,
+        history,
+        _build_common_params(model, temperature, max_tokens, top_p, presence_penalty, frequency_penalty, seed),
+        {"tools": tools, "tool_choice": "auto"} if tools else {},
+        max_rounds, token_budget, deadline_seconds
+    )
+
+    while True:
+        reason = run.stop_reason()
+        if reason:
+            return run.stop(reason), run.rounds_log
+
+        start = time.perf_counter()
+        try:
+            response = _create_completion(backend, run.next_request())
+        except APITimeoutError:
+            if run.deadline is None:
+                raise
+            return run.stop("deadline"), run.rounds_log
+        entry = run.record_round(getattr(response, "usage", None), time.perf_counter() - start)
+        reply = response.choices[0].message
+        if not reply.tool_calls:
+            entry["finish"] = "answer"
+            return reply.content, run.rounds_log
+        if len(run.rounds_log) >= run.max_rounds:
+            return run.stop("max_rounds"), run.rounds_log
+
+        # Ejecutar las tools del turno (en paralelo si hay varias)
+        entry["tool_calls"] = [call.function.name for call in reply.tool_calls]
+        start = time.perf_counter()
+        try:
+            if len(reply.tool_calls) == 1:
+                results = [_run_tool_call(reply.tool_calls[0], all_tools, user_id)]
+            else:
+                results = list(get_tool_executor().map(
+                    lambda call: _run_tool_call(call, all_tools, user_id), reply.tool_calls,
+                    timeout=run.remaining_time()
+                ))
+        except concurrent.futures.TimeoutError:
+            return run.stop("deadline"), run.rounds_log
+        entry["tool_latency"] = round(time.perf_counter() - start, 4)
 
-    reply = response.choices[0].message
-
-    if hasattr(reply, "function_call") and reply.function_call:
-        func_name = reply.function_call.name
-        arguments = json.loads(reply.function_call.arguments)
-
-        if func_name in all_tools:
-            # Ejecutar tool
-            result = call_tool_by_name(func_name, arguments)
-            log_tool_call(func_name, arguments, result)
-
-            # Convertir el resultado a string si no lo es ya
-            if not isinstance(result, str):
-                result = json.dumps(result, ensure_ascii=False, indent=2)
-
-            # Si no requiere post-proceso, devuelve el resultado tal cual
-            if not all_tools[func_name]["schema"].get("postprocess", True):
-                return result
-            
-            # Si sí requiere postproceso, sigue el flujo habitual
-            messages.append(reply.to_dict())
-            messages.append({"role": "function", "name": func_name, "content": result})
-
-            final = openai.chat.completions.create(
-                **common_params,
-                messages=messages,
-                functions=schemas,  # Mantenemos la posibilidad de llamadas adicionales
-                function_call="auto"
+        # Si no requieren post-proceso, devuelve los resultados tal cual
+        if not _requires_postprocess(reply.tool_calls, all_tools):
+            entry["finish"] = "tools_result"
+            return "\n\n".join(results), run.rounds_log
+
+        entry["finish"] = "tool_calls"
+        _append_tool_results(run.messages, reply, results)
+
+def chat_with_tools(
+    prompt: str, 
+    user_id="anon", 
+    api_key="", 
+    model="gpt-4o-mini", 
+    temperature=0.7, 
+    max_tokens=None, 
+    top_p=1.0, 
+    presence_penalty=0.0, 
+    frequency_penalty=0.0, 
+    seed=None,
+    max_rounds=MAX_AGENT_ROUNDS,
+    token_budget=None,
+    deadline_seconds=None,
+    history=None,
+    backend=None
+):
+    """
+    Función principal que coordina la interacción con el modelo de OpenAI y 
+    ejecuta herramientas según sea necesario.
+
+    Las tool_calls de un mismo turno se ejecutan en paralelo. Si ninguna de las herramientas
+    llamadas requiere post-proceso, se devuelven sus resultados directamente. El bucle se
+    acota con max_rounds, token_budget y deadline_seconds (ver chat_with_tools_traced).
+    """
+    reply, _ = chat_with_tools_traced(
+        prompt, user_id, api_key, model, temperature, max_tokens, top_p,
+        presence_penalty, frequency_penalty, seed, max_rounds, token_budget, deadline_seconds, history, backend
+    )
+    return reply
+
+async def achat_with_tools_traced(
+    prompt: str, 
+    user_id="anon", 
+    api_key="", 
+    model="gpt-4o-mini", 
+    temperature=0.7, 
+    max_tokens=None, 
+    top_p=1.0, 
+    presence_penalty=0.0, 
+    frequency_penalty=0.0, 
+    seed=None,
+    max_rounds=MAX_AGENT_ROUNDS,
+    token_budget=None,
+    deadline_seconds=None,
+    history=None,
+    backend=None
+):
+    """Versión asíncrona de chat_with_tools_traced."""
+    all_tools = get_tools()
+    tools = _select_tools(prompt, history)
+    run = _AgentRun(
+        prompt,
+        history,
+        _build_common_params(model, temperature, max_tokens, top_p, presence_penalty, frequency_penalty, seed),
+        {"tools": tools, "tool_choice": "auto"} if tools else {},
+        max_rounds, token_budget, deadline_seconds
+    )
+
+    backend = backend or get_model_backend(api_key)
+    while True:
+        reason = run.stop_reason()
+        if reason:
+            return run.stop(reason), run.rounds_log
+
+        start = time.perf_counter()
+        try:
+            response = await _acreate_completion(backend, run.next_request())
+        except APITimeoutError:
+            if run.deadline is None:
+                raise
+            return run.stop("deadline"), run.rounds_log
+        entry = run.record_round(getattr(response, "usage", None), time.perf_counter() - start)
+        reply = response.choices[0].message
+        if not reply.tool_calls:
+            entry["finish"] = "answer"
+            return reply.content, run.rounds_log
+        if len(run.rounds_log) >= run.max_rounds:
+            return run.stop("max_rounds"), run.rounds_log
+
+        entry["tool_calls"] = [call.function.name for call in reply.tool_calls]
+        start = time.perf_counter()
+        try:
+            results = await asyncio.wait_for(
+                asyncio.gather(*(_arun_tool_call(call, all_tools, user_id) for call in reply.tool_calls)),
+                timeout=run.remaining_time()
             )
-            return final.choices[0].message.content
-        else:
-            return f"La función '{func_name}' no existe."
-    else:
-        return reply.content
\ No newline at end of file
+        except asyncio.TimeoutError:
+            return run.stop("deadline"), run.rounds_log
+        entry["tool_latency"] = round(time.perf_counter() - start, 4)
+
+        if not _requires_postprocess(reply.tool_calls, all_tools):
+            entry["finish"] = "tools_result"
+            return "\n\n".join(results), run.rounds_log
+
+        entry["finish"] = "tool_calls"
+        _append_tool_results(run.messages, reply, results)
+
+async def achat_with_tools(
+    prompt: str, 
+    user_id="anon", 
+    api_key="", 
+    model="gpt-4o-mini", 
+    temperature=0.7, 
+    max_tokens=None, 
+    top_p=1.0, 
+    presence_penalty=0.0, 
+    frequency_penalty=0.0, 
+    seed=None,
+    max_rounds=MAX_AGENT_ROUNDS,
+    token_budget=None,
+    deadline_seconds=None,
+    history=None,
+    backend=None
+):
+    """
+    Versión asíncrona de chat_with_tools, con el mismo flujo y resultado.
+
+    Las llamadas al modelo se esperan con AsyncOpenAI y las tools se ejecutan con
+    acall_tool_by_name (las async en el bucle de eventos, las síncronas en un pool de hilos
+    acotado); las tool_calls de un mismo turno se lanzan a la vez con asyncio.gather.
+    Desde código síncrono (p. ej. Streamlit) se usa con asyncio.run(...).
+    """
+    reply, _ = await achat_with_tools_traced(
+        prompt, user_id, api_key, model, temperature, max_tokens, top_p,
+        presence_penalty, frequency_penalty, seed, max_rounds, token_budget, deadline_seconds, history, backend
+    )
+    return reply
+
+def _consume_stream(stream):
+    """
+    Recorre una respuesta en streaming, emitiendo los fragmentos de texto a medida que llegan.
+
+    Yields:
+        str: Cada fragmento de contenido.
+
+    Returns:
+        tuple: (mensaje reconstruido con sus tool_calls, uso de tokens o None).
+    """
+    content_parts = []
+    calls = {}  # índice -> {"id", "name", "arguments"}
+    usage = None
+    for chunk in stream:
+        if getattr(chunk, "usage", None):
+            usage = chunk.usage
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        if delta.content:
+            content_parts.append(delta.content)
+            yield delta.content
+        for call in delta.tool_calls or []:
+            slot = calls.setdefault(call.index, {"id": None, "name": "", "arguments": ""})
+            if call.id:
+                slot["id"] = call.id
+            if call.function:
+                slot["name"] += call.function.name or ""
+                slot["arguments"] += call.function.arguments or ""
+
+    tool_calls = [
+        ChatCompletionMessageToolCall(
+            id=slot["id"], type="function", function=Function(name=slot["name"], arguments=slot["arguments"])
+        )
+        for _, slot in sorted(calls.items())
+    ]
+    message = ChatCompletionMessage(role="assistant", content="".join(content_parts) or None, tool_calls=tool_calls or None)
+    return message, usage
+
+def _stream_completion(backend, params: dict):
+    """
+    Llamada al modelo en streaming a través de la caché de respuestas deterministas.
+
+    Un acierto de caché se emite como un único fragmento; en un fallo, la respuesta recibida
+    en streaming se guarda al completarse (comparte entradas con _create_completion).
+
+    Yields:
+        str: Cada fragmento de contenido.
+
+    Returns:
+        tuple: (mensaje con sus tool_calls, uso de tokens o None, si vino de la caché).
+    """
+    key = completion_cache.cache_key(params)
+    cached = completion_cache.get_cached_completion(key)
+    if cached is not None:
+        reply = cached.choices[0].message
+        if reply.content:
+            yield reply.content
+        return reply, cached.usage, True
+
+    stream = backend.create(**params, stream=True, stream_options={"include_usage": True})
+    reply, usage = yield from _consume_stream(stream)
+    if key is not None:
+        completion_cache.store_completion(key, ChatCompletion(
+            id=f"chatcmpl-stream-{key[:16]}", object="chat.completion", created=int(time.time()),
+            model=params["model"], usage=usage,
+            choices=[Choice(index=0, finish_reason="tool_calls" if reply.tool_calls else "stop", message=reply)]
+        ))
+    return reply, usage, False
+
+def stream_chat_with_tools(
+    prompt: str, 
+    user_id="anon", 
+    api_key="", 
+    model="gpt-4o-mini", 
+    temperature=0.7, 
+    max_tokens=None, 
+    top_p=1.0, 
+    presence_penalty=0.0, 
+    frequency_penalty=0.0, 
+    seed=None,
+    max_rounds=MAX_AGENT_ROUNDS,
+    token_budget=None,
+    deadline_seconds=None,
+    history=None,
+    backend=None
+):
+    """
+    Variante en streaming de chat_with_tools: genera eventos a medida que avanza el turno.
+
+    Yields:
+        dict: Eventos con clave "type":
+            - "delta": {"content"} fragmento de texto de la respuesta.
+            - "tool_start": {"id", "name", "arguments"} antes de ejecutar una tool.
+            - "tool_end": {"id", "name", "duration", "result"} al terminar una tool
+              (result es el contenido devuelto al modelo).
+            - "done": {"content", "rounds"} respuesta completa y registro de rondas
+              (mismo formato que chat_with_tools_traced).
+    """
+    backend = backend or get_model_backend(api_key)
+    all_tools = get_tools()
+    tools = _select_tools(prompt, history)
+    run = _AgentRun(
+        prompt,
+        history,
+        _build_common_params(model, temperature, max_tokens, top_p, presence_penalty, frequency_penalty, seed),
+        {"tools": tools, "tool_choice": "auto"} if tools else {},
+        max_rounds, token_budget, deadline_seconds
+    )
+    reply_parts = []
+
+    def _stop(reason):
+        notice = run.stop(reason)
+        reply_parts.append(notice)
+        return [{"type": "delta", "content": notice}, {"type": "done", "content": "".join(reply_parts), "rounds": run.rounds_log}]
+
+    while True:
+        reason = run.stop_reason()
+        if reason:
+            yield from _stop(reason)
+            return
+
+        start = time.perf_counter()
+        try:
+            consumer = _stream_completion(backend, run.next_request())
+            while True:
+                try:
+                    piece = next(consumer)
+                except StopIteration as finished:
+                    reply, usage, cached = finished.value
+                    break
+                reply_parts.append(piece)
+                yield {"type": "delta", "content": piece}
+        except APITimeoutError:
+            record_model_call(model, time.perf_counter() - start, error=True)
+            if run.deadline is None:
+                raise
+            yield from _stop("deadline")
+            return
+        except Exception:
+            record_model_call(model, time.perf_counter() - start, error=True)
+            raise
+        latency = time.perf_counter() - start
+        if not cached:
+            record_model_call(model, latency, usage=usage)
+        entry = run.record_round(usage, latency)
+
+        if not reply.tool_calls:
+            entry["finish"] = "answer"
+            yield {"type": "done", "content": "".join(reply_parts), "rounds": run.rounds_log}
+            return
+        if len(run.rounds_log) >= run.max_rounds:
+            yield from _stop("max_rounds")
+            return
+
+        # Ejecutar las tools del turno en paralelo, avisando de su inicio y final
+        entry["tool_calls"] = [call.function.name for call in reply.tool_calls]
+        executor = get_tool_executor()
+        futures = {}
+        start = time.perf_counter()
+        for call in reply.tool_calls:
+            yield {"type": "tool_start", "id": call.id, "name": call.function.name, "arguments": call.function.arguments}
+            futures[executor.submit(_run_tool_call, call, all_tools, user_id)] = (call, time.perf_counter())
+        try:
+            for future in concurrent.futures.as_completed(futures, timeout=run.remaining_time()):
+                call, call_start = futures[future]
+                yield {
+                    "type": "tool_end", "id": call.id, "name": call.function.name,
+                    "duration": round(time.perf_counter() - call_start, 4), "result": future.result()
+                }
+        except concurrent.futures.TimeoutError:
+            yield from _stop("deadline")
+            return
+        results = [future.result() for future in futures]
+        entry["tool_latency"] = round(time.perf_counter() - start, 4)
+
+        if not _requires_postprocess(reply.tool_calls, all_tools):
+            entry["finish"] = "tools_result"
+            text = "\n\n".join(results)
+            if reply_parts:
+                text = "\n\n" + text
+            reply_parts.append(text)
+            yield {"type": "delta", "content": text}
+            yield {"type": "done", "content": "".join(reply_parts), "rounds": run.rounds_log}
+            return
+
+        entry["finish"] = "tool_calls"
+        _append_tool_results(run.messages, reply, results)
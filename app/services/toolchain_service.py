@@ -5,129 +5,516 @@ Módulo encargado de ejecutar una Toolchain paso por paso, usando el contexto ac
 como entrada y salida entre pasos.
 
 Cada paso llama a una herramienta específica, utilizando los valores del contexto previo.
+
+Los pasos forman un grafo de dependencias deducido de su `input_map`. Las claves que escribe
+cada paso salen de sus `output_keys` o, si no las declara, de las `output_keys` del schema
+de su tool. Un paso sin ninguna de las dos puede añadir cualquier clave al contexto (una
+tool que devuelve un dict), así que por cada clave que lee un paso depende del último paso
+anterior que la declara y de todos los pasos sin claves conocidas posteriores a ese; si
+ninguno la declara, de todos los pasos anteriores sin claves conocidas. Los pasos
+independientes se ejecutan a la vez en el pool de hilos de tool_manager; el contexto final
+se combina en el orden de los pasos, igual que en una ejecución secuencial.
+
+execute_toolchain_batch ejecuta la misma toolchain sobre muchos contextos iniciales (p. ej.
+leídos de un JSONL o CSV con iter_contexts_from_file), con concurrencia acotada, reintentos
+de los errores transitorios por elemento y escritura incremental de los resultados en un JSONL.
 """
 
+import concurrent.futures
+import csv
+import heapq
+import json
+import os
+import threading
 import time
-from typing import Any, Dict, Tuple, List
+from typing import Any, Callable, Dict, Tuple, List, Set, Iterable, Iterator
+import openai
 from app.core import toolchain_registry
-from app.core.tool_manager import get_tools
+from app.core.tool_manager import get_tools, call_tool_by_name, get_tool_executor
+from app.core.metrics import describe, inc_counter, record_toolchain_step
 from app.models.toolchain_model import Toolchain, ToolchainStep
 from app.utils.ai_generation import generate_toolchain_with_ai
 
+# --- Grafo de dependencias ---
+
+def _step_output_keys(step: ToolchainStep, available_tools=None) -> List[str] | None:
+    """Claves que escribe el paso: las del paso, las del schema de su tool o None si no se saben."""
+    if step.output_keys is not None:
+        return step.output_keys
+    tool = (available_tools or {}).get(step.tool_name)
+    if tool:
+        return tool["schema"].get("output_keys")
+    return None
+
+def build_step_dependencies(toolchain: Toolchain, available_tools=None) -> List[Set[int]]:
+    """
+    Calcula, para cada paso, los índices de los pasos anteriores de los que depende.
+
+    Por cada clave que lee un paso, sus dependencias son los pasos anteriores que pueden
+    escribirla, desde el más cercano hacia atrás hasta el primero que la declara (ese paso
+    la sobrescribe, así que los anteriores a él no importan).
+
+    Args:
+        toolchain (Toolchain): Toolchain a analizar.
+        available_tools (dict | None): Herramientas disponibles (get_tools()); sus schemas
+            aportan las `output_keys` de los pasos que no las declaran.
+
+    Returns:
+        List[Set[int]]: Dependencias de cada paso (índices empezando en 0).
+    """
+    steps = toolchain.steps
+    output_keys = [_step_output_keys(step, available_tools) for step in steps]
+    dependencies = []
+    for i, step in enumerate(steps):
+        step_dependencies = set()
+        for key in step.input_map.values():
+            for j in range(i - 1, -1, -1):
+                if output_keys[j] is None:
+                    step_dependencies.add(j)
+                elif key in output_keys[j]:
+                    step_dependencies.add(j)
+                    break
+        dependencies.append(step_dependencies)
+    return dependencies
+
+def _step_context(index: int, initial_context: Dict[str, Any], outputs: Dict[int, Dict[str, Any]],
+                  dependencies: List[Set[int]]) -> Dict[str, Any]:
+    """Contexto visible para un paso: el inicial más los outputs de sus ancestros, en orden."""
+    ancestors = set()
+    frontier = list(dependencies[index])
+    while frontier:
+        j = frontier.pop()
+        if j not in ancestors:
+            ancestors.add(j)
+            frontier.extend(dependencies[j])
+    context = dict(initial_context)
+    for j in sorted(ancestors):
+        context.update(outputs[j])
+    return context
+
 # --- Servicio de Ejecución de Toolchains ---
 
-def execute_toolchain(toolchain_name: str, initial_context: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+def _trace(verbose: bool, message: str):
+    if verbose:
+        print(message)
+
+def _execute_step(toolchain_name: str, step_number: int, step: ToolchainStep,
+                  current_context: Dict[str, Any], available_tools, verbose: bool = True) -> Tuple[Dict[str, Any], Dict[str, Any] | None, Exception | None]:
     """
-    Ejecuta una toolchain paso a paso.
+    Ejecuta un paso con el contexto dado.
+
+    Returns:
+        Tuple: (log del paso, output como dict o None si falló, excepción o None).
+    """
+    step_start_time = time.time()
+    step_log_entry = {
+        "step": step_number,
+        "tool_name": step.tool_name,
+        "status": "PENDING",
+        "inputs": {},
+        "output": None,
+        "error": None,
+        "duration_seconds": 0
+    }
+
+    _trace(verbose, f"[Toolchain Service] Paso {step_number}: Ejecutando tool '{step.tool_name}'")
+
+    try:
+        # Mapear inputs desde el contexto actual
+        inputs_for_step = {}
+        missing_keys = []
+        for param_name, context_key in step.input_map.items():
+            if context_key in current_context:
+                inputs_for_step[param_name] = current_context[context_key]
+            else:
+                # Permitir que falten claves? O fallar? Por ahora, fallamos.
+                missing_keys.append(context_key)
+
+        step_log_entry["inputs"] = inputs_for_step
+
+        if missing_keys:
+            raise ValueError(f"Faltan las siguientes claves en el contexto para mapear inputs del paso {step_number} ('{step.tool_name}'): {', '.join(missing_keys)}")
+
+        # Comprobar que la herramienta está disponible
+        if step.tool_name not in available_tools:
+            raise LookupError(f"La herramienta '{step.tool_name}' (requerida en paso {step_number}) no está disponible o no tiene una función ejecutable.")
+
+        # Ejecutar la herramienta (despacho directo con validación de argumentos)
+        _trace(verbose, f"[Toolchain Service] Paso {step_number}: Llamando a {step.tool_name} con args: {inputs_for_step}")
+        output = call_tool_by_name(step.tool_name, inputs_for_step)
+        step_end_time = time.time()
+        step_log_entry["duration_seconds"] = round(step_end_time - step_start_time, 4)
+
+        # Asegurarse de que el output sea un diccionario para actualizar el contexto
+        if output is not None and not isinstance(output, dict):
+             _trace(verbose, f"[Toolchain Service] Paso {step_number}: Output de {step.tool_name} no es dict ({type(output)}), envolviendo en {{'{step.tool_name}_result': ...}}")
+             # Usar un nombre de clave más específico basado en la tool
+             output = {f"{step.tool_name}_result": output}
+        elif output is None:
+             # Si la tool devuelve None, no actualizamos el contexto con ello
+             _trace(verbose, f"[Toolchain Service] Paso {step_number}: {step.tool_name} devolvió None. No se actualiza el contexto.")
+             output = {} # Usar un dict vacío para la consistencia del log
+
+        step_log_entry["output"] = output
+        step_log_entry["status"] = "SUCCESS"
+        record_toolchain_step(toolchain_name, step.tool_name, step_end_time - step_start_time)
+        _trace(verbose, f"[Toolchain Service] Paso {step_number}: Éxito. Output: {output}")
+        return step_log_entry, output, None
+
+    except Exception as e:
+        step_end_time = time.time()
+        step_log_entry["duration_seconds"] = round(step_end_time - step_start_time, 4)
+        step_log_entry["status"] = "ERROR"
+        step_log_entry["error"] = str(e)
+        record_toolchain_step(toolchain_name, step.tool_name, step_end_time - step_start_time, error=True)
+        _trace(verbose, f"[Toolchain Service] Paso {step_number}: Error ejecutando {step.tool_name}: {e}")
+        return step_log_entry, None, e
+
+def execute_toolchain(toolchain_name: str, initial_context: Dict[str, Any], parallel: bool = True) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Ejecuta una toolchain, lanzando a la vez los pasos que no dependen entre sí.
 
     Args:
         toolchain_name (str): Nombre de la toolchain a ejecutar.
         initial_context (Dict[str, Any]): Diccionario con los inputs iniciales.
+        parallel (bool): Si es False, los pasos se ejecutan uno a uno en orden.
 
     Returns:
         Tuple[Dict[str, Any], List[Dict[str, Any]]]:
             - El contexto final después de ejecutar todos los pasos.
-            - Una lista de diccionarios, cada uno representando el log de un paso.
+            - Una lista de diccionarios, cada uno representando el log de un paso (en orden de paso).
 
     Raises:
         ValueError: Si la toolchain no se encuentra.
-        Exception: Si ocurre un error durante la ejecución de un paso.
+        Exception: Si ocurre un error durante la ejecución de un paso (el de menor número si
+            fallan varios; los pasos ya en marcha terminan y quedan en el log).
     """
+    return _run_toolchain(_get_toolchain_or_raise(toolchain_name), initial_context, parallel)
+
+def _get_toolchain_or_raise(toolchain_name: str) -> Toolchain:
     # Obtener la definición de la toolchain
-    # Asegurarse de cargar la última versión desde disco
-    toolchain_registry.load_toolchains_from_disk()
+    # Recargar desde disco solo si el archivo ha cambiado desde la última carga
+    toolchain_registry.load_toolchains_if_changed()
     toolchain = toolchain_registry.get_toolchain(toolchain_name)
     if not toolchain:
         raise ValueError(f"Toolchain '{toolchain_name}' no encontrada en el registro.")
+    return toolchain
+
+def _run_toolchain(toolchain: Toolchain, initial_context: Dict[str, Any], parallel: bool = True,
+                   verbose: bool = True) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Ejecuta los pasos de una toolchain ya cargada (ver execute_toolchain)."""
+    toolchain_name = toolchain.name
 
     # Obtener las herramientas disponibles
     available_tools = get_tools()
 
-    # Inicializar contexto y log de pasos
+    _trace(verbose, f"[Toolchain Service] Iniciando ejecución de '{toolchain_name}' con contexto: {initial_context}")
+
+    steps = toolchain.steps
+    if parallel:
+        dependencies = build_step_dependencies(toolchain, available_tools)
+    else:
+        dependencies = [{i - 1} if i else set() for i in range(len(steps))]
+    # Dentro de un hilo del pool, esperar a otros pasos del mismo pool podría bloquearlo
+    inline_only = not parallel or threading.current_thread().name.startswith("halion-tool")
+
+    outputs: Dict[int, Dict[str, Any]] = {}
+    step_logs: Dict[int, Dict[str, Any]] = {}
+    errors: Dict[int, Exception] = {}
+    pending = list(range(len(steps)))
+    running: Dict[concurrent.futures.Future, int] = {}
+
+    def _finish(index, result):
+        entry, output, error = result
+        step_logs[index] = entry
+        if error is None:
+            outputs[index] = output
+        else:
+            errors[index] = error
+
+    while pending or running:
+        ready = [] if errors else [i for i in pending if dependencies[i] <= outputs.keys()]
+        for index in ready:
+            pending.remove(index)
+            args = (toolchain_name, index + 1, steps[index],
+                    _step_context(index, initial_context, outputs, dependencies), available_tools, verbose)
+            if inline_only or (len(ready) == 1 and not running):
+                _finish(index, _execute_step(*args))
+            else:
+                running[get_tool_executor().submit(_execute_step, *args)] = index
+        if not running:
+            if errors or not ready:
+                break
+            continue
+        done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            _finish(running.pop(future), future.result())
+
+    steps_log = [step_logs[i] for i in sorted(step_logs)]
+    if errors:
+        index = min(errors)
+        # Propagar la excepción para que el controlador la maneje
+        raise Exception(f"Error en el paso {index + 1} ('{steps[index].tool_name}'): {errors[index]}") from errors[index]
+
+    # Combinar los outputs en el orden de los pasos (igual que una ejecución secuencial)
     current_context = initial_context.copy()
-    steps_log = []
-
-    print(f"[Toolchain Service] Iniciando ejecución de '{toolchain_name}' con contexto: {current_context}")
-
-    # Ejecutar cada paso
-    for i, step in enumerate(toolchain.steps):
-        step_number = i + 1
-        step_start_time = time.time()
-        step_log_entry = {
-            "step": step_number,
-            "tool_name": step.tool_name,
-            "status": "PENDING",
-            "inputs": {},
-            "output": None,
-            "error": None,
-            "duration_seconds": 0
-        }
-
-        print(f"[Toolchain Service] Paso {step_number}: Ejecutando tool '{step.tool_name}'")
+    for index in range(len(steps)):
+        if outputs.get(index):
+            current_context.update(outputs[index])
 
-        try:
-            # Mapear inputs desde el contexto actual
-            inputs_for_step = {}
-            missing_keys = []
-            for param_name, context_key in step.input_map.items():
-                if context_key in current_context:
-                    inputs_for_step[param_name] = current_context[context_key]
-                else:
-                    # Permitir que falten claves? O fallar? Por ahora, fallamos.
-                    missing_keys.append(context_key)
-
-            step_log_entry["inputs"] = inputs_for_step
-
-            if missing_keys:
-                raise ValueError(f"Faltan las siguientes claves en el contexto para mapear inputs del paso {step_number} ('{step.tool_name}'): {', '.join(missing_keys)}")
-
-            # Encontrar la función de la herramienta
-            tool_info = available_tools.get(step.tool_name)
-            if not tool_info or "func" not in tool_info:
-                raise LookupError(f"La herramienta '{step.tool_name}' (requerida en paso {step_number}) no está disponible o no tiene una función ejecutable.")
-
-            tool_function = tool_info["func"]
-
-            # Ejecutar la herramienta
-            print(f"[Toolchain Service] Paso {step_number}: Llamando a {step.tool_name} con args: {inputs_for_step}")
-            output = tool_function(**inputs_for_step)
-            step_end_time = time.time()
-            step_log_entry["duration_seconds"] = round(step_end_time - step_start_time, 4)
-
-            # Asegurarse de que el output sea un diccionario para actualizar el contexto
-            if output is not None and not isinstance(output, dict):
-                 print(f"[Toolchain Service] Paso {step_number}: Output de {step.tool_name} no es dict ({type(output)}), envolviendo en {{'{step.tool_name}_result': ...}}")
-                 # Usar un nombre de clave más específico basado en la tool
-                 output = {f"{step.tool_name}_result": output}
-            elif output is None:
-                 # Si la tool devuelve None, no actualizamos el contexto con ello
-                 print(f"[Toolchain Service] Paso {step_number}: {step.tool_name} devolvió None. No se actualiza el contexto.")
-                 output = {} # Usar un dict vacío para la consistencia del log
-
-            # Actualizar el contexto con el output (si no es None)
-            if output:
-                 current_context.update(output)
-
-            step_log_entry["output"] = output
-            step_log_entry["status"] = "SUCCESS"
-            print(f"[Toolchain Service] Paso {step_number}: Éxito. Output: {output}. Contexto actualizado: {current_context}")
-
-
-        except Exception as e:
-            step_end_time = time.time()
-            step_log_entry["duration_seconds"] = round(step_end_time - step_start_time, 4)
-            step_log_entry["status"] = "ERROR"
-            step_log_entry["error"] = str(e)
-            steps_log.append(step_log_entry) # Añadir el log del paso fallido
-            print(f"[Toolchain Service] Paso {step_number}: Error ejecutando {step.tool_name}: {e}")
-            # Propagar la excepción para que el controlador la maneje
-            raise Exception(f"Error en el paso {step_number} ('{step.tool_name}'): {e}")
-
-        steps_log.append(step_log_entry)
-
-    print(f"[Toolchain Service] Ejecución de '{toolchain_name}' completada. Contexto final: {current_context}")
+    _trace(verbose, f"[Toolchain Service] Ejecución de '{toolchain_name}' completada. Contexto final: {current_context}")
     return current_context, steps_log
 
+# --- Ejecución por lotes ---
+
+BATCH_CONCURRENCY_ENV_VAR = "HALION_BATCH_CONCURRENCY"
+DEFAULT_BATCH_CONCURRENCY = 4
+DEFAULT_BATCH_RETRIES = 2
+DEFAULT_RETRY_BACKOFF = 0.5  # Segundos antes del primer reintento; se duplica en cada uno
+
+# Errores transitorios que merece la pena reintentar (el resto fallan igual en cada intento)
+TRANSIENT_ERRORS = (
+    TimeoutError, ConnectionError,
+    openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError
+)
+# Nombres de excepciones de otras bibliotecas HTTP (p. ej. requests) que también lo son
+TRANSIENT_ERROR_NAMES = {"Timeout", "ConnectTimeout", "ReadTimeout", "ConnectionError"}
+
+describe("halion_toolchain_batch_items_total", "counter", "Elementos procesados por lotes de toolchains por resultado")
+
+def iter_contexts_from_file(path: str, fmt: str | None = None) -> Iterator[Any]:
+    """
+    Lee contextos iniciales de un archivo sin cargarlo entero en memoria.
+
+    Args:
+        path (str): Archivo JSONL (un objeto por línea) o CSV (con cabecera; una fila por contexto).
+        fmt (str | None): "jsonl" o "csv"; por defecto según la extensión.
+
+    Yields:
+        dict: Cada contexto. Las líneas JSONL no válidas se devuelven como ValueError para que
+        el lote las registre como errores sin desplazar los índices.
+    """
+    fmt = (fmt or os.path.splitext(path)[1].lstrip(".")).lower()
+    if fmt in ("jsonl", "ndjson"):
+        with open(path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield ValueError(f"Línea {line_number} de {path} no es JSON válido: {e}")
+    elif fmt == "csv":
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            yield from csv.DictReader(f)
+    else:
+        raise ValueError(f"Formato de entrada no soportado: '{fmt}' (usa jsonl o csv)")
+
+def _completed_indices(path: str) -> Set[int]:
+    """Índices que ya constan como SUCCESS en un archivo de resultados JSONL."""
+    done = set()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Última línea a medio escribir si el proceso se interrumpió
+                if result.get("status") == "SUCCESS":
+                    done.add(result.get("index"))
+    except FileNotFoundError:
+        pass
+    return done
+
+def is_transient_error(error: BaseException) -> bool:
+    """
+    Indica si un error (o alguna de sus causas) es transitorio: timeouts, fallos de conexión o
+    respuestas HTTP 429/5xx. Los errores de validación, claves ausentes o toolchains
+    inexistentes no lo son.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, TRANSIENT_ERRORS):
+            return True
+        if any(cls.__name__ in TRANSIENT_ERROR_NAMES for cls in type(error).__mro__):
+            return True
+        response = getattr(error, "response", None)
+        status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+        if isinstance(status, int) and (status == 429 or status >= 500):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+def _run_batch_item(toolchain: Toolchain, index: int, context, attempt: int,
+                    parallel_steps: bool, include_steps: bool) -> Dict[str, Any]:
+    """
+    Ejecuta un intento de un elemento del lote y devuelve su resultado serializable. Si falla
+    con un error transitorio, el resultado incluye "retryable": True (el lote decide si reintenta).
+    """
+    result = {"index": index, "status": "ERROR", "attempts": attempt}
+    if not isinstance(context, dict):
+        result["attempts"] = 0
+        result["error"] = str(context) if isinstance(context, Exception) else f"El contexto no es un objeto: {context!r}"
+        return result
+    try:
+        final_context, steps_log = _run_toolchain(toolchain, context, parallel_steps, verbose=False)
+    except Exception as e:
+        result["error"] = str(e)
+        result["retryable"] = is_transient_error(e)
+        return result
+    result["status"] = "SUCCESS"
+    result["context"] = final_context
+    if include_steps:
+        result["steps"] = steps_log
+    return result
+
+def _open_batch_output(path: str, resume: bool):
+    """Abre el JSONL de resultados; al reanudar, completa la última línea si quedó a medias."""
+    if not resume:
+        return open(path, "w", encoding="utf-8")
+    sink_file = open(path, "a+b")
+    if sink_file.tell() > 0:
+        sink_file.seek(-1, os.SEEK_END)
+        if sink_file.read(1) != b"\n":
+            sink_file.write(b"\n")
+    sink_file.close()
+    return open(path, "a", encoding="utf-8")
+
+def execute_toolchain_batch(
+    toolchain_name: str,
+    contexts: Iterable[Any],
+    output: str | Callable[[Dict[str, Any]], None] | None = None,
+    concurrency: int | None = None,
+    max_retries: int = DEFAULT_BATCH_RETRIES,
+    retry_backoff: float = DEFAULT_RETRY_BACKOFF,
+    max_pending: int | None = None,
+    parallel_steps: bool = True,
+    include_steps: bool = False,
+    resume: bool = False,
+    progress: Callable[[Dict[str, Any]], None] | None = None,
+    verbose: bool = True
+) -> Dict[str, Any]:
+    """
+    Ejecuta una toolchain sobre muchos contextos iniciales con concurrencia acotada.
+
+    La toolchain se carga una sola vez. Los contextos se consumen de forma perezosa: como mucho
+    `max_pending` elementos están en cola, en ejecución o esperando un reintento a la vez
+    (contrapresión), de modo que `contexts` puede ser un archivo enorme leído con
+    iter_contexts_from_file.
+
+    Solo se reintentan los errores transitorios (ver is_transient_error). Cada reintento vuelve
+    a ejecutar la toolchain completa, incluidos los pasos con efectos secundarios que ya se
+    hubieran completado; usa max_retries=0 si no son idempotentes. La espera entre intentos no
+    ocupa ningún hilo del lote.
+
+    Args:
+        toolchain_name (str): Nombre de la toolchain a ejecutar.
+        contexts (Iterable): Contextos iniciales (dicts), en orden; su posición es el "index".
+        output: Ruta de un JSONL donde se escribe cada resultado en cuanto termina, o una función
+            que lo recibe. None = solo se devuelve el resumen.
+        concurrency (int | None): Elementos en paralelo (por defecto HALION_BATCH_CONCURRENCY).
+        max_retries (int): Reintentos por elemento ante errores transitorios, con espera
+            exponencial desde retry_backoff.
+        max_pending (int | None): Elementos en vuelo como máximo (por defecto 2 x concurrency).
+        parallel_steps (bool): Ejecutar en paralelo los pasos independientes de cada elemento.
+        include_steps (bool): Incluir el log de pasos en los resultados correctos.
+        resume (bool): Con `output` como ruta, omite los índices que ya constan como SUCCESS (los
+            fallidos se vuelven a procesar) y añade los resultados al final del archivo.
+        progress: Función opcional que recibe el resumen parcial tras cada elemento.
+        verbose (bool): Mostrar el inicio y el resumen del lote (los elementos no se trazan).
+
+    Returns:
+        Dict[str, Any]: Resumen con total, succeeded, failed, retries, skipped, duration_seconds
+        e items_per_second. Cada resultado escrito es {"index", "status" ("SUCCESS"/"ERROR"),
+        "attempts", "duration_seconds"} más "context" (contexto final) o "error".
+
+    Raises:
+        ValueError: Si la toolchain no se encuentra.
+    """
+    toolchain = _get_toolchain_or_raise(toolchain_name)
+    if concurrency is None:
+        try:
+            concurrency = int(os.getenv(BATCH_CONCURRENCY_ENV_VAR, DEFAULT_BATCH_CONCURRENCY))
+        except ValueError:
+            concurrency = DEFAULT_BATCH_CONCURRENCY
+    concurrency = max(1, concurrency)
+    max_pending = max(concurrency, max_pending or 2 * concurrency)
+
+    skip = _completed_indices(output) if resume and isinstance(output, str) else set()
+    sink_file = _open_batch_output(output, resume) if isinstance(output, str) else None
+
+    summary = {"total": 0, "succeeded": 0, "failed": 0, "retries": 0, "skipped": 0}
+    start = time.perf_counter()
+    running: Dict[concurrent.futures.Future, Tuple[int, Any, float]] = {}  # futuro -> (índice, contexto, inicio)
+    waiting_retries = []  # heap de (instante del reintento, índice, contexto, intento, inicio)
+    pending_contexts = enumerate(contexts)
+    exhausted = False
+
+    def _submit(index, context, attempt, item_start):
+        future = executor.submit(_run_batch_item, toolchain, index, context, attempt, parallel_steps, include_steps)
+        running[future] = (index, context, item_start)
+
+    def _collect(future):
+        index, context, item_start = running.pop(future)
+        result = future.result()
+        if result.pop("retryable", False) and result["attempts"] <= max_retries:
+            delay = retry_backoff * 2 ** (result["attempts"] - 1)
+            heapq.heappush(waiting_retries, (time.monotonic() + delay, index, context, result["attempts"] + 1, item_start))
+            return
+        result["duration_seconds"] = round(time.perf_counter() - item_start, 4)
+        summary["total"] += 1
+        summary["succeeded" if result["status"] == "SUCCESS" else "failed"] += 1
+        summary["retries"] += max(0, result["attempts"] - 1)
+        inc_counter("halion_toolchain_batch_items_total", toolchain=toolchain_name, status=result["status"])
+        # Los resultados se escriben desde este hilo, en cuanto termina cada elemento
+        if sink_file is not None:
+            sink_file.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+            sink_file.flush()
+        elif callable(output):
+            output(result)
+        if progress:
+            progress(dict(summary))
+
+    _trace(verbose, f"[Toolchain Service] Lote de '{toolchain_name}': concurrencia {concurrency}, reintentos {max_retries}")
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="halion-batch")
+    try:
+        while True:
+            # Reintentos cuya espera ha terminado
+            while waiting_retries and waiting_retries[0][0] <= time.monotonic():
+                _, index, context, attempt, item_start = heapq.heappop(waiting_retries)
+                _submit(index, context, attempt, item_start)
+            # Contrapresión: no leer más entradas mientras haya max_pending elementos en vuelo
+            while not exhausted and len(running) + len(waiting_retries) < max_pending:
+                try:
+                    index, context = next(pending_contexts)
+                except StopIteration:
+                    exhausted = True
+                    break
+                if index in skip:
+                    summary["skipped"] += 1
+                    continue
+                _submit(index, context, 1, time.perf_counter())
+            if not running and not waiting_retries:
+                break
+            timeout = max(0.0, waiting_retries[0][0] - time.monotonic()) if waiting_retries else None
+            if not running:
+                time.sleep(timeout)
+                continue
+            done, _ = concurrent.futures.wait(running, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                _collect(future)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        if sink_file is not None:
+            sink_file.close()
+
+    elapsed = time.perf_counter() - start
+    summary["duration_seconds"] = round(elapsed, 3)
+    summary["items_per_second"] = round(summary["total"] / elapsed, 2) if elapsed > 0 else 0.0
+    _trace(verbose, f"[Toolchain Service] Lote de '{toolchain_name}' completado: {summary}")
+    return summary
+
 # --- Servicio de Generación de Toolchains con IA ---
 
 def generate_toolchain_via_ai(description: str, api_key: str, model_config: Dict[str, Any]) -> Dict[str, Any]:
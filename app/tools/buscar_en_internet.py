@@ -28,6 +28,8 @@ def buscar_en_internet(query: str, max_results: int = 5) -> str:
 schema = {
   "name": "buscar_en_internet",
   "description": "Realiza una búsqueda en internet (DuckDuckGo) y devuelve resultados detallados.",
+  "cacheable": True,
+  "cache_ttl": 3600,
   "postprocess": True,
   "parameters": {
     "type": "object",
@@ -43,6 +43,8 @@ def fetch_movie_info(movie_names: List[str]) -> Dict[str, Union[str, Dict]]:
 schema = {
     "name": "fetch_movie_info",
     "description": "Fetches information about the given movies from the OMDB database.",
+    "cacheable": True,
+    "cache_ttl": 86400,
     "postprocess": True,
     "parameters": {
         "type": "object",
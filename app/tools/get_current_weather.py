@@ -50,6 +50,8 @@ def get_current_weather(location: str, unit: str = "metric") -> str:
 schema = {
   "name": "get_current_weather",
   "description": "Obtén el clima actual en una ubicación especificada.",
+  "cacheable": True,
+  "cache_ttl": 600,
   "parameters": {
     "type": "object",
     "properties": {
@@ -47,6 +47,8 @@ def obtener_info_libro(titulo: Optional[str] = None, isbn: Optional[str] = None,
 schema = {
     "name": "obtener_info_libro",
     "description": "Obtiene información de libros a partir de un título, ISBN o autor.",
+    "cacheable": True,
+    "cache_ttl": 86400,
     "postprocess": True,
     "parameters": {
         "type": "object",
@@ -21,5 +21,8 @@ schema = {
       "texto"
     ]
   },
-  "postprocess": False
+  "postprocess": False,
+  "output_keys": [
+    "resumen"
+  ]
 }
@@ -21,5 +21,6 @@ schema = {
         },
         "required": ["texto", "idioma"]
     },
-    "postprocess": False
+    "postprocess": False,
+    "output_keys": ["traduccion"]
 }
\ No newline at end of file
@@ -1,7 +1,9 @@
-import openai
 import re
 import json
-def generate_tool_with_ai(description: str, api_key: str, model: str = "gpt-4", temperature: float = 0.7) -> str:
+from app.core.metrics import timed_chat_completion
+from app.core.model_backends import OpenAIBackend, get_model_backend
+
+def generate_tool_with_ai(description: str, api_key: str, model: str = "gpt-4", temperature: float = 0.7, backend=None) -> str:
     """
     Genera código para una herramienta usando la API de OpenAI.
     
@@ -10,6 +12,7 @@ def generate_tool_with_ai(description: str, api_key: str, model: str = "gpt-4",
         api_key: API key de OpenAI
         model: Modelo a utilizar (por defecto "gpt-4")
         temperature: Temperatura para la generación (por defecto 0.7)
+        backend: Backend de modelo (por defecto el de HALION_MODEL_BACKEND)
         
     Returns:
         str: Código Python de la herramienta generada
@@ -18,12 +21,11 @@ def generate_tool_with_ai(description: str, api_key: str, model: str = "gpt-4",
         ValueError: Si hay algún error en la generación
     """
     try:                
-        # Verificar que tenemos una API key válida
-        if not api_key:
+        backend = backend or get_model_backend(api_key)
+
+        # Verificar que tenemos una API key válida (no hace falta con un backend simulado)
+        if not api_key and isinstance(backend, OpenAIBackend):
             raise ValueError("No se proporcionó una API key válida")
-            
-        # Configurar cliente OpenAI
-        client = openai.OpenAI(api_key=api_key)
         
         # Prompt simplificado para funciones/tools de OpenAI
         prompt = f"""
@@ -43,6 +45,7 @@ def generate_tool_with_ai(description: str, api_key: str, model: str = "gpt-4",
                 - name: Nombre de la función (debe coincidir)
                 - description: Descripción clara y concisa
                 - postprocess: boolean (si el resultado necesita procesamiento por IA)
+                - output_keys (opcional): si la función devuelve un dict, lista de sus claves
                 - parameters: Definición JSON Schema de parámetros
                 - required: Lista de parámetros obligatorios
 
@@ -128,7 +131,8 @@ def generate_tool_with_ai(description: str, api_key: str, model: str = "gpt-4",
         """
         
         # Llamada a la API
-        response = client.chat.completions.create(
+        response = timed_chat_completion(
+            backend.create,
             model=model,
             messages=[
                 {"role": "system", "content": "Eres un experto desarrollador de herramientas para GPT function calling."},
@@ -158,7 +162,7 @@ def generate_tool_with_ai(description: str, api_key: str, model: str = "gpt-4",
     except Exception as e:
         raise ValueError(f"Error al generar código: {str(e)}") 
     
-def generate_toolchain_with_ai(description: str, api_key: str, model="gpt-4", temperature=0.7) -> dict:
+def generate_toolchain_with_ai(description: str, api_key: str, model="gpt-4", temperature=0.7, backend=None) -> dict:
     """
     Genera una definición de Toolchain (en formato JSON) a partir de una descripción en lenguaje natural.
 
@@ -167,12 +171,12 @@ def generate_toolchain_with_ai(description: str, api_key: str, model="gpt-4", te
         api_key (str): Clave de API para OpenAI.
         model (str): Modelo a usar.
         temperature (float): Nivel de creatividad.
+        backend: Backend de modelo (por defecto el de HALION_MODEL_BACKEND).
 
     Returns:
         dict: Estructura de toolchain con campos name, description, steps.
     """
-    import openai
-    openai.api_key = api_key
+    backend = backend or get_model_backend(api_key)
 
     prompt = f"""
         Eres un asistente experto en automatización de flujos de herramientas.
@@ -197,11 +201,15 @@ def generate_toolchain_with_ai(description: str, api_key: str, model="gpt-4", te
 
         Asegúrate de que los nombres de las herramientas coincidan con los disponibles en el sistema.
 
+        Opcionalmente, cada paso puede incluir "output_keys": una lista con las claves que añade al
+        contexto. Así los pasos que no dependen entre sí se pueden ejecutar en paralelo.
+
         Descripción del flujo deseado:
         {description}
         """
 
-    response = openai.chat.completions.create(
+    response = timed_chat_completion(
+        backend.create,
         model=model,
         messages=[
             {"role": "system", "content": "Eres un generador experto de Toolchains para flujos de herramientas."},
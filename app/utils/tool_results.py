@@ -0,0 +1,33 @@
+import json
+
+# Prefijos con los que las tools que devuelven texto indican un fallo
+ERROR_PREFIXES = ("❌", "[ERROR]", "Error:", "ERROR:")
+
+def is_error_result(result) -> bool:
+    """
+    Detecta si el resultado de una tool indica un error.
+
+    Reconoce la convención de las tools: un dict con la clave "error", su versión serializada
+    en JSON (p. ej. `json.dumps({"error": ...})`) o un texto que empieza por un prefijo de
+    error como "❌" o "Error:".
+
+    Args:
+        result: Resultado devuelto por la herramienta.
+
+    Returns:
+        bool: True si el resultado es un error.
+    """
+    if isinstance(result, dict):
+        return "error" in result
+    if not isinstance(result, str):
+        return False
+    text = result.lstrip()
+    if text.startswith(ERROR_PREFIXES):
+        return True
+    if text.startswith("{") and '"error"' in text:
+        try:
+            parsed = json.loads(text)
+        except (json.JSONDecodeError, TypeError):
+            return False
+        return isinstance(parsed, dict) and "error" in parsed
+    return False
@@ -3,11 +3,12 @@ from app.views.tools_view import render as render_tools
 from app.views.env_view import render as render_env
 from app.views.logs_view import render as render_logs
 from app.views.toolchains_view import render as render_toolchains
+from app.views.metrics_view import render as render_metrics
 
 def render():
     """
     Renderiza el panel de administración con pestañas para herramientas, 
-    variables de entorno y logs
+    variables de entorno, logs y métricas
     """
     st.title("⚙️ Panel de Administración")
     
@@ -15,7 +16,8 @@ def render():
         "🛠️ Herramientas", 
         "🔐 Variables de Entorno", 
         "🧩 Toolchains",
-        "📊 Logs"
+        "📊 Logs",
+        "📈 Métricas"
         ])
     
     # Tab Herramientas
@@ -32,4 +34,8 @@ def render():
     
     # Tab Logs
     with tabs[3]:
-        render_logs() 
\ No newline at end of file
+        render_logs()
+    
+    # Tab Métricas
+    with tabs[4]:
+        render_metrics()
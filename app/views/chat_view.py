@@ -1,11 +1,17 @@
 import streamlit as st
-from app.services.chat_service import chat_with_tools
+from app.services.chat_service import stream_chat_with_tools
+from app.core.conversation_memory import ConversationMemory
 
 def render():
     """
     Renderiza la vista de chat con el asistente de IA
     """
     st.title("💬 HALion: Asistente IA con herramientas")
+
+    # Memoria de la conversación que se envía al modelo (ventana por tokens + resumen)
+    if "memory" not in st.session_state:
+        st.session_state.memory = ConversationMemory()
+    memory = st.session_state.memory
     
     # Mostrar mensajes del chat
     for msg in st.session_state.chat:
@@ -19,39 +25,62 @@ def render():
     if prompt:
         with st.chat_message("user"):
             st.markdown(prompt)
-        
+
         with st.chat_message("assistant"):
-            with st.spinner("Pensando..."):
-                try:
-                    # Obtener API key y configuración del estado de la sesión
-                    api_key = st.session_state.get("api_key", "")
-                    model_config = st.session_state.get("model_config", {
-                        "model": "gpt-4",
-                        "temperature": 0.7,
-                        "max_tokens": 1024,
-                        "top_p": 1.0,
-                        "presence_penalty": 0.0,
-                        "frequency_penalty": 0.0,
-                        "seed": None
-                    })
-                    
-                    # Llamar al ejecutor con los parámetros
-                    reply = chat_with_tools(
-                        prompt,
-                        user_id="anon",
-                        api_key=api_key,
-                        model=model_config["model"],
-                        temperature=model_config["temperature"],
-                        max_tokens=model_config["max_tokens"],
-                        top_p=model_config["top_p"],
-                        presence_penalty=model_config["presence_penalty"],
-                        frequency_penalty=model_config["frequency_penalty"],
-                        seed=model_config["seed"]
-                    )
-                    st.markdown(reply)
-                except Exception as e:
-                    st.error(f"❌ Lo siento, ha ocurrido un error: {str(e)}")
-                    reply = f"Error: {str(e)}"
+            status = st.status("Pensando...", expanded=False)
+            try:
+                # Obtener API key y configuración del estado de la sesión
+                api_key = st.session_state.get("api_key", "")
+                model_config = st.session_state.get("model_config", {
+                    "model": "gpt-4",
+                    "temperature": 0.7,
+                    "max_tokens": 1024,
+                    "top_p": 1.0,
+                    "presence_penalty": 0.0,
+                    "frequency_penalty": 0.0,
+                    "seed": None
+                })
+                
+                # Llamar al ejecutor en streaming con los parámetros
+                events = stream_chat_with_tools(
+                    prompt,
+                    user_id="anon",
+                    api_key=api_key,
+                    model=model_config["model"],
+                    temperature=model_config["temperature"],
+                    max_tokens=model_config["max_tokens"],
+                    top_p=model_config["top_p"],
+                    presence_penalty=model_config["presence_penalty"],
+                    frequency_penalty=model_config["frequency_penalty"],
+                    seed=model_config["seed"],
+                    history=memory.build_messages()
+                )
+                tool_results = []
+                reply = st.write_stream(render_stream_events(events, status, tool_results))
+                status.update(label="Respuesta completada", state="complete")
+            except Exception as e:
+                status.update(label="Error", state="error")
+                st.error(f"❌ Lo siento, ha ocurrido un error: {str(e)}")
+                reply = f"Error: {str(e)}"
+                tool_results = None
 
         # Guardar en el historial
-        st.session_state.chat.append({"user": prompt, "bot": reply}) 
\ No newline at end of file
+        st.session_state.chat.append({"user": prompt, "bot": reply})
+        if tool_results is not None:
+            memory.add_turn(prompt, reply, tool_results)
+
+def render_stream_events(events, status, tool_results):
+    """
+    Convierte los eventos del chat en streaming en fragmentos de texto para st.write_stream,
+    mostrando el progreso de las herramientas en el contenedor de estado y guardando sus
+    resultados en `tool_results` para la memoria de la conversación
+    """
+    for event in events:
+        if event["type"] == "delta":
+            yield event["content"]
+        elif event["type"] == "tool_start":
+            status.update(label=f"Ejecutando {event['name']}...", state="running")
+            status.write(f"🔧 {event['name']}({event['arguments']})")
+        elif event["type"] == "tool_end":
+            status.write(f"✅ {event['name']} ({event['duration']:.2f}s)")
+            tool_results.append((event["name"], event["result"]))
@@ -1,8 +1,22 @@
 import streamlit as st
-import json
-import pandas as pd
-from datetime import datetime
-from app.core.logger import load_log_entries, clear_log_entries
+import os
+import tempfile
+from datetime import datetime, time, timedelta
+from app.core.logger import (
+    load_log_page, clear_log_entries, query_log_entries, list_logged_functions,
+    export_logs_to_file, EXPORT_FORMATS
+)
+
+# Número de registros por página
+LOGS_PAGE_SIZE = 100
+
+# Rangos de tiempo disponibles en el filtro
+TIME_RANGES = {
+    "Última hora": timedelta(hours=1),
+    "Últimas 24 horas": timedelta(days=1),
+    "Últimos 7 días": timedelta(days=7),
+    "Todo": None,
+}
 
 def render():
     """
@@ -14,45 +28,125 @@ def render():
     with col1:
         if st.button("📂 Cargar Registros"):
             with st.spinner("Cargando registros..."):
-                st.session_state.logs = load_log_entries()
+                st.session_state.logs, st.session_state.logs_cursor = load_log_page(LOGS_PAGE_SIZE)
             st.success("✅ Registros cargados")
     with col2:
         if st.button("🗑️ Limpiar Registros"):
             clear_log_entries()
+            _discard_export()
             st.session_state.logs = []
+            st.session_state.logs_cursor = None
             st.warning("🗑️ Registros eliminados")
     
+    # Filtros (indexados con el backend SQLite)
+    with st.expander("🔎 Filtrar registros", expanded=False):
+        render_filters()
+    
     logs = st.session_state.get("logs", [])
     if logs:
-        st.info(f"📝 {len(logs)} registros encontrados")
+        st.info(f"📝 {len(logs)} registros cargados")
+
+        # Paginación hacia registros más antiguos
+        if st.session_state.get("logs_cursor"):
+            if st.button("⏪ Cargar registros anteriores"):
+                with st.spinner("Cargando registros anteriores..."):
+                    older, st.session_state.logs_cursor = load_log_page(LOGS_PAGE_SIZE, st.session_state.logs_cursor)
+                st.session_state.logs = older + logs
+                st.rerun()
         
-        # Botones de descarga
-        render_download_buttons(logs)
+        # Exportación
+        render_download_buttons()
         
         # Mostrar logs
         render_logs_table(logs)
     else:
         st.info("ℹ️ No hay registros cargados. Haz clic en 'Cargar Registros' para ver la actividad.")
 
-def render_download_buttons(logs):
-    """Renderiza los botones para descargar los logs"""
-    col1, col2 = st.columns(2)
+def render_filters():
+    """Renderiza el formulario de filtrado por herramienta, rango de tiempo y errores"""
+    col1, col2, col3 = st.columns([2, 2, 1])
     with col1:
-        json_data = json.dumps(logs, ensure_ascii=False, indent=2)
-        st.download_button(
-            "📥 Descargar JSON",
-            data=json_data,
-            file_name=f"logs_{datetime.now().strftime('%Y%m%d')}.json",
-            mime="application/json"
-        )
+        function = st.text_input("Herramienta", key="logs_filter_function", placeholder="get_current_weather")
     with col2:
-        df = pd.DataFrame(logs)
-        st.download_button(
-            "📥 Descargar CSV",
-            data=df.to_csv(index=False),
-            file_name=f"logs_{datetime.now().strftime('%Y%m%d')}.csv",
-            mime="text/csv"
-        )
+        time_range = st.selectbox("Periodo", list(TIME_RANGES), key="logs_filter_range")
+    with col3:
+        errors_only = st.checkbox("Solo errores", key="logs_filter_errors")
+    
+    if st.button("🔎 Aplicar filtros"):
+        delta = TIME_RANGES[time_range]
+        with st.spinner("Buscando registros..."):
+            st.session_state.logs = query_log_entries(
+                function=function.strip() or None,
+                since=datetime.utcnow() - delta if delta else None,
+                errors_only=errors_only,
+                limit=LOGS_PAGE_SIZE * 10
+            )
+            st.session_state.logs_cursor = None
+        st.success(f"✅ {len(st.session_state.logs)} registros coinciden con el filtro")
+
+def _discard_export():
+    """Elimina el archivo temporal de la última exportación preparada"""
+    export = st.session_state.pop("logs_export", None)
+    if export and os.path.exists(export["path"]):
+        os.remove(export["path"])
+
+def render_download_buttons():
+    """
+    Renderiza la exportación de logs. El archivo se genera solo al pulsar el botón,
+    en streaming hacia un archivo temporal, y se entrega como objeto de archivo.
+
+    Limitación: st.download_button lee el archivo entero en memoria para servirlo. Para
+    exportaciones muy grandes conviene usar logger.export_logs_to_file directamente.
+    """
+    with st.expander("📥 Exportar registros", expanded=False):
+        col1, col2 = st.columns(2)
+        with col1:
+            fmt = st.selectbox("Formato", list(EXPORT_FORMATS), key="logs_export_format")
+            functions = st.multiselect("Herramientas", list_logged_functions(), key="logs_export_functions")
+        with col2:
+            today = datetime.utcnow().date()
+            date_range = st.date_input("Rango de fechas (UTC)", value=(today - timedelta(days=7), today), key="logs_export_range")
+
+        if st.button("⚙️ Preparar exportación"):
+            since = until = None
+            if isinstance(date_range, (list, tuple)) and len(date_range) == 2:
+                since = datetime.combine(date_range[0], time.min)
+                until = datetime.combine(date_range[1], time.min) + timedelta(days=1)
+            _discard_export()
+            mime, extension = EXPORT_FORMATS[fmt]
+            fd, path = tempfile.mkstemp(prefix="halion_logs_", suffix=extension)
+            os.close(fd)
+            try:
+                with st.spinner("Generando exportación..."):
+                    size = export_logs_to_file(path, fmt, functions or None, since, until)
+            except ImportError:
+                os.remove(path)
+                st.error("❌ La exportación a Parquet requiere instalar 'pyarrow'")
+                return
+            except Exception as e:
+                os.remove(path)
+                st.error(f"❌ Error al exportar: {str(e)}")
+                return
+            st.session_state.logs_export = {
+                "path": path,
+                "mime": mime,
+                "file_name": f"logs_{datetime.now().strftime('%Y%m%d')}{extension}",
+                "size": size,
+            }
+
+        export = st.session_state.get("logs_export")
+        if export and os.path.exists(export["path"]):
+            st.caption(
+                f"Archivo preparado: {export['size'] / 1024:.1f} KiB "
+                "(la descarga lo carga completo en memoria)"
+            )
+            with open(export["path"], "rb") as f:
+                st.download_button(
+                    f"📥 Descargar {export['file_name']}",
+                    data=f,
+                    file_name=export["file_name"],
+                    mime=export["mime"]
+                )
 
 def render_logs_table(logs):
     """Renderiza la tabla de logs"""
@@ -64,13 +158,14 @@ def render_logs_table(logs):
             with col1:
                 st.write("**Información Básica**")
                 st.write(f"**👤 Usuario:** {log.get('user_id', 'N/A')}")
-                st.write(f"**⏲️ Tiempo:** {log.get('execution_time', 'N/A')}s")
+                execution_time = log.get('execution_time')
+                st.write(f"**⏲️ Tiempo:** {f'{execution_time:.3f}s' if execution_time is not None else 'N/A'}")
             
             # Columna derecha: Argumentos y Resultado
             with col2:
                 st.write("**Detalles de Ejecución**")
-                if log.get('args'):
+                if log.get('arguments'):
                     st.write("**⚙️ Argumentos:**")
-                    st.json(log['args'])
+                    st.json(log['arguments'])
                 st.write("**📝 Resultado:**")
                 st.code(log.get('result', 'N/A')) 
\ No newline at end of file
@@ -0,0 +1,111 @@
+import streamlit as st
+from app.core.metrics import get_metrics_snapshot, render_prometheus, reset_metrics, METRICS_PORT_ENV_VAR
+from app.core.completion_cache import get_cache_stats
+from app.core.tool_cache import get_tool_cache_stats
+
+# Histogramas y contadores que se muestran en cada sección: (título, histograma, contador, etiqueta)
+METRIC_SECTIONS = [
+    ("🔧 Herramientas", "halion_tool_call_duration_seconds", "halion_tool_calls_total", "tool"),
+    ("🧩 Pasos de Toolchain", "halion_toolchain_step_duration_seconds", "halion_toolchain_steps_total", "tool"),
+    ("🤖 Modelos", "halion_model_request_duration_seconds", "halion_model_requests_total", "model"),
+]
+
+def render():
+    """
+    Renderiza la vista de métricas de latencia, errores y throughput
+    """
+    col1, col2 = st.columns([3,1])
+    with col1:
+        st.subheader("📈 Métricas de Rendimiento")
+    with col2:
+        if st.button("🧹 Reiniciar Métricas"):
+            reset_metrics()
+            st.success("✅ Métricas reiniciadas")
+
+    snapshot = get_metrics_snapshot()
+    st.caption(f"Métricas en memoria del proceso desde hace {snapshot['uptime_seconds'] / 60:.1f} min")
+
+    for title, histogram_name, counter_name, label in METRIC_SECTIONS:
+        st.markdown(f"### {title}")
+        rows = build_rows(snapshot, histogram_name, counter_name, label)
+        if rows:
+            st.dataframe(rows, use_container_width=True, hide_index=True)
+        else:
+            st.info("ℹ️ Sin datos todavía")
+
+    render_token_usage(snapshot)
+    render_cache_stats()
+    render_tool_cache_stats()
+
+    with st.expander("📄 Formato Prometheus", expanded=False):
+        st.caption(f"Define {METRICS_PORT_ENV_VAR} para servirlo en http://<host>:<puerto>/metrics")
+        st.code(render_prometheus(), language="text")
+
+def build_rows(snapshot, histogram_name, counter_name, label):
+    """Combina histograma y contadores por etiqueta en filas para la tabla"""
+    uptime = max(snapshot["uptime_seconds"], 1e-9)
+    errors = {}
+    for c in snapshot["counters"]:
+        if c["name"] == counter_name and c["labels"].get("status") == "error":
+            key = (c["labels"].get("toolchain"), c["labels"].get(label))
+            errors[key] = errors.get(key, 0) + c["value"]
+
+    rows = []
+    for h in snapshot["histograms"]:
+        if h["name"] != histogram_name:
+            continue
+        key = (h["labels"].get("toolchain"), h["labels"].get(label))
+        row = {"toolchain": key[0]} if key[0] is not None else {}
+        row.update({
+            label: key[1],
+            "llamadas": h["count"],
+            "errores (%)": round(100 * errors.get(key, 0) / h["count"], 2) if h["count"] else 0.0,
+            "llamadas/min": round(60 * h["count"] / uptime, 2),
+            "p50 (ms)": round(h["p50"] * 1000, 2),
+            "p95 (ms)": round(h["p95"] * 1000, 2),
+            "p99 (ms)": round(h["p99"] * 1000, 2),
+            "máx (ms)": round(h["max"] * 1000, 2),
+        })
+        rows.append(row)
+    return sorted(rows, key=lambda r: r["p95 (ms)"], reverse=True)
+
+def render_token_usage(snapshot):
+    """Renderiza el consumo de tokens por modelo"""
+    usage = {}
+    for c in snapshot["counters"]:
+        if c["name"] == "halion_model_tokens_total":
+            model = c["labels"].get("model")
+            usage.setdefault(model, {"model": model, "prompt": 0, "completion": 0})[c["labels"].get("kind")] = int(c["value"])
+    if usage:
+        st.markdown("### 🔢 Tokens por modelo")
+        st.dataframe(list(usage.values()), use_container_width=True, hide_index=True)
+
+def render_cache_stats():
+    """Renderiza las estadísticas de la caché de respuestas del modelo"""
+    stats = get_cache_stats()
+    if stats["mode"] == "off" and not stats["memory_entries"]:
+        return
+    st.markdown("### 🗄️ Caché de respuestas")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Tasa de aciertos", f"{stats['hit_rate'] * 100:.1f}%")
+    col2.metric("Aciertos (memoria / disco)", f"{stats['memory_hits']} / {stats['disk_hits']}")
+    col3.metric("Fallos", stats["misses"])
+    col4.metric("Entradas en memoria", stats["memory_entries"])
+
+def render_tool_cache_stats():
+    """Renderiza la tasa de aciertos de la caché de resultados por herramienta"""
+    stats = get_tool_cache_stats()
+    if not stats:
+        return
+    st.markdown("### 🧠 Caché de resultados de tools")
+    rows = [
+        {
+            "tool": tool,
+            "aciertos": values["hits"],
+            "compartidas": values["shared"],
+            "fallos": values["misses"],
+            "tasa de aciertos (%)": round(values["hit_rate"] * 100, 1),
+        }
+        for tool, values in sorted(stats.items())
+    ]
+    st.dataframe(rows, use_container_width=True, hide_index=True)
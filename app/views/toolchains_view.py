@@ -135,6 +135,7 @@ def render_manual_creator():
             for i in range(st.session_state.get("manual_steps_count", 1)): # Limpiar solo los campos visibles
                  st.session_state[f"new_tool_{i}"] = ""
                  st.session_state[f"new_map_{i}"] = ""
+                 st.session_state[f"new_out_{i}"] = ""
 
         st.markdown("### Crear Nueva Toolchain")
             
@@ -172,7 +173,13 @@ def render_manual_creator():
                 key=f"new_map_{i}",
                 placeholder="Ejemplo:\ntexto: resumen\nidioma: idioma_destino"
             )
-            raw_steps.append((tool_name, map_text))
+            outputs_text = st.text_input(
+                "Output keys (separadas por comas, opcional)",
+                key=f"new_out_{i}",
+                placeholder="Ejemplo: traduccion",
+                help="Claves que el paso añade al contexto. Si se indican, los pasos que no dependen entre sí se ejecutan en paralelo."
+            )
+            raw_steps.append((tool_name, map_text, outputs_text))
 
         # Botones con callbacks
         col1, col2 = st.columns(2)
@@ -224,6 +231,11 @@ def render_toolchain_editor(toolchains):
                 if key_map in st.session_state:
                     map_text = "\n".join([f"{k}:{v}" for k, v in step.input_map.items()])
                     st.session_state[key_map] = map_text
+
+                # Restaurar output keys
+                key_out = f"edit_out_{i}"
+                if key_out in st.session_state:
+                    st.session_state[key_out] = ", ".join(step.output_keys or [])
         
         # Restaurar nombre y descripción
         if "edit_tc_name" in st.session_state:
@@ -247,7 +259,8 @@ def render_toolchain_editor(toolchains):
         for i in range(st.session_state[step_key]):
             tool_name_val = st.session_state.get(f"edit_tool_{target_name}_{i}", "")
             map_text_val = st.session_state.get(f"edit_map_{target_name}_{i}", "")
-            current_raw_steps.append((tool_name_val, map_text_val))
+            outputs_text_val = st.session_state.get(f"edit_out_{target_name}_{i}", "")
+            current_raw_steps.append((tool_name_val, map_text_val, outputs_text_val))
             
         # Llamar al controlador con los datos crudos
         tc_controller.handle_save_edited_toolchain(
@@ -294,12 +307,15 @@ def render_toolchain_editor(toolchains):
             # Usar claves con sufijo también para los pasos
             step_tool_key = f"edit_tool_{target_name}_{i}"
             step_map_key = f"edit_map_{target_name}_{i}"
+            step_out_key = f"edit_out_{target_name}_{i}"
 
             # Inicializar si es necesario (cuando se añaden pasos)
             if step_tool_key not in st.session_state:
                  st.session_state[step_tool_key] = ""
             if step_map_key not in st.session_state:
                  st.session_state[step_map_key] = ""
+            if step_out_key not in st.session_state:
+                 st.session_state[step_out_key] = ""
                  
             st.markdown(f"**Paso {i + 1}**")
             tool_name = st.text_input(f"Tool del Paso {i + 1}", key=step_tool_key)
@@ -308,8 +324,14 @@ def render_toolchain_editor(toolchains):
                 key=step_map_key,
                 placeholder="Ejemplo:\ntexto: resumen\nidioma: idioma_destino"
             )
+            outputs_text = st.text_input(
+                "Output keys (separadas por comas, opcional)",
+                key=step_out_key,
+                placeholder="Ejemplo: traduccion",
+                help="Claves que el paso añade al contexto. Si se indican, los pasos que no dependen entre sí se ejecutan en paralelo."
+            )
             # Recolectar los valores actuales de los inputs para pasar al controlador
-            raw_steps.append((tool_name, map_text))
+            raw_steps.append((tool_name, map_text, outputs_text))
     
     # Botones fuera del formulario si usamos reactividad directa
     col1, col2, col3 = st.columns([2,1,1])
@@ -7,7 +7,7 @@ from app.controllers.tool_controller import (
     handle_generate_tool_ai, handle_create_generated_tool, # Generación AI
     handle_create_manual_tool, # Creación manual
     get_static_tools_view, get_dynamic_tools_view, get_tool_state_view,
-    get_loading_errors_view, get_tool_code_view,
+    get_loading_errors_view, get_tool_code_view, get_last_reload_report_view,
     save_tool_edit, confirm_tool_delete
 )
 from app.core.env_manager import get_env_variables
@@ -21,11 +21,25 @@ def render():
     with col1:
         st.subheader("🔄 Gestión de Herramientas")
     with col2:
-        if st.button("🔄 Recargar Herramientas", help="Recarga todas las herramientas desde el disco"):
+        if st.button("🔄 Recargar Herramientas", help="Recarga las herramientas añadidas, modificadas o eliminadas en el disco"):
             with st.spinner("Recargando herramientas..."):
                 if reload_tools():
                     st.success("✅ Herramientas recargadas exitosamente")
             st.rerun()
+        force_reload = st.button("♻️ Recarga completa", help="Vuelve a procesar todas las herramientas aunque no hayan cambiado. Con carga diferida (HALION_LAZY_TOOLS), cada módulo se reimporta en su próxima llamada")
+        if force_reload:
+            with st.spinner("Recargando todas las herramientas..."):
+                reload_tools(force=True)
+            st.rerun()
+
+    # Resumen de la última recarga
+    report = get_last_reload_report_view()
+    if report:
+        st.caption(
+            f"Última recarga: {len(report['added'])} añadidas, {len(report['modified'])} modificadas, "
+            f"{len(report['removed'])} eliminadas, {report['unchanged']} sin cambios "
+            f"({report['duration_seconds']}s)"
+        )
     
     # Herramientas Estáticas
     with st.expander("📁 Herramientas Estáticas", expanded=True):
@@ -0,0 +1,2 @@
+# benchmarks/__init__.py
+# Este archivo permite que la carpeta benchmarks sea tratada como un paquete Python
@@ -0,0 +1,100 @@
+"""
+bench_chat.py
+
+Sobrecarga propia del pipeline de chat (chat_with_tools → call_tool_by_name → logger) contra
+el modelo simulado de app.core.model_backends, sin red.
+
+Cada turno hace dos llamadas al modelo: la primera pide una tool (argumentos generados a
+partir del schema) y la segunda responde con texto. Con la latencia simulada a 0 el tiempo
+por turno es íntegramente sobrecarga de HALion; con latencia, `sobrecarga_ms` descuenta el
+tiempo de espera del modelo.
+
+- `sync` / `stream`: turnos secuenciales con chat_with_tools y stream_chat_with_tools.
+- `async`: `concurrency` turnos a la vez con achat_with_tools (rendimiento agregado).
+
+Uso:
+    python -m benchmarks.bench_chat [--tools 10 100] [--turns 200] [--latency 0 0.05]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import isolated_tools_folder, isolated_log_files
+from app.core import tool_manager
+from app.core.model_backends import MockBackend
+from app.services.chat_service import chat_with_tools, achat_with_tools, stream_chat_with_tools
+
+MODEL_ROUNDS_PER_TURN = 2
+PROMPT = "Ejecuta la herramienta sintética con el texto indicado"
+
+def _sequential(turn, turns: int) -> float:
+    turn()  # Calentamiento (índice de tools, tabla de despacho)
+    start = time.perf_counter()
+    for _ in range(turns):
+        turn()
+    return (time.perf_counter() - start) / turns
+
+async def _concurrent(backend, turns: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await achat_with_tools(PROMPT, backend=backend)
+
+    await one()
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(turns)))
+    return time.perf_counter() - start
+
+def run(tool_counts=(10, 100), turns: int = 200, latencies=(0.0, 0.05), concurrency: int = 20) -> list[dict]:
+    results = []
+    for tools in tool_counts:
+        with isolated_tools_folder(tools, postprocess=True), isolated_log_files():
+            tool_manager.load_all_tools(lazy=False)
+            for latency in latencies:
+                backend = MockBackend(latency=latency)
+                # Con latencia, menos turnos secuenciales para acotar la duración
+                sequential_turns = turns if latency == 0 else max(5, min(turns, int(2 / latency)))
+                model_wait = MODEL_ROUNDS_PER_TURN * latency
+
+                per_turn = _sequential(lambda: chat_with_tools(PROMPT, backend=backend), sequential_turns)
+                per_stream_turn = _sequential(
+                    lambda: list(stream_chat_with_tools(PROMPT, backend=backend)), sequential_turns
+                )
+                elapsed = asyncio.run(_concurrent(backend, turns, concurrency))
+
+                for mode, value in (("sync", per_turn), ("stream", per_stream_turn)):
+                    results.append({
+                        "modo": mode, "tools": tools, "latencia_modelo_ms": latency * 1000,
+                        "turnos": sequential_turns,
+                        "por_turno_ms": round(value * 1000, 3),
+                        "sobrecarga_ms": round((value - model_wait) * 1000, 3),
+                    })
+                results.append({
+                    "modo": "async", "tools": tools, "latencia_modelo_ms": latency * 1000,
+                    "turnos": turns, "concurrencia": concurrency,
+                    "turnos_por_s": round(turns / elapsed, 2),
+                })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Sobrecarga del chat con el modelo simulado")
+    parser.add_argument("--tools", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--latency", type=float, nargs="+", default=[0.0, 0.05])
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    results = run(args.tools, args.turns, args.latency, args.concurrency)
+    print(f"{'modo':>6} {'tools':>6} {'latencia (ms)':>14} {'por turno (ms)':>15} {'sobrecarga (ms)':>16} {'turnos/s':>9}")
+    for r in results:
+        print(
+            f"{r['modo']:>6} {r['tools']:>6} {r['latencia_modelo_ms']:>14} {r.get('por_turno_ms', ''):>15} "
+            f"{r.get('sobrecarga_ms', ''):>16} {r.get('turnos_por_s', ''):>9}"
+        )
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
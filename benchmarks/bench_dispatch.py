@@ -0,0 +1,59 @@
+"""
+bench_dispatch.py
+
+Micro-benchmark del coste por llamada de `get_tools` y `call_tool_by_name` con 10, 100 y
+1000 herramientas registradas.
+
+Compara:
+- `get_tools_us`: obtener la vista de tools activas (en caché mientras no cambie el estado).
+- `llamada_directa_us`: invocar la función de la tool directamente (referencia).
+- `call_tool_by_name_us`: despacho por tabla + validación de argumentos.
+- `reconstruccion_catalogo_us`: reconstruir la vista de tools activas (lo que costaba
+  cada llamada antes de la tabla de despacho).
+
+Uso:
+    python -m benchmarks.bench_dispatch [--sizes 10 100 1000] [--calls 20000]
+"""
+
+import argparse
+import json
+
+from benchmarks.common import isolated_tools_folder, synthetic_tool_name, time_per_call
+from app.core import tool_manager
+
+def run(sizes=(10, 100, 1000), calls: int = 20000) -> list[dict]:
+    results = []
+    for size in sizes:
+        with isolated_tools_folder(size):
+            tool_manager.load_all_tools(force=True, lazy=False)
+            name = synthetic_tool_name(size // 2)
+            arguments = {"texto": "hola", "veces": 2}
+            func = tool_manager.get_all_loaded_tools()[name]["func"]
+
+            def rebuild_catalog():
+                tool_manager._bump_tools_version()
+                tool_manager.get_tools()
+
+            results.append({
+                "tools": size,
+                "get_tools_us": round(time_per_call(tool_manager.get_tools, calls), 3),
+                "llamada_directa_us": round(time_per_call(lambda: func(**arguments), calls), 3),
+                "call_tool_by_name_us": round(time_per_call(lambda: tool_manager.call_tool_by_name(name, arguments), calls), 3),
+                "reconstruccion_catalogo_us": round(time_per_call(rebuild_catalog, max(10, calls // size)), 3),
+            })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Coste por llamada de get_tools y call_tool_by_name")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.calls)
+    print(f"{'tools':>6} {'get_tools (us)':>15} {'directa (us)':>14} {'call_tool_by_name (us)':>24} {'reconstrucción (us)':>21}")
+    for r in results:
+        print(f"{r['tools']:>6} {r['get_tools_us']:>15} {r['llamada_directa_us']:>14} {r['call_tool_by_name_us']:>24} {r['reconstruccion_catalogo_us']:>21}")
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+bench_env_detection.py
+
+Tiempo de `detect_env_variables` sobre código fuente sintético de distintos tamaños.
+
+El código repite bloques de una herramienta típica (docstring, comentarios, os.getenv con
+nombres distintos y lógica de relleno), de modo que el número de variables encontradas
+crece con el tamaño.
+
+Uso:
+    python -m benchmarks.bench_env_detection [--sizes-kb 10 100 1000]
+"""
+
+import argparse
+import json
+
+from benchmarks.common import time_once
+from app.utils.env_detection import detect_env_variables
+
+BLOCK_TEMPLATE = '''
+# Clave de acceso al servicio {index}
+SERVICE_{index}_URL = "https://api.servicio{index}.example.com/v1"
+
+def consultar_servicio_{index}(consulta: str, limite: int = 10) -> dict:
+    """Consulta el servicio externo número {index} y devuelve los resultados."""
+    api_key = os.getenv("SERVICE_{index}_API_KEY")
+    token = os.environ.get('SERVICE_{index}_TOKEN')
+    if not api_key or not token:
+        return {{"error": "Faltan credenciales del servicio {index}"}}
+    resultados = []
+    for pagina in range(1, limite + 1):
+        respuesta = requests.get(SERVICE_{index}_URL, params={{"q": consulta, "page": pagina}}, timeout=10)
+        if respuesta.status_code != 200:
+            break
+        resultados.extend(respuesta.json().get("items", []))
+    return {{"consulta": consulta, "total": len(resultados), "resultados": resultados}}
+'''
+
+HEADER = "import os\nimport requests\nfrom dotenv import load_dotenv\n\nload_dotenv()\n"
+
+def build_source(size_kb: int) -> str:
+    """Código fuente sintético de aproximadamente `size_kb` KB."""
+    parts = [HEADER]
+    length = len(HEADER)
+    index = 0
+    while length < size_kb * 1024:
+        block = BLOCK_TEMPLATE.format(index=index)
+        parts.append(block)
+        length += len(block)
+        index += 1
+    return "".join(parts)
+
+def run(sizes_kb=(10, 100, 1000)) -> list[dict]:
+    results = []
+    for size_kb in sizes_kb:
+        source = build_source(size_kb)
+        detect_env_variables(source[:2048])  # Calentamiento (compilación de expresiones regulares)
+        found = []
+        elapsed = time_once(lambda: found.extend(detect_env_variables(source)))
+        results.append({
+            "tamano_kb": size_kb,
+            "variables": len(found),
+            "tiempo_ms": round(elapsed * 1000, 3),
+            "mb_por_s": round(len(source) / (1024 * 1024) / elapsed, 3),
+        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de detect_env_variables")
+    parser.add_argument("--sizes-kb", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    results = run(args.sizes_kb)
+    print(f"{'KB':>6} {'variables':>10} {'tiempo (ms)':>12} {'MB/s':>8}")
+    for r in results:
+        print(f"{r['tamano_kb']:>6} {r['variables']:>10} {r['tiempo_ms']:>12} {r['mb_por_s']:>8}")
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+bench_logging.py
+
+Rendimiento del log de llamadas a herramientas (logger.py), en un directorio temporal.
+
+- Escritura (`run_writes`): ritmo de `log_tool_call` por backend, tanto al encolar
+  (lo que paga la petición) como hasta que todo está en disco (`flush_logs`).
+- Lectura (`run_reads`): `load_log_entries(100)` (últimas entradas) y un recorrido completo
+  con `iter_log_entries` según el tamaño del log.
+
+Uso:
+    python -m benchmarks.bench_logging [--calls 20000] [--sizes 1000 10000 100000]
+"""
+
+import argparse
+import json
+import os
+import time
+
+from benchmarks.common import isolated_log_files, time_once, time_per_call
+from app.core import logger
+
+ARGUMENTS = {"texto": "hola mundo", "veces": 2}
+RESULT = {"resultado": "hola mundo hola mundo", "fuente": "benchmark"}
+
+def _log_one(i: int = 0):
+    logger.log_tool_call("bench_tool", ARGUMENTS, RESULT, user_id=f"user_{i % 10}", execution_time=0.001)
+
+def run_writes(calls: int = 20000, backends=("jsonl", "sqlite")) -> list[dict]:
+    results = []
+    for backend in backends:
+        with isolated_log_files(backend):
+            _log_one()
+            logger.flush_logs()
+            start = time.perf_counter()
+            for i in range(calls):
+                _log_one(i)
+            enqueued = time.perf_counter() - start
+            logger.flush_logs(timeout=None)
+            total = time.perf_counter() - start
+        results.append({
+            "backend": backend,
+            "llamadas": calls,
+            "encolado_por_s": round(calls / enqueued, 1),
+            "persistido_por_s": round(calls / total, 1),
+        })
+    return results
+
+def run_reads(sizes=(1000, 10000, 100000)) -> list[dict]:
+    results = []
+    for size in sizes:
+        with isolated_log_files("jsonl"):
+            for i in range(size):
+                _log_one(i)
+            logger.flush_logs(timeout=None)
+            log_bytes = os.path.getsize(logger.LOG_FILE)
+            tail = time_per_call(lambda: logger.load_log_entries(100), 20) / 1000
+            full_scan = time_once(lambda: sum(1 for _ in logger.iter_log_entries()))
+        results.append({
+            "entradas": size,
+            "tamano_mb": round(log_bytes / (1024 * 1024), 2),
+            "ultimas_100_ms": round(tail, 3),
+            "recorrido_completo_ms": round(full_scan * 1000, 3),
+        })
+    return results
+
+def run(calls: int = 20000, sizes=(1000, 10000, 100000)) -> dict:
+    return {"escritura": run_writes(calls), "lectura": run_reads(sizes)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Rendimiento del log de llamadas")
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    results = run(args.calls, args.sizes)
+    print(f"{'backend':>8} {'encolado/s':>12} {'persistido/s':>14}")
+    for r in results["escritura"]:
+        print(f"{r['backend']:>8} {r['encolado_por_s']:>12} {r['persistido_por_s']:>14}")
+    print(f"\n{'entradas':>9} {'MB':>7} {'últimas 100 (ms)':>17} {'recorrido (ms)':>15}")
+    for r in results["lectura"]:
+        print(f"{r['entradas']:>9} {r['tamano_mb']:>7} {r['ultimas_100_ms']:>17} {r['recorrido_completo_ms']:>15}")
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
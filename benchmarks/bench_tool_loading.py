@@ -0,0 +1,68 @@
+"""
+bench_tool_loading.py
+
+Tiempo de `load_all_tools` según el número de herramientas:
+
+- `frio_inmediato_ms`: primera carga en un proceso nuevo sin catálogo, importando cada módulo.
+- `frio_diferido_ms`: primera carga sin catálogo en modo diferido (schema leído por AST).
+- `catalogo_ms`: carga de un proceso nuevo con el catálogo en disco ya escrito.
+- `caliente_ms`: recarga sin cambios en la carpeta (solo comprobación de huellas).
+- `un_cambio_ms`: recarga tras modificar un único archivo.
+
+Uso:
+    python -m benchmarks.bench_tool_loading [--sizes 10 100 1000]
+"""
+
+import argparse
+import json
+import os
+
+from benchmarks.common import isolated_tools_folder, synthetic_tool_name, time_once, _reset_tool_manager
+from app.core import tool_manager
+
+def _cold_start():
+    """Simula un proceso nuevo: sin estado en memoria ni catálogo en disco."""
+    _reset_tool_manager()
+    if os.path.exists(tool_manager.TOOL_CATALOG_FILE):
+        os.remove(tool_manager.TOOL_CATALOG_FILE)
+
+def run(sizes=(10, 100, 1000)) -> list[dict]:
+    results = []
+    for size in sizes:
+        with isolated_tools_folder(size) as tools_dir:
+            _cold_start()
+            eager = time_once(lambda: tool_manager.load_all_tools(lazy=False))
+            _cold_start()
+            lazy = time_once(lambda: tool_manager.load_all_tools(lazy=True))
+            _reset_tool_manager()  # El catálogo escrito por la carga anterior se conserva
+            catalog = time_once(lambda: tool_manager.load_all_tools(lazy=True))
+            warm = time_once(lambda: tool_manager.load_all_tools(lazy=True))
+
+            path = os.path.join(tools_dir, f"{synthetic_tool_name(0)}.py")
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("\n# modificado\n")
+            one_changed = time_once(lambda: tool_manager.load_all_tools(lazy=True))
+
+            results.append({
+                "tools": size,
+                "frio_inmediato_ms": round(eager * 1000, 3),
+                "frio_diferido_ms": round(lazy * 1000, 3),
+                "catalogo_ms": round(catalog * 1000, 3),
+                "caliente_ms": round(warm * 1000, 3),
+                "un_cambio_ms": round(one_changed * 1000, 3),
+            })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de carga de herramientas")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    results = run(args.sizes)
+    print(f"{'tools':>6} {'frío inm. (ms)':>15} {'frío dif. (ms)':>15} {'catálogo (ms)':>14} {'caliente (ms)':>14} {'1 cambio (ms)':>14}")
+    for r in results:
+        print(f"{r['tools']:>6} {r['frio_inmediato_ms']:>15} {r['frio_diferido_ms']:>15} {r['catalogo_ms']:>14} {r['caliente_ms']:>14} {r['un_cambio_ms']:>14}")
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+bench_toolchain.py
+
+Rendimiento de `execute_toolchain` con cadenas de N pasos sobre herramientas sintéticas.
+
+Cada paso llama a una herramienta distinta y toma su entrada de la salida del anterior.
+Mide:
+- `cadenas_por_s`: ejecuciones completas por segundo.
+- `por_paso_us`: tiempo medio por paso (incluye la comprobación de cambios en toolchains.json,
+  el mapeo de entradas, el despacho y el registro de métricas).
+
+Uso:
+    python -m benchmarks.bench_toolchain [--steps 1 10 50] [--runs 200]
+"""
+
+import argparse
+import json
+import time
+
+from benchmarks.common import (
+    isolated_tools_folder, isolated_toolchains_file, quiet, synthetic_tool_name
+)
+from app.core import tool_manager, toolchain_registry
+from app.models.toolchain_model import Toolchain, ToolchainStep
+from app.services.toolchain_service import execute_toolchain
+
+def build_chain(name: str, steps: int) -> Toolchain:
+    """Cadena lineal: el primer paso lee "texto" y los siguientes el "resultado" anterior."""
+    return Toolchain(name, f"Cadena sintética de {steps} pasos", [
+        ToolchainStep(synthetic_tool_name(i), {"texto": "texto" if i == 0 else "resultado"})
+        for i in range(steps)
+    ])
+
+def run(steps=(1, 10, 50), runs: int = 200) -> list[dict]:
+    results = []
+    with isolated_tools_folder(max(steps)), isolated_toolchains_file():
+        tool_manager.load_all_tools(lazy=False)
+        for count in steps:
+            name = f"bench_chain_{count}"
+            toolchain_registry.register_toolchain(build_chain(name, count))
+            toolchain_registry.save_toolchains_to_disk()
+            with quiet():
+                execute_toolchain(name, {"texto": "hola"})  # Calentamiento
+                start = time.perf_counter()
+                for _ in range(runs):
+                    execute_toolchain(name, {"texto": "hola"})
+                elapsed = time.perf_counter() - start
+            results.append({
+                "pasos": count,
+                "ejecuciones": runs,
+                "cadenas_por_s": round(runs / elapsed, 2),
+                "por_paso_us": round(elapsed / (runs * count) * 1e6, 3),
+            })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Rendimiento de execute_toolchain")
+    parser.add_argument("--steps", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    results = run(args.steps, args.runs)
+    print(f"{'pasos':>6} {'cadenas/s':>12} {'por paso (us)':>15}")
+    for r in results:
+        print(f"{r['pasos']:>6} {r['cadenas_por_s']:>12} {r['por_paso_us']:>15}")
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+common.py
+
+Utilidades compartidas por los benchmarks: generación de herramientas sintéticas en una
+carpeta temporal aislada, logs y toolchains temporales y medición de tiempos por operación.
+
+Los benchmarks no necesitan red ni tocan app/tools, app/config ni app/debug_logs.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager, redirect_stdout
+
+# Añadir directorio raíz al path de Python para los imports (igual que app/main.py)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core import tool_manager, logger, log_store, toolchain_registry
+
+TOOL_TEMPLATE = '''def {name}(texto: str, veces: int = 1):
+    """Herramienta sintética para benchmarks."""
+    return {{"resultado": texto * veces}}
+
+schema = {{
+    "name": "{name}",
+    "description": "Herramienta sintética número {index} para benchmarks",
+    "parameters": {{
+        "type": "object",
+        "properties": {{
+            "texto": {{"type": "string", "description": "Texto de entrada"}},
+            "veces": {{"type": "integer", "description": "Número de repeticiones"}}
+        }},
+        "required": ["texto"]
+    }},
+    "postprocess": {postprocess}
+}}
+'''
+
+def synthetic_tool_name(index: int) -> str:
+    return f"bench_tool_{index:05d}"
+
+def write_synthetic_tools(folder: str, count: int, extra_source: str = "", postprocess: bool = False):
+    """Escribe `count` archivos de herramienta sintéticos en `folder`."""
+    for i in range(count):
+        name = synthetic_tool_name(i)
+        with open(os.path.join(folder, f"{name}.py"), "w", encoding="utf-8") as f:
+            f.write(extra_source + TOOL_TEMPLATE.format(name=name, index=i, postprocess=postprocess))
+
+@contextmanager
+def isolated_tools_folder(count: int = 0, extra_source: str = "", postprocess: bool = False):
+    """
+    Redirige tool_manager a una carpeta temporal con `count` herramientas sintéticas.
+
+    El catálogo, el estado de las tools y el log de depuración también se escriben en la
+    carpeta temporal. Al salir se restauran las rutas originales y se vacía el estado en
+    memoria de tool_manager.
+    """
+    originals = (
+        tool_manager.TOOLS_FOLDER, tool_manager.DEBUG_LOGS_FOLDER,
+        tool_manager.TOOL_CATALOG_FILE, tool_manager.TOOL_STATUS_FILE
+    )
+    with tempfile.TemporaryDirectory(prefix="halion_bench_") as tmp:
+        tools_dir = os.path.join(tmp, "tools")
+        os.makedirs(tools_dir)
+        write_synthetic_tools(tools_dir, count, extra_source, postprocess)
+        tool_manager.TOOLS_FOLDER = tools_dir
+        tool_manager.DEBUG_LOGS_FOLDER = tmp
+        tool_manager.TOOL_CATALOG_FILE = os.path.join(tmp, ".tool_catalog.json")
+        tool_manager.TOOL_STATUS_FILE = os.path.join(tmp, ".tool_status.json")
+        _reset_tool_manager()
+        try:
+            yield tools_dir
+        finally:
+            (tool_manager.TOOLS_FOLDER, tool_manager.DEBUG_LOGS_FOLDER,
+             tool_manager.TOOL_CATALOG_FILE, tool_manager.TOOL_STATUS_FILE) = originals
+            _reset_tool_manager()
+
+def _reset_tool_manager():
+    tool_manager._loaded_tools_cache.clear()
+    tool_manager._tool_fingerprints.clear()
+    tool_manager._file_tool_names.clear()
+    tool_manager._file_errors.clear()
+    tool_manager._tool_catalog = None
+    tool_manager._tool_status = {}
+    tool_manager._bump_tools_version()
+
+@contextmanager
+def isolated_log_files(backend: str = "jsonl"):
+    """
+    Redirige el log de llamadas (JSONL y SQLite) a una carpeta temporal vacía.
+
+    Args:
+        backend: Valor de HALION_LOG_BACKEND durante el bloque ("jsonl", "sqlite" o "both").
+    """
+    logger.flush_logs()
+    originals = (logger.LOG_FILE, log_store.DB_FILE, os.environ.get(logger.LOG_BACKEND_ENV_VAR))
+    with tempfile.TemporaryDirectory(prefix="halion_bench_logs_") as tmp:
+        logger.LOG_FILE = os.path.join(tmp, "tool_calls.log")
+        log_store.DB_FILE = os.path.join(tmp, "tool_calls.db")
+        os.environ[logger.LOG_BACKEND_ENV_VAR] = backend
+        logger._archive_indexes.clear()
+        try:
+            yield tmp
+        finally:
+            logger.flush_logs()
+            logger.LOG_FILE, log_store.DB_FILE = originals[:2]
+            if originals[2] is None:
+                os.environ.pop(logger.LOG_BACKEND_ENV_VAR, None)
+            else:
+                os.environ[logger.LOG_BACKEND_ENV_VAR] = originals[2]
+            logger._archive_indexes.clear()
+            conn = getattr(log_store._local, "conn", None)
+            if conn is not None:
+                conn.close()
+                log_store._local.conn = None
+
+@contextmanager
+def isolated_toolchains_file():
+    """Redirige el registro de toolchains a un toolchains.json temporal (vacío al empezar)."""
+    original = toolchain_registry.TOOLCHAINS_FILE
+    with tempfile.TemporaryDirectory(prefix="halion_bench_chains_") as tmp:
+        toolchain_registry.TOOLCHAINS_FILE = os.path.join(tmp, "toolchains.json")
+        toolchain_registry.load_toolchains_from_disk()
+        try:
+            yield toolchain_registry.TOOLCHAINS_FILE
+        finally:
+            toolchain_registry.TOOLCHAINS_FILE = original
+            toolchain_registry.load_toolchains_from_disk()
+
+@contextmanager
+def quiet():
+    """Descarta la salida estándar (los servicios imprimen trazas en cada paso)."""
+    with open(os.devnull, "w", encoding="utf-8") as devnull, redirect_stdout(devnull):
+        yield
+
+def time_once(func) -> float:
+    """Ejecuta `func` una vez y devuelve los segundos transcurridos."""
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+def time_per_call(func, iterations: int) -> float:
+    """Ejecuta `func` `iterations` veces y devuelve los microsegundos medios por llamada."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
@@ -0,0 +1,149 @@
+"""
+run_all.py
+
+Ejecuta la batería de benchmarks y guarda los resultados en JSON para comparar ejecuciones.
+
+Los benchmarks no necesitan red (el chat usa el modelo simulado) ni tocan los datos de la
+aplicación. Cada resultado se guarda con metadatos (fecha, commit, Python, plataforma) en
+benchmarks/results/<fecha>.json, salvo que se indique otro archivo con --output.
+
+Con --compare se muestra la variación de cada métrica respecto a una ejecución anterior
+(tiempos: menos es mejor; ritmos "_por_s": más es mejor).
+
+Uso:
+    python -m benchmarks.run_all [--quick] [--only chat logging] [--output res.json]
+                                 [--compare benchmarks/results/anterior.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from benchmarks import (
+    bench_chat, bench_dispatch, bench_env_detection, bench_logging, bench_tool_loading, bench_toolchain
+)
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Parámetros de cada benchmark: completos y reducidos (--quick)
+BENCHMARKS = {
+    "tool_loading": (bench_tool_loading.run, {"sizes": (10, 100, 1000)}, {"sizes": (10, 100)}),
+    "dispatch": (bench_dispatch.run, {"sizes": (10, 100, 1000), "calls": 20000}, {"sizes": (10, 100), "calls": 2000}),
+    "toolchain": (bench_toolchain.run, {"steps": (1, 10, 50), "runs": 200}, {"steps": (1, 10), "runs": 20}),
+    "logging": (bench_logging.run, {"calls": 20000, "sizes": (1000, 10000, 100000)}, {"calls": 2000, "sizes": (1000, 10000)}),
+    "env_detection": (bench_env_detection.run, {"sizes_kb": (10, 100, 1000)}, {"sizes_kb": (10, 100)}),
+    "chat": (bench_chat.run, {"tool_counts": (10, 100), "turns": 200, "latencies": (0.0, 0.05)},
+             {"tool_counts": (10,), "turns": 20, "latencies": (0.0,)}),
+}
+
+# Sufijos de las claves que son métricas (el resto identifican la configuración de la fila)
+LOWER_IS_BETTER = ("_ms", "_us")
+HIGHER_IS_BETTER = ("_por_s",)
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10,
+            cwd=os.path.dirname(RESULTS_DIR)
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def run_benchmarks(names=None, quick: bool = False) -> dict:
+    """Ejecuta los benchmarks indicados (todos por defecto) y devuelve el informe completo."""
+    report = {
+        "meta": {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+            "perfil": "quick" if quick else "full",
+        },
+        "resultados": {},
+        "duracion_s": {},
+    }
+    for name in names or BENCHMARKS:
+        func, full_params, quick_params = BENCHMARKS[name]
+        print(f"[Benchmarks] {name}...", file=sys.stderr)
+        start = time.perf_counter()
+        report["resultados"][name] = func(**(quick_params if quick else full_params))
+        report["duracion_s"][name] = round(time.perf_counter() - start, 2)
+    return report
+
+def _flatten_metrics(results, prefix: str = "") -> dict:
+    """{"bench/sección[config]/métrica": valor} para comparar informes."""
+    metrics = {}
+    if isinstance(results, dict):
+        for key, value in results.items():
+            metrics.update(_flatten_metrics(value, f"{prefix}/{key}" if prefix else key))
+        return metrics
+    for row in results:
+        config = ",".join(
+            f"{k}={v}" for k, v in row.items() if not k.endswith(LOWER_IS_BETTER + HIGHER_IS_BETTER)
+        )
+        for key, value in row.items():
+            if key.endswith(LOWER_IS_BETTER + HIGHER_IS_BETTER) and isinstance(value, (int, float)):
+                metrics[f"{prefix}[{config}]/{key}"] = value
+    return metrics
+
+def compare_reports(previous: dict, current: dict) -> list[dict]:
+    """
+    Compara las métricas comunes de dos informes.
+
+    Returns:
+        list[dict]: {"metrica", "antes", "ahora", "cambio_pct", "mejora"} por métrica, donde
+        "mejora" indica si el cambio va en la dirección buena.
+    """
+    before = _flatten_metrics(previous.get("resultados", {}))
+    after = _flatten_metrics(current.get("resultados", {}))
+    rows = []
+    for metric in sorted(before.keys() & after.keys()):
+        old, new = before[metric], after[metric]
+        if not old:
+            continue
+        change = (new - old) / old * 100
+        rows.append({
+            "metrica": metric,
+            "antes": old,
+            "ahora": new,
+            "cambio_pct": round(change, 1),
+            "mejora": change > 0 if metric.endswith(HIGHER_IS_BETTER) else change < 0,
+        })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Batería de benchmarks de HALion")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="Benchmarks a ejecutar (por defecto todos)")
+    parser.add_argument("--quick", action="store_true", help="Tamaños reducidos para una comprobación rápida")
+    parser.add_argument("--output", help="Archivo JSON de resultados (por defecto benchmarks/results/<fecha>.json)")
+    parser.add_argument("--compare", help="Informe JSON anterior con el que comparar")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.only, args.quick)
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"[Benchmarks] Resultados guardados en {output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        print(f"\nComparación con {args.compare} (commit {previous.get('meta', {}).get('commit')}):")
+        for row in compare_reports(previous, report):
+            mark = "✅" if row["mejora"] else "⚠️"
+            print(f"{mark} {row['cambio_pct']:>+8.1f}%  {row['metrica']}: {row['antes']} → {row['ahora']}")
+    else:
+        print(json.dumps(report["resultados"], indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()